@@ -0,0 +1,248 @@
+"""
+A load test comparing the sync and async views of the chats, messages and message endpoints under many concurrent slow clients.
+
+It drives the ASGI application of the project in process, the way uvicorn does, so that the numbers only include the work of Django and the database:
+- Every client sends its request a little at a time, waits between requests and reads each response slowly.
+- Every client lists the messages of a chat, fetches one of them and posts a new one, authenticated with its own access token.
+- Each mode runs in its own process, with ASYNC_VIEWS set accordingly, against a test database created for the run and destroyed after it.
+
+It reports the throughput, the latency percentiles and the largest number of threads the process used at once, which is what bounds concurrency when views run in threads.
+It needs the database environment variables the app uses, preferably of PostgreSQL since SQLite refuses some of the concurrent writes, which are counted as errors, and is run from the root of the repository:
+
+    python benchmarks/async_load.py --clients 1000 --requests 5
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = ('sync', 'async')
+
+def parse_arguments():
+    """
+    A function that parses the options of the load test.
+    """
+    parser = argparse.ArgumentParser(description='Compares the sync and async views of the chat and message endpoints under many concurrent slow clients.')
+    parser.add_argument('--clients', type=int, default=1000, help='Number of concurrent clients.')
+    parser.add_argument('--requests', type=int, default=5, help='Number of rounds of requests made by each client.')
+    parser.add_argument('--delay', type=float, default=0.05, help='Seconds a client takes to send a request or read a response.')
+    parser.add_argument('--mode', choices=MODES, help='Runs a single mode in this process instead of every mode in its own process.')
+
+    return parser.parse_args()
+
+def setup_database(clients):
+    """
+    A function that creates a test database with a chat shared by pairs of users and a page of messages in each, and returns the access token, chat id and a message id for each client.
+    """
+    from django.db import connection
+    from rest_framework_simplejwt.tokens import AccessToken
+    from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory, MessageFactory
+
+    if connection.vendor == 'sqlite':
+
+        # The shared in memory database SQLite tests use can't open the message search table from several threads at once.
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), 'cable_async_load.sqlite3')
+
+    connection.creation.create_test_db(verbosity=0)
+
+    client_setups = []
+
+    for index in range(0, clients, 2):
+
+        # Clients authenticate with tokens made for them, so the users get an unusable password instead of a slow hash.
+        users = UserFactory.create_batch(2, profile_image = None, password = '!')
+        chat = ChatFactory.create()
+
+        for user in users:
+
+            ParticipantFactory(model_user = user, chat = chat)
+
+        messages = MessageFactory.create_batch(10, sender = users[0], chat = chat)
+
+        for user in users:
+
+            client_setups.append((str(AccessToken.for_user(user)), chat.id, messages[0].id))
+
+    return client_setups[:clients]
+
+async def send_request(application, method, path, token, body, delay):
+    """
+    A function that sends a request to an ASGI application as a slow client would, sending the body in two parts and reading every part of the response after a delay, and returns the status of the response.
+    """
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode()), (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+
+    middle = len(body) // 2
+
+    parts = [{'type': 'http.request', 'body': body[:middle], 'more_body': True}, {'type': 'http.request', 'body': body[middle:], 'more_body': False}]
+
+    finished = asyncio.Event()
+
+    async def receive():
+
+        if parts:
+
+            await asyncio.sleep(delay / 2)
+
+            return parts.pop(0)
+
+        # The client stays connected until it has read the whole response.
+        await finished.wait()
+
+        return {'type': 'http.disconnect'}
+
+    status = None
+
+    async def send(message):
+
+        nonlocal status
+
+        if message['type'] == 'http.response.start':
+
+            status = message['status']
+
+        await asyncio.sleep(delay / 2)
+
+        if message['type'] == 'http.response.body' and not message.get('more_body'):
+
+            finished.set()
+
+    await application(scope, receive, send)
+
+    return status
+
+async def run_client(application, token, chat_id, message_id, rounds, delay, latencies, errors):
+    """
+    A function that makes the requests of one client in turn, recording the latency of each and counting the ones that failed.
+    """
+    requests = [
+        ('GET', f'/api/chats/{chat_id}/messages/', b''),
+        ('GET', f'/api/chats/{chat_id}/messages/{message_id}/', b''),
+        ('POST', f'/api/chats/{chat_id}/messages/', json.dumps({'content': 'load test message'}).encode()),
+    ]
+
+    for _ in range(rounds):
+
+        for method, path, body in requests:
+
+            start = time.perf_counter()
+
+            status = await send_request(application, method, path, token, body, delay)
+
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            if status >= 400:
+
+                errors.append(status)
+
+async def sample_threads(samples, stop):
+    """
+    A function that records the number of threads of the process every few milliseconds until it is stopped.
+    """
+    while not stop.is_set():
+
+        samples.append(threading.active_count())
+
+        await asyncio.sleep(0.005)
+
+async def run_load(application, client_setups, rounds, delay):
+    """
+    A function that runs every client at once against the application and returns the latencies, errors, largest thread count and duration of the run.
+    """
+    latencies = []
+    errors = []
+    samples = []
+
+    stop = asyncio.Event()
+    sampler = asyncio.ensure_future(sample_threads(samples, stop))
+
+    start = time.perf_counter()
+
+    await asyncio.gather(*[run_client(application, token, chat_id, message_id, rounds, delay, latencies, errors) for token, chat_id, message_id in client_setups])
+
+    duration = time.perf_counter() - start
+
+    stop.set()
+
+    await sampler
+
+    return latencies, errors, max(samples), duration
+
+def run_mode(arguments):
+    """
+    A function that sets up the app in the mode of the arguments, runs the load and prints a json summary for the parent process.
+    """
+    os.environ['ASYNC_VIEWS'] = 'true' if arguments.mode == 'async' else 'false'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cable.settings')
+
+    from cable.asgi import application
+    from django.db import connection
+
+    client_setups = setup_database(arguments.clients)
+
+    try:
+        latencies, errors, peak_threads, duration = asyncio.run(run_load(application, client_setups, arguments.requests, arguments.delay))
+
+    finally:
+
+        connection.creation.destroy_test_db(connection.settings_dict['NAME'], verbosity=0)
+
+    latencies.sort()
+
+    summary = {
+        'mode': arguments.mode,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput': len(latencies) / duration,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+        'threads': peak_threads,
+    }
+
+    print(json.dumps(summary))
+
+def main():
+    """
+    A function that runs every mode in its own process, so each loads the urls of its mode, and prints the results side by side.
+    """
+    arguments = parse_arguments()
+
+    if arguments.mode:
+
+        return run_mode(arguments)
+
+    print(f'{"mode":<8}{"requests":>10}{"errors":>8}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"threads":>9}')
+
+    for mode in MODES:
+
+        command = [sys.executable, os.path.abspath(__file__), '--mode', mode, '--clients', str(arguments.clients), '--requests', str(arguments.requests), '--delay', str(arguments.delay)]
+
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+
+        summary = json.loads(output.strip().splitlines()[-1])
+
+        print(f'{mode:<8}{summary["requests"]:>10}{summary["errors"]:>8}{summary["throughput"]:>10.1f}{summary["p50"]:>10.1f}{summary["p95"]:>10.1f}{summary["threads"]:>9}')
+
+if __name__ == '__main__':
+
+    main()
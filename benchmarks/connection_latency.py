@@ -0,0 +1,94 @@
+"""
+A benchmark of the per request latency of the ways the app can connect to PostgreSQL.
+
+It runs the same small query inside the request_started and request_finished signals Django sends around every request, so connections are opened, reused and closed exactly as they are when serving requests:
+- direct: CONN_MAX_AGE = 0, a new connection for every request.
+- persistent: CONN_MAX_AGE = None with health checks, one connection kept open by the thread.
+- pooled: the postgresql_pool backend, a connection borrowed from the pool of the process for every request.
+
+It needs the database environment variables the app uses and is run from the root of the repository:
+
+    python benchmarks/connection_latency.py --requests 500
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cable.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+DATABASE_VARIANTS = {
+    'direct': {'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': 0},
+    'persistent': {'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True},
+    'pooled': {'ENGINE': 'cable_api.backends.postgresql_pool', 'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'max_size': 4}}},
+}
+
+def configure_databases():
+    """
+    A function that adds a database alias for each variant, copied from the default database, before any connection is made.
+    """
+    for alias, overrides in DATABASE_VARIANTS.items():
+
+        settings.DATABASES[alias] = {**settings.DATABASES['default'], 'OPTIONS': {}, **overrides}
+
+def time_requests(alias, requests):
+    """
+    A function that times a number of simulated requests running one query on a database alias and returns their latencies in milliseconds.
+    """
+    latencies = []
+
+    for _ in range(requests):
+
+        start = time.perf_counter()
+
+        request_started.send(sender=None)
+
+        with connections[alias].cursor() as cursor:
+
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+        request_finished.send(sender=None)
+
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return latencies
+
+def main():
+    """
+    A function that runs the benchmark for every variant after a warm up and prints the latency percentiles of each.
+    """
+    parser = argparse.ArgumentParser(description='Compares the per request latency of direct, persistent and pooled PostgreSQL connections.')
+    parser.add_argument('--requests', type=int, default=500, help='Number of requests timed for each variant.')
+    arguments = parser.parse_args()
+
+    configure_databases()
+
+    print(f'{"variant":<12}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}')
+
+    for alias in DATABASE_VARIANTS:
+
+        time_requests(alias, 10)
+
+        latencies = sorted(time_requests(alias, arguments.requests))
+
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+
+        print(f'{alias:<12}{statistics.mean(latencies):>10.3f}{statistics.median(latencies):>10.3f}{p95:>10.3f}')
+
+    connections.close_all()
+
+if __name__ == '__main__':
+
+    main()
@@ -0,0 +1,98 @@
+"""
+A benchmark of rendering and parsing pages of serialized messages with the JSONRenderer and JSONParser of the rest framework and with their orjson replacements.
+
+Each page holds the serialized messages of a response of the messages endpoint, built from unsaved messages so that no database is needed, and is rendered the way a response is.
+The rendered page is then parsed back, the way a batch of messages sent to the batch endpoint is.
+
+It is run from the root of the repository:
+
+    python benchmarks/json_rendering.py --pages 50 100 1000 --repeat 20
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import statistics
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cable.settings')
+
+import django
+
+django.setup()
+
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from cable_api.models import Message
+from cable_api.parsers import ORJSONParser
+from cable_api.renderers import ORJSONRenderer
+from cable_api.serializers import MessageSerializer
+
+IMPLEMENTATIONS = {
+    'stdlib': (JSONRenderer, JSONParser),
+    'orjson': (ORJSONRenderer, ORJSONParser),
+}
+
+def build_page(size):
+    """
+    A function that serializes a page of unsaved messages of the given size, with content of a varied length and characters, the way the messages endpoint does.
+    """
+    now = timezone.now()
+
+    contents = ['Short message.', 'A longer message with a few more words in it, as most messages are. ' * 3, 'Ünïcödé and emoji 😀 in a message.']
+
+    messages = [Message(id = index, content = contents[index % len(contents)], sender_id = index % 7, chat_id = 1, date_created = now - timedelta(seconds=index)) for index in range(size)]
+
+    return {'messages': MessageSerializer(messages, many=True).data, 'next': 'WzE2ODAwMDAwMDAsMTAwXQ==', 'sync_token': 'WzE2ODAwMDAwMDBd'}
+
+def time_call(function, repeat):
+    """
+    A function that times a number of calls to a function and returns their durations in milliseconds.
+    """
+    durations = []
+
+    for _ in range(repeat):
+
+        start = time.perf_counter()
+
+        function()
+
+        durations.append((time.perf_counter() - start) * 1000)
+
+    return durations
+
+def main():
+    """
+    A function that renders and parses pages of every size with every implementation and prints the median time of each.
+    """
+    parser = argparse.ArgumentParser(description='Compares rendering and parsing pages of messages with the stdlib json module and with orjson.')
+    parser.add_argument('--pages', type=int, nargs='+', default=[50, 100, 1000], help='Numbers of messages in the pages rendered.')
+    parser.add_argument('--repeat', type=int, default=20, help='Number of times each page is rendered and parsed.')
+    arguments = parser.parse_args()
+
+    print(f'{"messages":>9}{"bytes":>10}{"implementation":>16}{"render ms":>11}{"parse ms":>10}{"speedup":>9}')
+
+    for size in arguments.pages:
+
+        page = build_page(size)
+
+        baseline = None
+
+        for name, (renderer_class, parser_class) in IMPLEMENTATIONS.items():
+
+            body = renderer_class().render(page)
+
+            render_ms = statistics.median(time_call(lambda: renderer_class().render(page), arguments.repeat))
+            parse_ms = statistics.median(time_call(lambda: parser_class().parse(io.BytesIO(body), 'application/json', {}), arguments.repeat))
+
+            baseline = baseline or render_ms + parse_ms
+
+            print(f'{size:>9}{len(body):>10}{name:>16}{render_ms:>11.3f}{parse_ms:>10.3f}{baseline / (render_ms + parse_ms):>8.1f}x')
+
+if __name__ == '__main__':
+
+    main()
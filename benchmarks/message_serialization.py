@@ -0,0 +1,132 @@
+"""
+A benchmark of reading and serializing messages for a response with the message serializer and with the fast path of serialize_message_values.
+
+Each size reads that many messages of a chat in the order the messages endpoint pages through them:
+- The serializer reads model objects and runs every field of the serializer on each of them.
+- The fast path reads dictionaries with .values() and builds the data of each message directly.
+
+It creates a test database for the run and destroys it after, using the database environment variables the app uses, and is run from the root of the repository:
+
+    python benchmarks/message_serialization.py --messages 1000 10000 --repeat 10
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cable.settings')
+
+import django
+
+django.setup()
+
+from django.db import connection
+from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory
+from cable_api.models import Message
+from cable_api.serializers import MessageSerializer, message_values, serialize_message_values
+
+def read_with_serializer(queryset):
+    """
+    A function that reads messages as model objects and returns them along with their data from the message serializer.
+    """
+    messages = list(queryset)
+
+    return messages, lambda: MessageSerializer(messages, many=True).data
+
+def read_with_values(queryset):
+    """
+    A function that reads messages as dictionaries and returns them along with their data from the fast path.
+    """
+    messages = list(message_values(queryset))
+
+    return messages, lambda: serialize_message_values(messages)
+
+IMPLEMENTATIONS = {
+    'serializer': read_with_serializer,
+    'values': read_with_values,
+}
+
+def setup_messages(count):
+    """
+    A function that creates a chat between two users with the given number of messages and returns the chat.
+    """
+    # The users get an unusable password and no profile image, since neither is read.
+    users = UserFactory.create_batch(2, profile_image = None, password = '!')
+    chat = ChatFactory.create()
+
+    for user in users:
+
+        ParticipantFactory(model_user = user, chat = chat)
+
+    contents = ['Short message.', 'A longer message with a few more words in it, as most messages are. ' * 3, 'Ünïcödé and emoji 😀 in a message.']
+
+    Message.objects.bulk_create([Message(content = contents[index % len(contents)], sender = users[index % 2], chat = chat) for index in range(count)], batch_size=1000)
+
+    return chat
+
+def time_implementation(implementation, queryset, repeat):
+    """
+    A function that times reading and serializing a queryset of messages a number of times and returns the median read and serialize durations in milliseconds.
+    """
+    read_durations = []
+    serialize_durations = []
+
+    for _ in range(repeat):
+
+        start = time.perf_counter()
+
+        messages, serialize = implementation(queryset.all())
+
+        middle = time.perf_counter()
+
+        serialize()
+
+        end = time.perf_counter()
+
+        read_durations.append((middle - start) * 1000)
+        serialize_durations.append((end - middle) * 1000)
+
+    return statistics.median(read_durations), statistics.median(serialize_durations)
+
+def main():
+    """
+    A function that reads and serializes every number of messages with every implementation and prints the median time of each.
+    """
+    parser = argparse.ArgumentParser(description='Compares serializing messages with the message serializer and with the fast path built from .values().')
+    parser.add_argument('--messages', type=int, nargs='+', default=[1000, 10000], help='Numbers of messages read and serialized.')
+    parser.add_argument('--repeat', type=int, default=10, help='Number of times the messages are read and serialized.')
+    arguments = parser.parse_args()
+
+    old_name = connection.settings_dict['NAME']
+
+    connection.creation.create_test_db(verbosity=0)
+
+    try:
+        chat = setup_messages(max(arguments.messages))
+
+        print(f'{"messages":>9}{"implementation":>16}{"read ms":>10}{"serialize ms":>14}{"total ms":>10}{"speedup":>9}')
+
+        for count in arguments.messages:
+
+            queryset = Message.objects.filter(chat = chat).order_by('date_created', 'id')[:count]
+
+            baseline = None
+
+            for name, implementation in IMPLEMENTATIONS.items():
+
+                read_ms, serialize_ms = time_implementation(implementation, queryset, arguments.repeat)
+
+                baseline = baseline or read_ms + serialize_ms
+
+                print(f'{count:>9}{name:>16}{read_ms:>10.2f}{serialize_ms:>14.2f}{read_ms + serialize_ms:>10.2f}{baseline / (read_ms + serialize_ms):>8.1f}x')
+
+    finally:
+
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+if __name__ == '__main__':
+
+    main()
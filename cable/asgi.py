@@ -9,8 +9,28 @@ https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from cable_api.handlers import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cable.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up because the consumers use the models.
+from cable_api.consumers import reject_websocket
+from cable_api.routing import websocket_routes, http_routes
+
+async def application(scope, receive, send):
+    """
+    Sends websocket connections and streaming http requests to the consumer routed for their path and every other connection to Django.
+    """
+    if scope['type'] == 'websocket':
+
+        consumer = websocket_routes.get(scope['path'], reject_websocket)
+
+        return await consumer(scope, receive, send)
+
+    if scope['type'] == 'http' and scope['path'] in http_routes:
+
+        return await http_routes[scope['path']](scope, receive, send)
+
+    return await django_application(scope, receive, send)
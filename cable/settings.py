@@ -23,6 +23,15 @@ MEDIA_ROOT = 'media/'
 
 MEDIA_URL = 'media/'
 
+# Media files named by the hash of their content are cached for this many seconds.
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+# How media files are sent. None sends them from Django, 'x-accel-redirect' hands them to nginx and 'x-sendfile' to Apache or lighttpd.
+MEDIA_SENDFILE_BACKEND = env('MEDIA_SENDFILE_BACKEND', default=None)
+
+# The internal nginx location that aliases MEDIA_ROOT, which X-Accel-Redirect responses point to.
+MEDIA_ACCEL_REDIRECT_PREFIX = env('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.1/howto/deployment/checklist/
 
@@ -53,13 +62,53 @@ AUTH_USER_MODEL = 'cable_api.User'
 
 REST_FRAMEWORK = {   
     'DEFAULT_AUTHENTICATION_CLASSES': (   
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'cable_api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'cable_api.renderers.ORJSONRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'cable_api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     )
 }
 
+PAGE_SIZE = 50
+
+MAX_PAGE_SIZE = 200
+
+MAX_BATCH_SIZE = 100
+
+MAX_CHAT_PARTICIPANTS = 100
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Sync tokens mark a time this many seconds before they are issued, so that a sync also returns the rows stamped before the previous token whose transaction committed after the previous sync read. Event streams resumed from a last event id replay from the same margin before it. It should be longer than the longest write transaction plus the clock skew between servers.
+SYNC_TOKEN_MARGIN_SECONDS = env.int('SYNC_TOKEN_MARGIN_SECONDS', default=5)
+
+# A sync with more changes than this gets a resync answer telling the client to reload the chat instead of the changes.
+SYNC_LIMIT = env.int('SYNC_LIMIT', default=1000)
+
+# The width and height in pixels of the thumbnails generated from profile images.
+PROFILE_THUMBNAIL_SIZE = 128
+
+# Number of threads generating profile image thumbnails in each process.
+IMAGE_PROCESSING_WORKERS = env.int('IMAGE_PROCESSING_WORKERS', default=2)
+
+# Authenticated users are cached by id for this many seconds, so that most requests skip loading them.
+USER_CACHE_TIMEOUT = env.int('USER_CACHE_TIMEOUT', default=60)
+
+# The in process cache holds at most this many users and only sees invalidations made by its own process. The shared cache uses the Django cache named by USER_CACHE_ALIAS.
+USER_CACHE_BACKEND = env('USER_CACHE_BACKEND', default='cable_api.authentication.LocalUserCache')
+
+USER_CACHE_MAX_SIZE = 1024
+
+USER_CACHE_ALIAS = 'default'
+
+# Messages older than this are moved into the archive by the archive_messages command.
+MESSAGE_ARCHIVE_AFTER_DAYS = env.int('MESSAGE_ARCHIVE_AFTER_DAYS', default=365)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=15),
@@ -101,6 +150,7 @@ SIMPLE_JWT = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'cable_api.routers.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -130,6 +180,19 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'cable.wsgi.application'
 
+ASGI_APPLICATION = 'cable.asgi.application'
+
+# Serves the chats, messages and message endpoints with native async views, which only hold a thread while they query the database when run under ASGI.
+ASYNC_VIEWS = env.bool('ASYNC_VIEWS', default=False)
+
+# The in process backend only reaches connections served by the same process.
+BROADCAST_BACKEND = 'cable_api.broadcast.InProcessBroadcastBackend'
+
+# A stream resumed further back than this many events is sent a single resync event instead of the events it missed.
+EVENT_REPLAY_LIMIT = env.int('EVENT_REPLAY_LIMIT', default=1000)
+
+IMAGE_PROCESSING_BACKEND = 'cable_api.images.ThreadPoolImageProcessingBackend'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
@@ -142,9 +205,48 @@ DATABASES = {
         'PASSWORD': env('PASSWORD'),
         'HOST': env('HOST'),
         'PORT': env('PORT'),
+        # Seconds a connection is kept open between the requests of a thread, with 0 closing it after every request and None never.
+        # Under ASGI every request runs in a new thread, so persistent connections only help WSGI deployments and ASGI ones should use DB_POOL instead.
+        'CONN_MAX_AGE': env.int('CONN_MAX_AGE', default=0),
+        # Checks that a persistent connection still works before the first query of each request reuses it.
+        'CONN_HEALTH_CHECKS': env.bool('CONN_HEALTH_CHECKS', default=True),
     }
 }
 
+# The pooling backend keeps a pool of connections per process that every thread and async task borrows from for the length of a request.
+if env.bool('DB_POOL', default=False):
+
+    DATABASES['default'].update({
+        'ENGINE': 'cable_api.backends.postgresql_pool',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool': {
+                'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+                'timeout': env.int('DB_POOL_TIMEOUT', default=30),
+                'max_idle': env.int('DB_POOL_MAX_IDLE', default=600),
+            },
+        },
+    })
+
+# Read replicas of the primary, given as database urls, which the reads of GET requests are spread over.
+DATABASE_REPLICAS = []
+
+for index, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[])):
+
+    replica = {key: value for key, value in env.db_url_config(url).items() if key in ['NAME', 'USER', 'PASSWORD', 'HOST', 'PORT']}
+
+    DATABASES[f'replica_{index}'] = {**DATABASES['default'], **replica, 'TEST': {'MIRROR': 'default'}}
+
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['cable_api.routers.ReplicaRouter']
+
+# Seconds for which the reads of a user who wrote go to the primary, which should be longer than the lag of the replicas.
+READ_YOUR_WRITES_SECONDS = env.int('READ_YOUR_WRITES_SECONDS', default=5)
+
+# The cache recording which users wrote recently, which has to be shared between processes when there are several.
+DATABASE_PIN_CACHE_ALIAS = 'default'
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -14,13 +14,12 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls.static import static
+from django.urls import path, re_path, include
 from django.conf import settings
+from cable_api.views import media_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('cable_api.urls')),
-]
-
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.*)$', media_views.media_view, name='media'),
+]
\ No newline at end of file
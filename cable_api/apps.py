@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
 
 
 class CableApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cable_api'
+
+    def ready(self):
+        """
+        A method that connects the receivers that keep the cache of authenticated users up to date.
+        """
+        from cable_api.authentication import invalidate_cached_user_on_change
+
+        post_save.connect(invalidate_cached_user_on_change, sender=get_user_model(), dispatch_uid='invalidate_cached_user_on_save')
+        post_delete.connect(invalidate_cached_user_on_change, sender=get_user_model(), dispatch_uid='invalidate_cached_user_on_delete')
@@ -0,0 +1,256 @@
+import copy
+import time
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+class BaseUserCache:
+    """
+    A class that defines the methods a user cache must implement to hold authenticated users by their id for USER_CACHE_TIMEOUT seconds.
+    """
+    def get(self, user_id):
+        """
+        A method that returns the cached user with the given id, or None if it is not cached or has expired.
+        """
+        raise NotImplementedError('Subclasses of BaseUserCache must implement get().')
+
+    def set(self, user_id, user):
+        """
+        A method that caches a user under its id.
+        """
+        raise NotImplementedError('Subclasses of BaseUserCache must implement set().')
+
+    def delete(self, user_id):
+        """
+        A method that removes a user from the cache.
+        """
+        raise NotImplementedError('Subclasses of BaseUserCache must implement delete().')
+
+    async def aget(self, user_id):
+        """
+        A method that returns the cached user from an async context, running get() in a thread unless a subclass can do better.
+        """
+        return await sync_to_async(self.get)(user_id)
+
+    async def aset(self, user_id, user):
+        """
+        A method that caches a user from an async context, running set() in a thread unless a subclass can do better.
+        """
+        await sync_to_async(self.set)(user_id, user)
+
+class LocalUserCache(BaseUserCache):
+    """
+    A class that caches up to USER_CACHE_MAX_SIZE users in the current process, evicting the least recently used first.
+    Invalidations only reach the process making them, so other processes may serve a changed user until it expires.
+    """
+    def __init__(self):
+        """
+        A method that creates the ordered registry of cached users.
+        """
+        self.lock = threading.Lock()
+        self.users = OrderedDict()
+
+    def get(self, user_id):
+        """
+        A method that returns a copy of the cached user, so that requests can not change the instance other requests share.
+        """
+        with self.lock:
+
+            entry = self.users.get(user_id)
+
+            if entry is None:
+
+                return None
+
+            user, expires = entry
+
+            if expires < time.monotonic():
+
+                del self.users[user_id]
+
+                return None
+
+            self.users.move_to_end(user_id)
+
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        """
+        A method that caches a copy of a user and evicts the least recently used users beyond the maximum size.
+        """
+        with self.lock:
+
+            self.users[user_id] = (copy.copy(user), time.monotonic() + settings.USER_CACHE_TIMEOUT)
+            self.users.move_to_end(user_id)
+
+            while len(self.users) > settings.USER_CACHE_MAX_SIZE:
+
+                self.users.popitem(last=False)
+
+    def delete(self, user_id):
+        """
+        A method that removes a user from the cache.
+        """
+        with self.lock:
+
+            self.users.pop(user_id, None)
+
+    async def aget(self, user_id):
+        """
+        A method that returns the cached user from an async context, which needs no thread since the lock is only held for a lookup.
+        """
+        return self.get(user_id)
+
+    async def aset(self, user_id, user):
+        """
+        A method that caches a user from an async context, which needs no thread since the lock is only held for an insert.
+        """
+        self.set(user_id, user)
+
+class SharedUserCache(BaseUserCache):
+    """
+    A class that caches users in the Django cache named by USER_CACHE_ALIAS, which every process shares when it is backed by a server such as memcached or redis.
+    """
+    def get_key(self, user_id):
+        """
+        A method that returns the cache key of a user.
+        """
+        return f'cable_api:user:{user_id}'
+
+    def get(self, user_id):
+        """
+        A method that returns the cached user, or None if it is not cached.
+        """
+        return caches[settings.USER_CACHE_ALIAS].get(self.get_key(user_id))
+
+    def set(self, user_id, user):
+        """
+        A method that caches a user for USER_CACHE_TIMEOUT seconds.
+        """
+        caches[settings.USER_CACHE_ALIAS].set(self.get_key(user_id), user, settings.USER_CACHE_TIMEOUT)
+
+    def delete(self, user_id):
+        """
+        A method that removes a user from the cache.
+        """
+        caches[settings.USER_CACHE_ALIAS].delete(self.get_key(user_id))
+
+    async def aget(self, user_id):
+        """
+        A method that returns the cached user through the async interface of the cache.
+        """
+        return await caches[settings.USER_CACHE_ALIAS].aget(self.get_key(user_id))
+
+    async def aset(self, user_id, user):
+        """
+        A method that caches a user through the async interface of the cache.
+        """
+        await caches[settings.USER_CACHE_ALIAS].aset(self.get_key(user_id), user, settings.USER_CACHE_TIMEOUT)
+
+@lru_cache(maxsize=None)
+def get_user_cache():
+    """
+    A function that returns the user cache named by the USER_CACHE_BACKEND setting, creating it on first use.
+    """
+    return import_string(settings.USER_CACHE_BACKEND)()
+
+def invalidate_cached_user(user_id):
+    """
+    A function that removes a user from the cache after it has been changed or deleted, so the next request authenticating as the user loads it again.
+    """
+    get_user_cache().delete(user_id)
+
+def invalidate_cached_user_on_change(sender, instance, **kwargs):
+    """
+    A signal receiver that invalidates a user saved or deleted through its model, such as through the admin, and users created with the id of a deleted one.
+    """
+    invalidate_cached_user(instance.pk)
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    A class that authenticates requests with a JWT access token like JWTAuthentication, but looks the user of the token up in the user cache before querying the database.
+    """
+    def get_user_id(self, validated_token):
+        """
+        A method that returns the id of the user a token belongs to.
+        """
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+
+        except KeyError:
+
+            raise InvalidToken('Token contained no recognizable user identification')
+
+    def get_user(self, validated_token):
+        """
+        A method overriden to:
+        - Return the user of the token from the user cache when it is there.
+        - Otherwise load and check the user as JWTAuthentication does and cache it.
+        """
+        user_id = self.get_user_id(validated_token)
+
+        user_cache = get_user_cache()
+
+        user = user_cache.get(user_id)
+
+        if user is None:
+
+            user = super().get_user(validated_token)
+
+            user_cache.set(user_id, user)
+
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        A method that authenticates a request like authenticate(), for async views, returning a tuple of the user and the validated token or None if the request has no token.
+        """
+        header = self.get_header(request)
+
+        if header is None:
+
+            return None
+
+        raw_token = self.get_raw_token(header)
+
+        if raw_token is None:
+
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """
+        A method that returns the user of a token like get_user(), reading the user cache and the database through their async interfaces.
+        """
+        user_id = self.get_user_id(validated_token)
+
+        user_cache = get_user_cache()
+
+        user = await user_cache.aget(user_id)
+
+        if user is None:
+
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+
+            except self.user_model.DoesNotExist:
+
+                raise AuthenticationFailed('User not found', code='user_not_found')
+
+            if not user.is_active:
+
+                raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+            await user_cache.aset(user_id, user)
+
+        return user
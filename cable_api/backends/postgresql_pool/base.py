@@ -0,0 +1,90 @@
+import os
+import threading
+import psycopg2
+from psycopg2 import extensions
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+from cable_api.backends.postgresql_pool.pool import ConnectionPool
+
+# The pools of the current process by database alias and connection parameters. They are keyed by process id as well so that processes forked from it never share its connections.
+pools = {}
+
+pools_lock = threading.Lock()
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    """
+    A class that defines a PostgreSQL backend which takes its connections from a pool shared by the threads of the process and returns them to it when Django closes them.
+    - Configured with a "pool" dictionary in OPTIONS whose "max_size", "timeout" and "max_idle" keys are passed to the pool.
+    - Meant to be used with CONN_MAX_AGE set to 0, so every request or async task returns its connection to the pool when it finishes, which works the same under WSGI and ASGI.
+    """
+    pool = None
+    pool_pid = None
+
+    def get_pool(self, conn_params):
+        """
+        A method that returns the pool for the connection parameters of this database alias in the current process, creating it on first use.
+        """
+        key = (self.alias, os.getpid(), repr(sorted(conn_params.items())))
+
+        with pools_lock:
+
+            if key not in pools:
+
+                pools[key] = ConnectionPool(**self.settings_dict['OPTIONS'].get('pool', {}))
+
+            return pools[key]
+
+    def get_connection_params(self):
+        """
+        A method overriden to leave the pool options out of the parameters passed to psycopg2.
+        """
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        """
+        A method overriden to take a connection from the pool instead of opening one.
+        """
+        self.pool = self.get_pool(conn_params)
+        self.pool_pid = os.getpid()
+
+        connection = self.pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+        self.isolation_level = connection.isolation_level
+
+        return connection
+
+    def _close(self):
+        """
+        A method overriden to roll back whatever the connection left open and return it to the pool instead of closing it.
+        Connections that are broken, or were inherited from the process this one was forked from, are closed instead.
+        """
+        if self.connection is None:
+
+            return
+
+        with self.wrap_database_errors:
+
+            connection = self.connection
+
+            if self.pool is None or self.pool_pid != os.getpid():
+
+                return connection.close()
+
+            reusable = not connection.closed and connection.get_transaction_status() != extensions.TRANSACTION_STATUS_UNKNOWN
+
+            if reusable and connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+
+                try:
+                    connection.rollback()
+
+                except psycopg2.Error:
+
+                    reusable = False
+
+            if reusable and self.errors_occurred and not self.is_usable():
+
+                reusable = False
+
+            self.pool.putconn(connection, reusable = reusable)
@@ -0,0 +1,96 @@
+import time
+import threading
+from collections import deque
+from django.db import OperationalError
+
+class ConnectionPool:
+    """
+    A class that keeps database connections open between requests and lends them out to the threads of the current process.
+    - At most max_size connections are open or lent out at once, and threads wait up to timeout seconds for one to be returned.
+    - Connections idle for longer than max_idle seconds are closed instead of being lent out, so ones the server or a proxy dropped are not reused.
+    """
+    def __init__(self, max_size = 10, timeout = 30, max_idle = 600):
+        """
+        A method that creates an empty pool.
+        """
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.lock = threading.Lock()
+        self.idle = deque()
+        self.slots = threading.BoundedSemaphore(max_size)
+
+    def getconn(self, connect):
+        """
+        A method that lends out the most recently returned usable connection, or opens a new one with the function passed to it if there is none.
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+
+            raise OperationalError(f'Timed out after {self.timeout} seconds waiting for one of the {self.max_size} connections of the pool.')
+
+        try:
+            now = time.monotonic()
+
+            while True:
+
+                with self.lock:
+
+                    connection, returned = self.idle.pop() if self.idle else (None, None)
+
+                if connection is None:
+
+                    return connect()
+
+                if not connection.closed and now - returned <= self.max_idle:
+
+                    return connection
+
+                self.close_connection(connection)
+
+        except BaseException:
+
+            self.slots.release()
+
+            raise
+
+    def putconn(self, connection, reusable = True):
+        """
+        A method that takes a lent out connection back, keeping it open for the next thread if it is reusable and closing it otherwise.
+        """
+        try:
+            if reusable and not connection.closed:
+
+                with self.lock:
+
+                    self.idle.append((connection, time.monotonic()))
+
+            else:
+
+                self.close_connection(connection)
+
+        finally:
+
+            self.slots.release()
+
+    def close_connection(self, connection):
+        """
+        A method that closes a connection, ignoring errors from connections that are already broken.
+        """
+        try:
+            connection.close()
+
+        except Exception:
+
+            pass
+
+    def close(self):
+        """
+        A method that closes every idle connection of the pool.
+        """
+        with self.lock:
+
+            connections, self.idle = self.idle, deque()
+
+        for connection, returned in connections:
+
+            self.close_connection(connection)
@@ -0,0 +1,247 @@
+import asyncio
+import threading
+from datetime import timedelta
+from functools import lru_cache
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from cable_api.models import Chat, Message, MessageTombstone, Participant
+from cable_api.serializers import ChatSerializer, MessageSerializer
+from cable_api.pagination import encode_cursor, decode_cursor, keyset_filter
+
+class Subscription:
+    """
+    A class that holds the queue of events waiting to be sent down one connection of a user.
+    """
+    def __init__(self, user_id):
+        """
+        A method that binds the subscription to the event loop of the connection creating it.
+        """
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def put(self, event):
+        """
+        A method that queues an event for the connection. It is safe to call from any thread.
+        """
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+        except RuntimeError:
+
+            # The connection's event loop has already been closed.
+            pass
+
+    async def get(self):
+        """
+        A method that waits for the next event queued for the connection and returns it.
+        """
+        return await self.queue.get()
+
+class BaseBroadcastBackend:
+    """
+    A class that defines the methods a broadcast backend must implement to fan events out to every connection of a set of users.
+    """
+    def subscribe(self, user_id):
+        """
+        A method that registers a new connection for a user and returns its subscription. It must be called from the connection's event loop.
+        """
+        raise NotImplementedError('Subclasses of BaseBroadcastBackend must implement subscribe().')
+
+    def unsubscribe(self, subscription):
+        """
+        A method that removes a subscription once its connection has closed.
+        """
+        raise NotImplementedError('Subclasses of BaseBroadcastBackend must implement unsubscribe().')
+
+    def publish(self, user_ids, event):
+        """
+        A method that sends an event to every subscription of the given users. It must be safe to call from any thread.
+        """
+        raise NotImplementedError('Subclasses of BaseBroadcastBackend must implement publish().')
+
+class InProcessBroadcastBackend(BaseBroadcastBackend):
+    """
+    A class that fans events out to the subscriptions held in the current process.
+    It only reaches every connection when the app runs as a single process, so it is meant for tests and single worker deployments.
+    """
+    def __init__(self):
+        """
+        A method that creates the registry of subscriptions by user id.
+        """
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def subscribe(self, user_id):
+        """
+        A method that registers a new connection for a user and returns its subscription.
+        """
+        subscription = Subscription(user_id)
+
+        with self.lock:
+
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        A method that removes a subscription from the registry.
+        """
+        with self.lock:
+
+            user_subscriptions = self.subscriptions.get(subscription.user_id, set())
+            user_subscriptions.discard(subscription)
+
+            if not user_subscriptions:
+
+                self.subscriptions.pop(subscription.user_id, None)
+
+    def publish(self, user_ids, event):
+        """
+        A method that queues an event on every subscription of the given users.
+        """
+        with self.lock:
+
+            subscriptions = [subscription for user_id in set(user_ids) for subscription in self.subscriptions.get(user_id, ())]
+
+        for subscription in subscriptions:
+
+            subscription.put(event)
+
+@lru_cache(maxsize=None)
+def get_broadcast_backend():
+    """
+    A function that returns the broadcast backend named by the BROADCAST_BACKEND setting, creating it on first use.
+    """
+    return import_string(settings.BROADCAST_BACKEND)()
+
+# The models events are built from, with the field holding the time of their change, in the order events changing at the same time are sent in.
+EVENT_SOURCES = [
+    (Chat, 'date_created'),
+    (Message, 'date_modified'),
+    (MessageTombstone, 'date_deleted'),
+]
+
+def get_event_key(row):
+    """
+    A function that returns the key ordering the event of a change to a chat, message or tombstone, which is the time of the change, the position of its model in EVENT_SOURCES and the id of the row.
+    """
+    for index, (model, field) in enumerate(EVENT_SOURCES):
+
+        if isinstance(row, model):
+
+            return [getattr(row, field), index, row.id]
+
+    raise TypeError(f'Events are not built from {type(row).__name__} objects.')
+
+def decode_event_id(event_id):
+    """
+    A function that decodes the id of an event into its key, raising an exception if the id is malformed.
+    """
+    return decode_cursor(event_id, Message, ('date_modified', 'source', 'id'))
+
+def build_event(event_type, data, row):
+    """
+    A function that builds a chat event about a change to a row, whose id is the key of the change so that clients can resume from it.
+    """
+    return {'id': encode_cursor(get_event_key(row)), 'type': event_type, 'data': data}
+
+def publish_chat_event(chat, event_type, data, row):
+    """
+    A function that publishes a single event about a change to a row to the participants of a chat.
+    """
+    publish_chat_events(chat, [(event_type, data, row)])
+
+def publish_chat_events(chat, events):
+    """
+    A function that:
+    - Fetches the ids of the users participating in a chat once for a list of (event type, data, row changed) tuples.
+    - Publishes the events to all of them in order once the current transaction commits, so that no event is sent for a rolled back write.
+    """
+    user_ids = list(Participant.objects.filter(chat = chat).values_list('model_user_id', flat=True))
+
+    events = [build_event(event_type, data, row) for event_type, data, row in events]
+
+    def publish():
+
+        backend = get_broadcast_backend()
+
+        for event in events:
+
+            backend.publish(user_ids, event)
+
+    transaction.on_commit(publish)
+
+def get_events_after(queryset, index, key):
+    """
+    A function that filters a queryset of the model at the given position of EVENT_SOURCES to the rows whose events come strictly after the given key, and orders them by their key.
+    """
+    timestamp, source, row_id = key
+
+    field = EVENT_SOURCES[index][1]
+
+    if index == source:
+
+        queryset = queryset.filter(keyset_filter((field, 'id'), (timestamp, row_id)))
+
+    elif index > source:
+
+        queryset = queryset.filter(**{f'{field}__gte': timestamp})
+
+    else:
+
+        queryset = queryset.filter(**{f'{field}__gt': timestamp})
+
+    return queryset.order_by(field, 'id')
+
+def get_chat_events_after(user, key):
+    """
+    A function that:
+    - Rebuilds the events of every chat the user participates in that come strictly after the given event key moved SYNC_TOKEN_MARGIN_SECONDS back, for clients resuming a stream.
+    - Leaves the margin because a row can be stamped before the last event the client received but only commit after it, once the client had disconnected.
+    - Returns the events in the order of their keys, including events within the margin the client may already have, which it dedupes by id.
+    - Returns a single "resync" event instead when there are more than EVENT_REPLAY_LIMIT of them, telling the client to sync through the api, so that a stale event id doesn't replay the whole history of the user.
+    """
+    limit = settings.EVENT_REPLAY_LIMIT
+
+    timestamp, source, row_id = key
+
+    key = [timestamp - timedelta(seconds=settings.SYNC_TOKEN_MARGIN_SECONDS), source, row_id]
+
+    chats = get_events_after(Chat.objects.with_related().filter(participants__model_user = user), 0, key)[:limit + 1]
+    messages = get_events_after(Message.objects.filter(chat__participants__model_user = user), 1, key)[:limit + 1]
+    tombstones = get_events_after(MessageTombstone.objects.filter(chat__participants__model_user = user), 2, key)[:limit + 1]
+
+    rows = [*chats, *messages, *tombstones]
+
+    if len(rows) > limit:
+
+        # Its id resumes from the current time, which the client has synced up to once it handles the event.
+        return [{'id': encode_cursor([timezone.now(), 0, 0]), 'type': 'resync', 'data': {}}]
+
+    events = []
+
+    for row in rows:
+
+        if isinstance(row, Chat):
+
+            event = build_event('chat.created', ChatSerializer(row).data, row)
+
+        elif isinstance(row, Message):
+
+            event_type = 'message.created' if row.date_created > key[0] else 'message.updated'
+
+            event = build_event(event_type, MessageSerializer(row).data, row)
+
+        else:
+
+            event = build_event('message.deleted', {'id': row.message_id, 'chat': row.chat_id}, row)
+
+        events.append((get_event_key(row), event))
+
+    events.sort(key=lambda event: event[0])
+
+    return [event for event_key, event in events]
@@ -0,0 +1,236 @@
+import json
+import asyncio
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.exceptions import ParseError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from cable_api.authentication import CachedJWTAuthentication
+from cable_api.broadcast import get_broadcast_backend, get_chat_events_after, decode_event_id
+
+# Seconds of silence after which a comment is sent down an event stream so that proxies keep it open.
+KEEP_ALIVE_INTERVAL = 15
+
+def database_sync_to_async(function):
+    """
+    A function that wraps a function using the database so that a consumer can await it, closing stale connections around the call as Django does around requests.
+    """
+    def wrapper(*args, **kwargs):
+
+        close_old_connections()
+
+        try:
+            return function(*args, **kwargs)
+
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper)
+
+def get_scope_header(scope):
+    """
+    A function that:
+    - Reads the access token from the "token" query parameter of an ASGI scope, since browsers cannot set headers on websockets and event sources.
+    - Falls back to the authorization header of the scope.
+    - Returns the token in the form of an authorization header, or None if there is no token.
+    """
+    query = parse_qs(scope.get('query_string', b'').decode())
+
+    if 'token' in query:
+
+        return f'Bearer {query["token"][0]}'.encode()
+
+    return dict(scope.get('headers', [])).get(b'authorization')
+
+def authenticate_scope(scope):
+    """
+    A function that returns the user that the access token of an ASGI scope belongs to, or None if the token is missing or invalid.
+    """
+    header = get_scope_header(scope)
+
+    if header is None:
+
+        return None
+
+    authentication = CachedJWTAuthentication()
+
+    try:
+        raw_token = authentication.get_raw_token(header)
+
+        if raw_token is None:
+
+            return None
+
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+
+    except (AuthenticationFailed, InvalidToken):
+
+        return None
+
+async def chat_events_socket(scope, receive, send):
+    """
+    An ASGI application that:
+    - Accepts a websocket connection from a user authenticated with a JWT access token.
+    - Sends every chat event published to that user down the websocket as json until the client disconnects.
+    """
+    message = await receive()
+
+    if message['type'] != 'websocket.connect':
+
+        return
+
+    user = await database_sync_to_async(authenticate_scope)(scope)
+
+    if user is None:
+
+        await send({'type': 'websocket.close', 'code': 4001})
+
+        return
+
+    await send({'type': 'websocket.accept'})
+
+    backend = get_broadcast_backend()
+    subscription = backend.subscribe(user.id)
+
+    receiving = asyncio.ensure_future(receive())
+    sending = asyncio.ensure_future(subscription.get())
+
+    try:
+        while True:
+
+            done, pending = await asyncio.wait({receiving, sending}, return_when=asyncio.FIRST_COMPLETED)
+
+            if receiving in done:
+
+                if receiving.result()['type'] == 'websocket.disconnect':
+
+                    break
+
+                # Messages sent by the client are ignored, writes go through the http endpoints.
+                receiving = asyncio.ensure_future(receive())
+
+            if sending in done:
+
+                await send({'type': 'websocket.send', 'text': json.dumps(sending.result())})
+
+                sending = asyncio.ensure_future(subscription.get())
+
+    finally:
+        receiving.cancel()
+        sending.cancel()
+
+        backend.unsubscribe(subscription)
+
+def get_last_event_id(scope):
+    """
+    A function that reads the id of the last event a client received from the "Last-Event-ID" header of an ASGI scope, or from the "last_event_id" query parameter.
+    """
+    query = parse_qs(scope.get('query_string', b'').decode())
+
+    if 'last_event_id' in query:
+
+        return query['last_event_id'][0]
+
+    last_event_id = dict(scope.get('headers', [])).get(b'last-event-id')
+
+    return last_event_id.decode() if last_event_id else None
+
+def format_event(event):
+    """
+    A function that formats a chat event as a server-sent event.
+    """
+    return f'id: {event["id"]}\nevent: {event["type"]}\ndata: {json.dumps(event["data"])}\n\n'.encode()
+
+async def send_json_response(send, status, data):
+    """
+    A function that sends a complete json response through an ASGI send callable.
+    """
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'application/json')]})
+
+    await send({'type': 'http.response.body', 'body': json.dumps(data).encode()})
+
+async def chat_events_stream(scope, receive, send):
+    """
+    An ASGI application that:
+    - Streams every chat event published to a user authenticated with a JWT access token as server-sent events.
+    - Replays the events after the "Last-Event-ID" sent by a reconnecting client before streaming new ones, or a "resync" event when it missed too many.
+    - Holds no thread while the stream is idle, so one process can serve many connected clients.
+    """
+    if scope['method'] != 'GET':
+
+        return await send_json_response(send, 405, {'detail': f'Method "{scope["method"]}" not allowed.'})
+
+    user = await database_sync_to_async(authenticate_scope)(scope)
+
+    if user is None:
+
+        return await send_json_response(send, 401, {'detail': 'Unauthorized to use this method on this endpoint or object.'})
+
+    last_event_id = get_last_event_id(scope)
+
+    try:
+        last_event_key = decode_event_id(last_event_id) if last_event_id else None
+
+    except ParseError as exception:
+
+        return await send_json_response(send, 400, {'detail': exception.detail})
+
+    backend = get_broadcast_backend()
+
+    # The subscription is made before the replay is read so that no event falls between the two.
+    subscription = backend.subscribe(user.id)
+
+    receiving = asyncio.ensure_future(receive())
+    sending = asyncio.ensure_future(subscription.get())
+
+    try:
+        events = await database_sync_to_async(get_chat_events_after)(user, last_event_key) if last_event_key else []
+
+        headers = [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')]
+
+        if settings.CORS_ALLOW_ALL_ORIGINS:
+
+            headers.append((b'access-control-allow-origin', b'*'))
+
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+
+        for event in events:
+
+            await send({'type': 'http.response.body', 'body': format_event(event), 'more_body': True})
+
+        while True:
+
+            done, pending = await asyncio.wait({receiving, sending}, timeout=KEEP_ALIVE_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+
+                await send({'type': 'http.response.body', 'body': b': keep-alive\n\n', 'more_body': True})
+
+            if receiving in done:
+
+                if receiving.result()['type'] == 'http.disconnect':
+
+                    break
+
+                receiving = asyncio.ensure_future(receive())
+
+            if sending in done:
+
+                await send({'type': 'http.response.body', 'body': format_event(sending.result()), 'more_body': True})
+
+                sending = asyncio.ensure_future(subscription.get())
+
+    finally:
+        receiving.cancel()
+        sending.cancel()
+
+        backend.unsubscribe(subscription)
+
+async def reject_websocket(scope, receive, send):
+    """
+    An ASGI application that closes websocket connections made to a path with no consumer.
+    """
+    await receive()
+
+    await send({'type': 'websocket.close'})
@@ -0,0 +1,85 @@
+import csv
+import json
+from django.conf import settings
+from django.utils.text import compress_sequence
+from cable_api.models import Message, ArchivedMessage
+from cable_api.serializers import MessageSerializer
+
+EXPORT_FIELDS = ['id', 'content', 'sender', 'chat', 'date_created']
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+class Echo:
+    """
+    A class that implements the write method of a file by returning what is written to it, so that a csv writer can produce rows one at a time.
+    """
+    def write(self, value):
+        """
+        A method that returns the value written to it.
+        """
+        return value
+
+def iterate_chat_messages(chat):
+    """
+    A function that:
+    - Reads the archived and then the live messages of a chat in order, in chunks through a server side cursor on databases that support one.
+    - Yields each message serialized into a python dictionary, so that only one chunk of messages is held in memory at a time.
+    """
+    for messages in [ArchivedMessage.objects.filter(chat = chat), Message.objects.filter(chat = chat)]:
+
+        for message in messages.order_by('date_created', 'id').iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+
+            yield MessageSerializer(message).data
+
+def render_ndjson(messages):
+    """
+    A function that yields each message as a line of json.
+    """
+    for message in messages:
+
+        yield json.dumps(message, ensure_ascii=False) + '\n'
+
+def render_csv(messages):
+    """
+    A function that yields a header row followed by a csv row for each message.
+    """
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(EXPORT_FIELDS)
+
+    for message in messages:
+
+        yield writer.writerow([message[field] for field in EXPORT_FIELDS])
+
+def join_lines(lines):
+    """
+    A function that joins lines into encoded chunks of up to EXPORT_CHUNK_SIZE lines, so that a large export is not sent one small write at a time.
+    """
+    chunk = []
+
+    for line in lines:
+
+        chunk.append(line)
+
+        if len(chunk) == settings.EXPORT_CHUNK_SIZE:
+
+            yield ''.join(chunk).encode()
+
+            chunk = []
+
+    if chunk:
+
+        yield ''.join(chunk).encode()
+
+def export_chat(chat, export_format, gzip = False):
+    """
+    A function that returns an iterator over the encoded chunks of an export of every message of a chat in the given format, compressed with gzip as it is produced if requested.
+    """
+    render = render_csv if export_format == 'csv' else render_ndjson
+
+    chunks = join_lines(render(iterate_chat_messages(chat)))
+
+    return compress_sequence(chunks) if gzip else chunks
@@ -0,0 +1,69 @@
+import django
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+
+class ASGIHandler(asgi.ASGIHandler):
+    """
+    A class that serves Django over ASGI like its own handler, except that it reads the parts of streaming responses in a thread.
+    Django 4.1 reads them on the event loop, where a streamed export can't query the database and a file response blocks every other connection while it reads from disk.
+    """
+    async def send_response(self, response, send):
+        """
+        A method overriden to send streaming responses with each part read through sync_to_async, and every other response the way Django does.
+        The parts are read in the thread the view ran in, so that a query started by the view keeps its connection.
+        """
+        if not response.streaming:
+
+            return await super().send_response(response, send)
+
+        response_headers = []
+
+        for header, value in response.items():
+
+            if isinstance(header, str):
+
+                header = header.encode('ascii')
+
+            if isinstance(value, str):
+
+                value = value.encode('latin1')
+
+            response_headers.append((bytes(header), bytes(value)))
+
+        for cookie in response.cookies.values():
+
+            response_headers.append((b'Set-Cookie', cookie.output(header='').encode('ascii').strip()))
+
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': response_headers})
+
+        parts = iter(response)
+
+        # The next function returns None once the response runs out, since StopIteration can't be raised through a coroutine.
+        read_part = sync_to_async(next, thread_sensitive=True)
+
+        try:
+            while True:
+
+                part = await read_part(parts, None)
+
+                if part is None:
+
+                    break
+
+                for chunk, _ in self.chunk_bytes(part):
+
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+            await send({'type': 'http.response.body'})
+
+        finally:
+
+            await sync_to_async(response.close, thread_sensitive=True)()
+
+def get_asgi_application():
+    """
+    A function that sets up Django and returns its ASGI application, served by the handler above.
+    """
+    django.setup(set_prefix=False)
+
+    return ASGIHandler()
@@ -0,0 +1,149 @@
+import logging
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# The formats thumbnails are generated in, by the user field each is stored in.
+THUMBNAIL_FORMATS = {
+    'profile_thumbnail_webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'profile_thumbnail_jpeg': ('JPEG', 'jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+class BaseImageProcessingBackend:
+    """
+    A class that defines the methods an image processing backend must implement to run jobs outside of the request that queued them.
+    """
+    def submit(self, function, *args):
+        """
+        A method that runs a function with the given arguments in the background.
+        """
+        raise NotImplementedError('Subclasses of BaseImageProcessingBackend must implement submit().')
+
+class ThreadPoolImageProcessingBackend(BaseImageProcessingBackend):
+    """
+    A class that runs jobs on a pool of IMAGE_PROCESSING_WORKERS threads in the current process.
+    Jobs queued when the process stops are lost, and are picked up again by the generate_profile_thumbnails command.
+    """
+    def __init__(self):
+        """
+        A method that creates the pool of threads.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=settings.IMAGE_PROCESSING_WORKERS, thread_name_prefix='image-processing')
+
+    def submit(self, function, *args):
+        """
+        A method that queues a function on the pool.
+        """
+        self.executor.submit(run_job, function, *args)
+
+class SynchronousImageProcessingBackend(BaseImageProcessingBackend):
+    """
+    A class that runs jobs straight away in the thread submitting them, which is meant for tests and development.
+    """
+    def submit(self, function, *args):
+        """
+        A method that runs a function immediately.
+        """
+        function(*args)
+
+@lru_cache(maxsize=None)
+def get_image_processing_backend():
+    """
+    A function that returns the image processing backend named by the IMAGE_PROCESSING_BACKEND setting, creating it on first use.
+    """
+    return import_string(settings.IMAGE_PROCESSING_BACKEND)()
+
+def run_job(function, *args):
+    """
+    A function that runs a job on a worker thread, logging it if it fails and closing the database connection it used once it is done.
+    """
+    try:
+        function(*args)
+
+    except Exception:
+
+        logger.exception('Image processing job %s%r failed.', function.__name__, args)
+
+    finally:
+
+        close_old_connections()
+
+def save_profile_image(user, image):
+    """
+    A function that stores an uploaded profile image under the name its storage gives it without opening it, so that no decoding happens during the request, and returns the name of the stored file.
+    """
+    field = user._meta.get_field('profile_image')
+
+    return field.storage.save(field.generate_filename(user, image.name), image)
+
+def queue_profile_thumbnails(user_id):
+    """
+    A function that hands the generation of the thumbnails of a user's profile image to the image processing backend once the current transaction commits.
+    """
+    transaction.on_commit(lambda: get_image_processing_backend().submit(generate_profile_thumbnails, user_id))
+
+def render_thumbnail(image, image_format, options):
+    """
+    A function that encodes a thumbnail in the given format and returns its bytes.
+    """
+    if image_format == 'JPEG' and image.mode != 'RGB':
+
+        # JPEG has no transparency, so transparent images are flattened onto white.
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+
+        image = background
+
+    output = BytesIO()
+
+    image.save(output, image_format, **options)
+
+    return output.getvalue()
+
+def generate_profile_thumbnails(user_id):
+    """
+    A function that:
+    - Crops the profile image of a user to a square around its center and scales it to PROFILE_THUMBNAIL_SIZE.
+    - Stores the thumbnail in every format of THUMBNAIL_FORMATS.
+    - Points the user at the thumbnails, unless the profile image was replaced while they were generated, in which case the job of the new image sets them.
+    - Returns True if the thumbnails were saved.
+    """
+    user = get_user_model().objects.filter(id = user_id).first()
+
+    if user is None or not user.profile_image:
+
+        return False
+
+    image_name = user.profile_image.name
+
+    with user.profile_image.open('rb') as image_file:
+
+        with Image.open(image_file) as image:
+
+            image = ImageOps.exif_transpose(image)
+
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+            thumbnail = ImageOps.fit(image, (settings.PROFILE_THUMBNAIL_SIZE, settings.PROFILE_THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+
+    thumbnail_names = {}
+
+    for field_name, (image_format, extension, options) in THUMBNAIL_FORMATS.items():
+
+        field = user._meta.get_field(field_name)
+
+        filename = field.generate_filename(user, f'thumbnail_{settings.PROFILE_THUMBNAIL_SIZE}.{extension}')
+
+        thumbnail_names[field_name] = field.storage.save(filename, ContentFile(render_thumbnail(thumbnail, image_format, options)))
+
+    updated = get_user_model().objects.filter(id = user_id, profile_image = image_name).update(**thumbnail_names)
+
+    return updated > 0
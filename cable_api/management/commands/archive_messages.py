@@ -0,0 +1,38 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from cable_api.models import ArchivedMessage
+
+class Command(BaseCommand):
+    """
+    A class that defines the "archive_messages" command, which moves messages older than the configured age into the compressed archive.
+    """
+    help = 'Moves messages older than MESSAGE_ARCHIVE_AFTER_DAYS into the compressed message archive.'
+
+    def add_arguments(self, parser):
+        """
+        A method that defines the arguments of the command.
+        """
+        parser.add_argument('--days', type=int, default=settings.MESSAGE_ARCHIVE_AFTER_DAYS, help='Archive messages created more than this many days ago.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of messages moved in each transaction.')
+
+    def handle(self, *args, **options):
+        """
+        A method that moves the messages in batches, each in its own transaction, until none older than the cutoff are left.
+        """
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        total = 0
+
+        while True:
+
+            archived = ArchivedMessage.objects.archive_messages(cutoff, batch_size = options['batch_size'])
+
+            total += archived
+
+            if archived < options['batch_size']:
+
+                break
+
+        self.stdout.write(f'Archived {total} messages created before {cutoff.isoformat()}.')
@@ -0,0 +1,72 @@
+import os
+import time
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import models
+from cable_api.storage import ContentAddressedStorage
+
+class Command(BaseCommand):
+    """
+    A class that defines the "collect_unused_media" command, which deletes the media files no row refers to anymore.
+    """
+    help = 'Deletes the files in MEDIA_ROOT that are not referenced by any file field and are older than the grace period.'
+
+    def add_arguments(self, parser):
+        """
+        A method that defines the arguments of the command.
+        """
+        parser.add_argument('--grace-hours', type=int, default=24, help='Keep unreferenced files modified within this many hours, such as uploads whose rows are not committed yet.')
+        parser.add_argument('--dry-run', action='store_true', help='List the files that would be deleted without deleting them.')
+
+    def get_referenced_names(self):
+        """
+        A method that returns the names of every file stored in the file fields of every model.
+        """
+        names = set()
+
+        for model in apps.get_models():
+
+            for field in model._meta.concrete_fields:
+
+                if isinstance(field, models.FileField):
+
+                    names.update(model._base_manager.exclude(**{field.attname: ''}).exclude(**{field.attname: None}).values_list(field.attname, flat=True).iterator())
+
+        return names
+
+    def handle(self, *args, **options):
+        """
+        A method that walks the media directory and deletes each file that is unreferenced and older than the grace period.
+        """
+        storage = ContentAddressedStorage()
+
+        referenced_names = self.get_referenced_names()
+
+        cutoff = time.time() - options['grace_hours'] * 60 * 60
+
+        total = 0
+
+        for directory, subdirectories, filenames in os.walk(storage.location):
+
+            for filename in filenames:
+
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+
+                if name in referenced_names or os.path.getmtime(path) > cutoff:
+
+                    continue
+
+                if options['dry_run']:
+
+                    self.stdout.write(f'Would delete {name}')
+
+                else:
+
+                    storage.delete(name)
+
+                total += 1
+
+        action = 'Would delete' if options['dry_run'] else 'Deleted'
+
+        self.stdout.write(f'{action} {total} unused media files.')
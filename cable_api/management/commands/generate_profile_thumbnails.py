@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from cable_api.images import generate_profile_thumbnails
+
+class Command(BaseCommand):
+    """
+    A class that defines the "generate_profile_thumbnails" command, which generates the thumbnails missing from profile images, such as those of jobs lost when a process stopped.
+    """
+    help = 'Generates the thumbnails of every profile image that does not have them yet.'
+
+    def add_arguments(self, parser):
+        """
+        A method that defines the arguments of the command.
+        """
+        parser.add_argument('--all', action='store_true', help='Regenerate the thumbnails of every profile image, for example after changing PROFILE_THUMBNAIL_SIZE.')
+
+    def handle(self, *args, **options):
+        """
+        A method that generates the thumbnails one user at a time in the current process.
+        """
+        users = get_user_model().objects.exclude(profile_image = '').exclude(profile_image = None)
+
+        if not options['all']:
+
+            # Empty file fields are stored as empty strings unless they were explicitly set to null.
+            users = users.filter(Q(profile_thumbnail_webp = '') | Q(profile_thumbnail_webp = None) | Q(profile_thumbnail_jpeg = '') | Q(profile_thumbnail_jpeg = None))
+
+        total = 0
+
+        for user_id in users.values_list('id', flat=True).iterator():
+
+            try:
+                total += generate_profile_thumbnails(user_id)
+
+            except Exception as exception:
+
+                self.stderr.write(f'Could not generate the thumbnails of user {user_id}: {exception}')
+
+        self.stdout.write(f'Generated the thumbnails of {total} profile images.')
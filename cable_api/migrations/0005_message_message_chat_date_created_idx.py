@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0004_alter_message_content'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat', 'date_created', 'id'], name='message_chat_date_created_idx'),
+        ),
+    ]
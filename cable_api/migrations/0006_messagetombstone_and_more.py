@@ -0,0 +1,35 @@
+# Generated by Django 4.1.7 on 2026-10-18 14:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0005_message_message_chat_date_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', models.BigIntegerField()),
+                ('date_deleted', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat', 'date_modified'], name='message_chat_date_modified_idx'),
+        ),
+        migrations.AddField(
+            model_name='messagetombstone',
+            name='chat',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='cable_api.chat'),
+        ),
+        migrations.AddIndex(
+            model_name='messagetombstone',
+            index=models.Index(fields=['chat', 'date_deleted'], name='tombstone_chat_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.1.7 on 2026-10-18 14:58
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_last_message(apps, schema_editor):
+    """
+    Points every existing chat at its latest message and sets its last activity to the time of that message, or to the time the chat was created.
+    """
+    Chat = apps.get_model('cable_api', 'Chat')
+    Message = apps.get_model('cable_api', 'Message')
+
+    latest_messages = Message.objects.filter(chat=models.OuterRef('pk')).order_by('-date_created', '-id')
+
+    Chat.objects.update(
+        last_message=models.Subquery(latest_messages.values('id')[:1]),
+        last_activity=Coalesce(models.Subquery(latest_messages.values('date_created')[:1]), models.F('date_created')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0006_messagetombstone_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='last_activity',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='cable_api.message'),
+        ),
+        migrations.RunPython(backfill_last_message, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['-last_activity', '-id'], name='chat_last_activity_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:02
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def mark_existing_messages_read(apps, schema_editor):
+    """
+    Moves the read position of every existing participant to the latest message of their chat, so unread counts start from zero.
+    """
+    Participant = apps.get_model('cable_api', 'Participant')
+    Message = apps.get_model('cable_api', 'Message')
+
+    latest_message = Message.objects.filter(chat=models.OuterRef('chat')).order_by('-id').values('id')[:1]
+
+    Participant.objects.update(last_read_id=Coalesce(models.Subquery(latest_message), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0007_chat_last_activity_chat_last_message_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='last_read_id',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(mark_existing_messages_read, migrations.RunPython.noop),
+    ]
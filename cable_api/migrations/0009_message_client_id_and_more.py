@@ -0,0 +1,22 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0008_participant_last_read_id_participant_unread_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='client_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='message',
+            constraint=models.UniqueConstraint(fields=('sender', 'client_id'), name='message_sender_client_id_unique'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:14
+
+from django.db import migrations
+
+
+SEARCH_COLUMNS = {
+    'user_user_name_prefix_idx': 'user_name',
+    'user_email_prefix_idx': 'email_address',
+}
+
+
+def create_prefix_search_indexes(apps, schema_editor):
+    """
+    Creates the indexes used by the prefix search of the users endpoint.
+    On PostgreSQL they index the upper cased columns with text_pattern_ops, which is what case insensitive "LIKE 'prefix%'" lookups can use under any collation.
+    Other databases get plain indexes on the columns.
+    """
+    User = apps.get_model('cable_api', 'User')
+
+    quote_name = schema_editor.quote_name
+    table = quote_name(User._meta.db_table)
+
+    for index_name, column in SEARCH_COLUMNS.items():
+
+        if schema_editor.connection.vendor == 'postgresql':
+
+            expression = f'UPPER({quote_name(column)}::text) text_pattern_ops'
+
+        else:
+
+            expression = quote_name(column)
+
+        schema_editor.execute(f'CREATE INDEX {quote_name(index_name)} ON {table} ({expression})')
+
+
+def drop_prefix_search_indexes(apps, schema_editor):
+    """
+    Drops the indexes created by create_prefix_search_indexes.
+    """
+    User = apps.get_model('cable_api', 'User')
+
+    for index_name in SEARCH_COLUMNS:
+
+        if schema_editor.connection.vendor == 'mysql':
+
+            schema_editor.execute(f'DROP INDEX {schema_editor.quote_name(index_name)} ON {schema_editor.quote_name(User._meta.db_table)}')
+
+        else:
+
+            schema_editor.execute(f'DROP INDEX {schema_editor.quote_name(index_name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0009_message_client_id_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_search_indexes, drop_prefix_search_indexes),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+def backfill_direct_keys(apps, schema_editor):
+    """
+    Gives every existing chat between two users the key of that pair. Where earlier races created more than one chat for a pair, only the oldest gets the key.
+    """
+    Chat = apps.get_model('cable_api', 'Chat')
+    Participant = apps.get_model('cable_api', 'Participant')
+
+    user_ids_by_chat = {}
+
+    for chat_id, user_id in Participant.objects.order_by('chat_id').values_list('chat_id', 'model_user_id'):
+
+        user_ids_by_chat.setdefault(chat_id, []).append(user_id)
+
+    used_keys = set()
+
+    for chat_id, user_ids in sorted(user_ids_by_chat.items()):
+
+        if len(user_ids) != 2:
+
+            continue
+
+        direct_key = f'{min(user_ids)}:{max(user_ids)}'
+
+        if direct_key not in used_keys:
+
+            used_keys.add(direct_key)
+
+            Chat.objects.filter(id=chat_id).update(direct_key=direct_key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0010_user_prefix_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='direct_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_direct_keys, migrations.RunPython.noop),
+    ]
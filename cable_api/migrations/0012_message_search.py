@@ -0,0 +1,33 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:31
+
+from django.db import migrations
+from cable_api.search import install_message_search, uninstall_message_search
+
+
+def install_search(apps, schema_editor):
+    """
+    Creates the full text index of message content that the database supports.
+    """
+    Message = apps.get_model('cable_api', 'Message')
+
+    install_message_search(schema_editor, Message._meta.db_table)
+
+
+def uninstall_search(apps, schema_editor):
+    """
+    Removes the full text index of message content.
+    """
+    Message = apps.get_model('cable_api', 'Message')
+
+    uninstall_message_search(schema_editor, Message._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0011_chat_direct_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
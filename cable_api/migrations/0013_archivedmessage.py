@@ -0,0 +1,31 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0012_message_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('compressed_content', models.BinaryField()),
+                ('date_created', models.DateTimeField()),
+                ('date_modified', models.DateTimeField()),
+                ('date_archived', models.DateTimeField(auto_now_add=True)),
+                ('chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='cable_api.chat')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedmessage',
+            index=models.Index(fields=['chat', 'date_created', 'id'], name='archived_chat_created_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:29
+
+import cable_api.models
+import cable_api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0013_archivedmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_thumbnail_jpeg',
+            field=models.ImageField(blank=True, null=True, storage=cable_api.storage.OverwriteStorage(), upload_to=cable_api.models.profile_thumbnail_path),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_thumbnail_webp',
+            field=models.ImageField(blank=True, null=True, storage=cable_api.storage.OverwriteStorage(), upload_to=cable_api.models.profile_thumbnail_path),
+        ),
+    ]
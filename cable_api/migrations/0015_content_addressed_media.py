@@ -0,0 +1,30 @@
+# Generated by Django 4.1.7 on 2026-10-18 15:35
+
+import cable_api.models
+import cable_api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cable_api', '0014_user_profile_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='profile_image',
+            field=models.ImageField(blank=True, null=True, storage=cable_api.storage.ContentAddressedStorage(), upload_to=cable_api.models.profile_image_path),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='profile_thumbnail_jpeg',
+            field=models.ImageField(blank=True, null=True, storage=cable_api.storage.ContentAddressedStorage(), upload_to=cable_api.models.profile_thumbnail_path),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='profile_thumbnail_webp',
+            field=models.ImageField(blank=True, null=True, storage=cable_api.storage.ContentAddressedStorage(), upload_to=cable_api.models.profile_thumbnail_path),
+        ),
+    ]
@@ -1,11 +1,15 @@
-from django.db import models
+import zlib
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, Greatest
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
-from cable_api.storage import OverwriteStorage
+from cable_api.storage import ContentAddressedStorage
 
 def profile_image_path(instance, filename):
     """
     A function responsible for generating a file path to store the users profile image.
+    The content addressed storage of the field only keeps the extension of the path, but the function is referenced by migrations.
     """
     extension = filename.split('.')[-1]
 
@@ -15,6 +19,20 @@ def profile_image_path(instance, filename):
 
     return path
 
+def profile_thumbnail_path(instance, filename):
+    """
+    A function responsible for generating a file path to store a thumbnail of the users profile image next to the image itself.
+    """
+    path = f'users/{instance.email_address}/profile_image/{filename}'
+
+    return path
+
+def direct_chat_key(user_id, other_user_id):
+    """
+    A function that returns the key identifying the direct chat between two users, which is the same whichever order the users are passed in.
+    """
+    return f'{min(user_id, other_user_id)}:{max(user_id, other_user_id)}'
+
 class UserManager(BaseUserManager):
     """
     A Class that defines methodes to manage the custom user model.
@@ -26,7 +44,8 @@ class UserManager(BaseUserManager):
         user = self.model(
             email_address = self.normalize_email(email_address),
             user_name = user_name,
-            password = password
+            password = password,
+            **kwargs
         )
 
         user.set_password(password)
@@ -66,7 +85,9 @@ class User(AbstractBaseUser):
     user_name = models.CharField(max_length=50)
     email_address = models.EmailField(max_length=255, unique=True)
     password = models.CharField(max_length=255)
-    profile_image = models.ImageField(upload_to=profile_image_path, storage=OverwriteStorage(), null=True, blank=True)
+    profile_image = models.ImageField(upload_to=profile_image_path, storage=ContentAddressedStorage(), null=True, blank=True)
+    profile_thumbnail_webp = models.ImageField(upload_to=profile_thumbnail_path, storage=ContentAddressedStorage(), null=True, blank=True)
+    profile_thumbnail_jpeg = models.ImageField(upload_to=profile_thumbnail_path, storage=ContentAddressedStorage(), null=True, blank=True)
     is_admin = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
@@ -96,16 +117,79 @@ class User(AbstractBaseUser):
         """
         return True
     
+class ChatQuerySet(models.QuerySet):
+    """
+    A Class that defines methods to query the chat model.
+    """
+    def with_related(self):
+        """
+        A method that:
+        - Fetches the last message of the chats in the same query.
+        - Prefetches the participants of the chats along with their users in a single extra query.
+        - Returns the queryset, which serializes any number of chats in a constant number of queries.
+        """
+        return self.select_related('last_message').prefetch_related(self.get_participants_prefetch())
+    
+    def get_participants_prefetch(self):
+        """
+        A method that returns the prefetch of the participants of chats along with their users, ordered by when they joined.
+        """
+        participants = Participant.objects.select_related('model_user').order_by('id')
+
+        return models.Prefetch('participants', queryset=participants)
+    
+    def fetch_related(self, chats):
+        """
+        A method that fetches the last messages and participants of chats that were loaded without with_related, such as chats returned by an update.
+        """
+        models.prefetch_related_objects(chats, 'last_message', self.get_participants_prefetch())
+    
+    def record_activity(self, chat_id, timestamp, last_message = None):
+        """
+        A method that:
+        - Moves the last activity of a chat forward to the given time.
+        - Points the chat at the given message if it is newer than the chat's current last message.
+        - Never moves either field backwards, so concurrent writes can land in any order.
+        """
+        values = {'last_activity': Greatest('last_activity', models.Value(timestamp, output_field=models.DateTimeField()))}
+
+        if last_message is not None:
+
+            is_newer = models.Q(last_message__isnull = True) | models.Q(last_message__lt = last_message.id)
+
+            values['last_message'] = models.Case(models.When(is_newer, then=models.Value(last_message.id)), default=models.F('last_message'), output_field=models.BigIntegerField())
+
+        return self.filter(id = chat_id).update(**values)
+    
+    def refresh_last_message(self, chat_id, timestamp):
+        """
+        A method that points a chat at its most recent remaining message and moves its last activity to the given time, for use after a message is deleted.
+        """
+        latest_message = Message.objects.filter(chat = models.OuterRef('pk')).order_by('-date_created', '-id').values('id')[:1]
+
+        return self.filter(id = chat_id).update(last_message = models.Subquery(latest_message), last_activity = timestamp)
+
 class Chat(models.Model):
     """
     A class that defines:
-    - The fields of the chat model.
+    - The fields of the chat model, including the key of the pair of users of a direct chat and its denormalized last message and last activity.
+    - The manager for the chat model.
     - The __str__ method for the chat model.
     """
     display_name = models.CharField(max_length=255, blank=True, null=True)
+    direct_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_activity = models.DateTimeField(default=timezone.now)
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
 
+    objects = ChatQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-last_activity', '-id'], name='chat_last_activity_idx')
+        ]
+
     def __str__(self):
         """
         Method that returns the chat id to represent the chat object in string format.
@@ -113,17 +197,62 @@ class Chat(models.Model):
 
         return f"chat_{self.id}"
     
+class ParticipantQuerySet(models.QuerySet):
+    """
+    A Class that defines methods to maintain the read positions and unread counts of the participant model.
+    """
+    def record_messages(self, chat_id, sender_id, last_message_id, count = 1):
+        """
+        A method that, in a single update:
+        - Adds the new messages to the unread counts of every participant of the chat other than the sender.
+        - Moves the read position of the sender to the last of the new messages and clears their unread count.
+        """
+        is_sender = models.Q(model_user_id = sender_id)
+
+        return self.filter(chat_id = chat_id).update(
+            unread_count = models.Case(models.When(is_sender, then=models.Value(0)), default=models.F('unread_count') + count),
+            last_read_id = models.Case(models.When(is_sender, then=Greatest('last_read_id', models.Value(last_message_id))), default=models.F('last_read_id')),
+        )
+    
+    def record_deletion(self, message):
+        """
+        A method that removes a deleted message from the unread counts of the participants that had not read it yet.
+        """
+        unread_by = self.filter(chat_id = message.chat_id, last_read_id__lt = message.id, unread_count__gt = 0).exclude(model_user_id = message.sender_id)
+
+        return unread_by.update(unread_count = models.F('unread_count') - 1)
+    
+    def mark_read(self, chat_id, user_id, message_id):
+        """
+        A method that:
+        - Moves the read position of a user in a chat forward to the given message.
+        - Recounts their unread messages past that position in the same statement, so that messages arriving concurrently are still counted.
+        """
+        unread_messages = Message.objects.filter(chat_id = models.OuterRef('chat_id'), id__gt = message_id).exclude(sender_id = models.OuterRef('model_user_id'))
+
+        unread_count = unread_messages.order_by().values('chat_id').annotate(count=models.Count('id')).values('count')
+
+        return self.filter(chat_id = chat_id, model_user_id = user_id, last_read_id__lt = message_id).update(
+            last_read_id = message_id,
+            unread_count = Coalesce(models.Subquery(unread_count), 0),
+        )
+
 class Participant(models.Model):
     """
     A class that defines:
-    - The fields of the participant model.
+    - The fields of the participant model, including the read position of the user and their unread count.
+    - The manager for the participant model.
     - The __str__ method for the chat model.
     """
     model_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='participants')
+    last_read_id = models.BigIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
 
+    objects = ParticipantQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['chat', 'model_user'], name='unique_chat_and_participant_combination')
@@ -146,9 +275,116 @@ class Message(models.Model):
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='chat')
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
+    client_id = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['chat', 'date_created', 'id'], name='message_chat_date_created_idx'),
+            models.Index(fields=['chat', 'date_modified'], name='message_chat_date_modified_idx')
+        ]
+        constraints = [
+            # Lets a client retry a send with the same key without creating the message twice.
+            models.UniqueConstraint(fields=['sender', 'client_id'], name='message_sender_client_id_unique')
+        ]
+
+    def __str__(self):
+        """
+        This method defines the string to be returned for the model object.
+        """
+        return f'message_{self.id}'
+    
+class MessageTombstone(models.Model):
+    """
+    A class that defines:
+    - The fields of the message tombstone model, which keeps the id of a deleted message so that clients syncing a chat can remove it.
+    - The __str__ method for the message tombstone model.
+    """
+    message_id = models.BigIntegerField()
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='tombstones')
+    date_deleted = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['chat', 'date_deleted'], name='tombstone_chat_deleted_idx')
+        ]
+
+    def __str__(self):
+        """
+        This method defines the string to be returned for the model object.
+        """
+        return f'message_tombstone_{self.message_id}'
+    
+def decompress_content(compressed_content):
+    """
+    A function that returns the content of an archived message from its compressed content.
+    """
+    return zlib.decompress(compressed_content).decode()
+
+class ArchivedMessageQuerySet(models.QuerySet):
+    """
+    A Class that defines methods to move messages into the archive.
+    """
+    def archive_messages(self, cutoff, batch_size = 1000):
+        """
+        A method that, in one transaction:
+        - Moves up to batch_size of the oldest messages created before the cutoff into the archive, compressing their content.
+        - Skips messages that are still the last message of their chat, so that every archived message of a chat is older than all of its live messages.
+        - Returns the number of messages moved.
+        """
+        last_messages = Chat.objects.filter(last_message__isnull = False).values('last_message_id')
+
+        with transaction.atomic(using=self.db):
+
+            messages = list(Message.objects.using(self.db).select_for_update().filter(date_created__lt = cutoff).exclude(id__in = last_messages).order_by('date_created', 'id')[:batch_size])
+
+            self.bulk_create([
+                ArchivedMessage(
+                    id = message.id,
+                    sender_id = message.sender_id,
+                    chat_id = message.chat_id,
+                    compressed_content = zlib.compress(message.content.encode()),
+                    date_created = message.date_created,
+                    date_modified = message.date_modified,
+                )
+                for message in messages
+            ])
+
+            Message.objects.using(self.db).filter(id__in = [message.id for message in messages]).delete()
+
+        return len(messages)
+
+class ArchivedMessage(models.Model):
+    """
+    A class that defines:
+    - The fields of the archived message model, which holds old messages with their content compressed, outside of the message table that recent reads use.
+    - The manager for the archived message model.
+    - A content property so that archived messages serialize like messages.
+    - The __str__ method for the archived message model.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='archived_messages')
+    compressed_content = models.BinaryField()
+    date_created = models.DateTimeField()
+    date_modified = models.DateTimeField()
+    date_archived = models.DateTimeField(auto_now_add=True)
+
+    objects = ArchivedMessageQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['chat', 'date_created', 'id'], name='archived_chat_created_idx')
+        ]
+
+    @property
+    def content(self):
+        """
+        A property that returns the decompressed content of the message.
+        """
+        return decompress_content(self.compressed_content)
 
     def __str__(self):
         """
         This method defines the string to be returned for the model object.
         """
-        return f'message_{self.id}'
\ No newline at end of file
+        return f'archived_message_{self.id}'
@@ -0,0 +1,244 @@
+import json
+import binascii
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+
+# The value of the "before" query parameter that starts paging backwards from the last row.
+LATEST_CURSOR = 'latest'
+
+def encode_cursor(values):
+    """
+    A function that:
+    - Converts the values passed to it into json, writing datetimes in iso format.
+    - Returns the json as an opaque url safe base64 string.
+    """
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+
+    cursor = json.dumps(values, separators=(',', ':')).encode()
+
+    return urlsafe_b64encode(cursor).decode()
+
+def decode_cursor_value(model, field, value):
+    """
+    A function that converts a value of a cursor back into a python value using the model field it was ordered by, or checks that it is a number if it was ordered by a numeric annotation such as a search rank.
+    """
+    try:
+        return model._meta.get_field(field).to_python(value)
+    
+    except FieldDoesNotExist:
+
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+
+            raise ValueError
+        
+        return value
+
+def decode_cursor(cursor, model, ordering):
+    """
+    A function that:
+    - Decodes a cursor created by the encode_cursor function.
+    - Converts each value back into a python value using the model field or annotation it was ordered by.
+    - Raises an exception if the cursor is malformed.
+    """
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+
+        if not isinstance(values, list) or len(values) != len(ordering):
+
+            raise ValueError
+
+        return [decode_cursor_value(model, field.lstrip('-'), value) for field, value in zip(ordering, values)]
+
+    except (ValueError, TypeError, ValidationError, binascii.Error):
+
+        raise ParseError('Invalid cursor.')
+
+def get_limit(request):
+    """
+    A function that reads the "limit" query parameter and clamps it between one and the maximum page size.
+    """
+    limit = request.query_params.get('limit')
+
+    if limit is None:
+
+        return settings.PAGE_SIZE
+
+    try:
+        limit = int(limit)
+
+    except ValueError:
+
+        raise ParseError('Invalid limit.')
+
+    if limit < 1:
+
+        raise ParseError('Invalid limit.')
+
+    return min(limit, settings.MAX_PAGE_SIZE)
+
+def get_row_value(row, field):
+    """
+    A function that returns the value of a field from a model object or a dictionary returned by .values().
+    """
+    if isinstance(row, dict):
+
+        return row[field]
+
+    return getattr(row, field)
+
+def keyset_filter(ordering, values):
+    """
+    A function that:
+    - Builds a filter matching every row that comes strictly after the given values in the given ordering.
+    - Expands the row comparison into an "or" of prefix equalities so that it works on every database.
+    """
+    keyset = Q()
+
+    for index, field in enumerate(ordering):
+
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+
+        condition = Q(**{f'{name}__{lookup}': values[index]})
+
+        for previous_field, previous_value in zip(ordering[:index], values[:index]):
+
+            condition &= Q(**{previous_field.lstrip('-'): previous_value})
+
+        keyset |= condition
+
+    return keyset
+
+def reverse_ordering(ordering):
+    """
+    A function that flips the direction of every field in an ordering.
+    """
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+def paginate_queryset(queryset, request, ordering):
+    """
+    A function that:
+    - Reads the "before", "after" and "limit" query parameters from the request.
+    - Filters the queryset to the rows on the requested side of the cursor and orders it by the given fields.
+    - Returns a page of rows in the given ordering, a cursor for the next page in the same direction, which is None when there are no more rows, and a cursor for the previous page in the other direction.
+    """
+    return paginate_querysets([queryset], request, ordering)
+
+def get_page_query(querysets, request, ordering, from_latest = False):
+    """
+    A function that:
+    - Reads the "before", "after" and "limit" query parameters from the request, where a "before" of LATEST_CURSOR reads backwards from the last row.
+    - Reads backwards from the last row when neither cursor is given if from_latest is set, and forwards from the first row otherwise.
+    - Returns whether the page is read backwards, whether it was requested from a cursor, the ordering to read it in, the filter matching the rows on the requested side of the cursor and the size of the page.
+    """
+    before = request.query_params.get('before')
+    after = request.query_params.get('after')
+
+    if before and after:
+
+        raise ParseError('Only one of "before" and "after" can be used.')
+
+    if from_latest and not after:
+
+        before = before or LATEST_CURSOR
+
+    limit = get_limit(request)
+
+    page_ordering = reverse_ordering(ordering) if before else tuple(ordering)
+
+    cursor = before or after
+
+    keyset = Q()
+
+    if cursor and cursor != LATEST_CURSOR:
+
+        values = decode_cursor(cursor, querysets[0].model, page_ordering)
+
+        keyset = keyset_filter(page_ordering, values)
+
+    return bool(before), bool(cursor), page_ordering, keyset, limit
+
+def get_page(rows, backwards, from_cursor, page_ordering, limit):
+    """
+    A function that:
+    - Cuts the rows read for a page, one more than its size, down to the page and returns it in the given ordering.
+    - Returns along with it the cursor for the next page in the direction it was read, which is None when there are no more rows.
+    - Returns the cursor for the previous page, read in the other direction from the first row of the page, which is None when the page is empty or started from the first row.
+    """
+    has_next = len(rows) > limit
+
+    rows = rows[:limit]
+
+    next_cursor = None
+    previous_cursor = None
+
+    if has_next:
+
+        next_cursor = encode_cursor([get_row_value(rows[-1], field.lstrip('-')) for field in page_ordering])
+
+    if rows and from_cursor:
+
+        previous_cursor = encode_cursor([get_row_value(rows[0], field.lstrip('-')) for field in page_ordering])
+
+    if backwards:
+
+        rows.reverse()
+
+    return rows, next_cursor, previous_cursor
+
+def paginate_querysets(querysets, request, ordering, from_latest = False):
+    """
+    A function that pages through a list of querysets as if they were one, the way paginate_queryset pages through a single queryset.
+    Every row of a queryset must come before every row of the querysets after it in the given ordering, so that a page only queries the next queryset once the ones before it run out.
+    """
+    backwards, from_cursor, page_ordering, keyset, limit = get_page_query(querysets, request, ordering, from_latest)
+
+    rows = []
+
+    for queryset in (reversed(querysets) if backwards else querysets):
+
+        rows += queryset.filter(keyset).order_by(*page_ordering)[:limit + 1 - len(rows)]
+
+        if len(rows) > limit:
+
+            break
+
+    return get_page(rows, backwards, from_cursor, page_ordering, limit)
+
+async def apaginate_querysets(querysets, request, ordering, from_latest = False):
+    """
+    A function that pages through a list of querysets like paginate_querysets, reading the rows with the async interface of the ORM.
+    """
+    backwards, from_cursor, page_ordering, keyset, limit = get_page_query(querysets, request, ordering, from_latest)
+
+    rows = []
+
+    for queryset in (reversed(querysets) if backwards else querysets):
+
+        rows += [row async for row in queryset.filter(keyset).order_by(*page_ordering)[:limit + 1 - len(rows)]]
+
+        if len(rows) > limit:
+
+            break
+
+    return get_page(rows, backwards, from_cursor, page_ordering, limit)
+
+def get_sync_token():
+    """
+    A function that:
+    - Returns a sync token marking SYNC_TOKEN_MARGIN_SECONDS before the current time, to be taken before any rows are read for a response.
+    - Leaves the margin because a row can be stamped before the token but only commit after the rows are read, which the next sync would otherwise skip for good.
+    - Makes a sync return again the rows changed within the margin, which clients merge by id.
+    """
+    return encode_cursor([timezone.now() - timedelta(seconds=settings.SYNC_TOKEN_MARGIN_SECONDS)])
+
+def decode_sync_token(token, model, field):
+    """
+    A function that decodes a sync token into the datetime it marks, using the given datetime field of the model to parse it.
+    """
+    return decode_cursor(token, model, (field,))[0]
@@ -0,0 +1,43 @@
+import io
+import codecs
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from cable_api.renderers import ORJSONRenderer
+
+# A table that turns every digit into a zero and every other byte into a space.
+DIGIT_BYTES = bytes(ord('0') if byte in b'0123456789' else ord(' ') for byte in range(256))
+
+def has_long_numbers(body):
+    """
+    A function that checks if a json body may hold an integer outside of 64 bits, which orjson reads as a float where the json module reads an integer, by looking for a run of 19 digits.
+    A run of 20 digits can exceed the largest unsigned integer, and a run of 19 the smallest signed one when negative.
+    """
+    return b'0' * 19 in body.translate(DIGIT_BYTES)
+
+class ORJSONParser(JSONParser):
+    """
+    A class that parses json with orjson, returning the same data as the JSONParser of the rest framework in a fraction of the time.
+    Bodies orjson can't parse identically, such as ones that aren't utf-8, hold integers outside of 64 bits or fail to parse, are parsed by the JSONParser, which also raises the same errors for invalid json.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        A method overriden to parse the body with orjson when it reads it the way the JSONParser does, and with the JSONParser otherwise.
+        """
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        body = stream.read()
+
+        if codecs.lookup(encoding).name == 'utf-8' and not has_long_numbers(body):
+
+            try:
+                return orjson.loads(body)
+
+            except orjson.JSONDecodeError:
+
+                pass
+
+        return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,221 @@
+import random
+import contextvars
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+# The routing state of the request being handled in the current thread or task.
+request_state = contextvars.ContextVar('database_request_state', default=None)
+
+def get_pin_key(user_id):
+    """
+    A function that returns the cache key marking that a user has written recently.
+    """
+    return f'cable_api:primary_pin:{user_id}'
+
+def get_request_user_id(request):
+    """
+    A function that returns the id of the user whose access token authorizes a request, or None if the request has no valid token.
+    """
+    authentication = JWTAuthentication()
+
+    header = authentication.get_header(request)
+
+    if header is None:
+
+        return None
+
+    try:
+        raw_token = authentication.get_raw_token(header)
+
+        if raw_token is None:
+
+            return None
+
+        return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+
+    except (InvalidToken, TokenError):
+
+        return None
+
+def read_from_primary():
+    """
+    A function that sends the remaining reads of the request being handled to the primary, for reads that must not miss the rows the replicas have yet to receive, such as syncs.
+    """
+    state = request_state.get()
+
+    if state is not None:
+
+        state.primary = True
+
+class RequestState:
+    """
+    A class that holds what the router needs to know about the request being handled to pick a database for its reads.
+    """
+    def __init__(self, request):
+        """
+        A method that starts the state of a request, which reads from the primary if its method can write.
+        """
+        self.request = request
+        self.primary = request.method not in SAFE_METHODS
+        self.wrote = False
+        self.pinned = None
+        self.user_id = None
+
+    def is_pinned(self):
+        """
+        A method that checks, once per request, if the user making the request has written within READ_YOUR_WRITES_SECONDS.
+        """
+        if self.pinned is None:
+
+            # Set first so that a cache backed by the database reads from the primary instead of checking again.
+            self.pinned = True
+
+            self.user_id = get_request_user_id(self.request)
+
+            self.pinned = self.user_id is not None and caches[settings.DATABASE_PIN_CACHE_ALIAS].get(get_pin_key(self.user_id)) is not None
+
+        return self.pinned
+
+    def use_primary(self):
+        """
+        A method that checks if the reads of the request have to go to the primary, which they do for requests that can write, once the request has written and while the user is pinned.
+        """
+        return self.primary or self.wrote or self.is_pinned()
+
+    def record_writes(self):
+        """
+        A method that pins the user who made the request to the primary for READ_YOUR_WRITES_SECONDS if the request wrote, so their next reads see their writes whatever the lag of the replicas.
+        """
+        if not self.wrote:
+
+            return
+
+        if self.pinned is None:
+
+            self.user_id = get_request_user_id(self.request)
+
+        if self.user_id is not None:
+
+            caches[settings.DATABASE_PIN_CACHE_ALIAS].set(get_pin_key(self.user_id), True, settings.READ_YOUR_WRITES_SECONDS)
+
+class ReplicaRouter:
+    """
+    A class that routes the reads of requests to the read replicas named by DATABASE_REPLICAS and everything else to the primary.
+    - Reads made outside of requests, such as by commands and background workers, go to the primary.
+    - Reads of requests that can write, or that have written, go to the primary.
+    - Reads of a user who wrote within READ_YOUR_WRITES_SECONDS go to the primary, so users always see their own writes.
+    - Reads of requests that called read_from_primary go to the primary.
+    """
+    def db_for_read(self, model, **hints):
+        """
+        A method that picks a random replica for reads that do not have to go to the primary.
+        """
+        state = request_state.get()
+
+        if not settings.DATABASE_REPLICAS or state is None or state.use_primary():
+
+            return DEFAULT_DB_ALIAS
+
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        """
+        A method that sends writes to the primary and marks the request as having written.
+        """
+        state = request_state.get()
+
+        if state is not None:
+
+            state.wrote = True
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+        A method that allows relations between objects read from any of the databases, since the replicas hold copies of the primary.
+        """
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+
+        if obj1._state.db in databases and obj2._state.db in databases:
+
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """
+        A method that keeps migrations off the replicas, which get the schema of the primary through replication.
+        """
+        if db in settings.DATABASE_REPLICAS:
+
+            return False
+
+        return None
+
+class ReplicaRoutingMiddleware:
+    """
+    A class that makes the request being handled known to the router and pins its user to the primary once it has written.
+    It runs in the mode of the handler after it, so that async views are not sent to a thread to get past it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+        A method that stores the next handler of the request and marks the middleware as async if the handler is.
+        """
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """
+        A method that handles a request with its routing state set.
+        """
+        if iscoroutinefunction(self):
+
+            return self.__acall__(request)
+
+        state = RequestState(request)
+
+        token = request_state.set(state)
+
+        try:
+            response = self.get_response(request)
+
+        finally:
+
+            request_state.reset(token)
+
+        state.record_writes()
+
+        return response
+
+    async def __acall__(self, request):
+        """
+        A method that handles a request with its routing state set when the handler after it is async.
+        """
+        state = RequestState(request)
+
+        token = request_state.set(state)
+
+        try:
+            response = await self.get_response(request)
+
+        finally:
+
+            request_state.reset(token)
+
+        if state.wrote:
+
+            await sync_to_async(state.record_writes)()
+
+        return response
@@ -0,0 +1,9 @@
+from cable_api.consumers import chat_events_socket, chat_events_stream
+
+websocket_routes = {
+    '/ws/chats/': chat_events_socket,
+}
+
+http_routes = {
+    '/api/chats/stream/': chat_events_stream,
+}
@@ -0,0 +1,121 @@
+import html
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Substr
+from rest_framework.exceptions import ParseError
+from cable_api.models import Message
+
+# The text search configuration used to index and query message content on PostgreSQL.
+SEARCH_CONFIG = 'english'
+
+# The FTS5 table indexing message content on SQLite.
+FTS_TABLE = 'cable_api_message_fts'
+
+# The markers placed around the matched words of a snippet.
+SNIPPET_START = '<b>'
+SNIPPET_STOP = '</b>'
+
+# The private use characters the database places around the matched words instead, since the content around them still has to be escaped.
+MATCH_START = '\ue000'
+MATCH_STOP = '\ue001'
+
+SNIPPET_LENGTH = 200
+
+def install_message_search(schema_editor, table):
+    """
+    A function that:
+    - On PostgreSQL, adds a tsvector column generated from the content of the message table passed to it, which the database keeps up to date, and a GIN index on it.
+    - On SQLite, creates an FTS5 table over the message content, the triggers that keep it up to date and fills it with the existing messages.
+    - Does nothing on other databases, which search with a plain scan instead.
+    - Must be run again by any SQLite migration that rebuilds the message table, since rebuilding it drops the triggers.
+    """
+    vendor = schema_editor.connection.vendor
+    table = schema_editor.quote_name(table)
+
+    if vendor == 'postgresql':
+
+        schema_editor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', content)) STORED")
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS message_search_vector_idx ON {table} USING GIN (search_vector)')
+
+    elif vendor == 'sqlite':
+
+        schema_editor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(content, content={table}, content_rowid='id')")
+        schema_editor.execute(f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {table} BEGIN INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END')
+        schema_editor.execute(f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {table} BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); END")
+        schema_editor.execute(f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF content ON {table} BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content); INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.id, new.content); END")
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+def uninstall_message_search(schema_editor, table):
+    """
+    A function that removes what install_message_search created.
+    """
+    vendor = schema_editor.connection.vendor
+    table = schema_editor.quote_name(table)
+
+    if vendor == 'postgresql':
+
+        schema_editor.execute('DROP INDEX IF EXISTS message_search_vector_idx')
+        schema_editor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+
+    elif vendor == 'sqlite':
+
+        for trigger in ['insert', 'delete', 'update']:
+
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}')
+
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+def quote_fts_query(query):
+    """
+    A function that turns a search query into an FTS5 query matching every word in it, quoting each word so that FTS5 syntax in the query is searched for literally.
+    """
+    words = ['"{}"'.format(word.replace('"', '""')) for word in query.split()]
+
+    return ' '.join(words)
+
+def search_messages(queryset, query):
+    """
+    A function that:
+    - Filters a message queryset to the messages whose content matches the search query, using the full text index of the database.
+    - Annotates each message with a "rank", which is higher for better matches, and a "snippet" of its content with the matched words marked, to be passed to format_snippet.
+    - Raises an exception if the query is empty.
+    """
+    query = query.strip()
+
+    if not query:
+
+        raise ParseError('A search query must be provided.')
+
+    vendor = connections[queryset.db].vendor
+    table = connections[queryset.db].ops.quote_name(Message._meta.db_table)
+
+    if vendor == 'postgresql':
+
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        headline_options = f'StartSel="{MATCH_START}", StopSel="{MATCH_STOP}", MaxFragments=1, MaxWords=20, MinWords=5'
+
+        return queryset.filter(RawSQL(f'{table}.search_vector @@ {tsquery}', [query], output_field=BooleanField())).annotate(
+            rank = RawSQL(f'ts_rank({table}.search_vector, {tsquery})', [query], output_field=FloatField()),
+            snippet = RawSQL(f"ts_headline('{SEARCH_CONFIG}', {table}.content, {tsquery}, %s)", [query, headline_options]),
+        )
+
+    if vendor == 'sqlite':
+
+        fts_query = quote_fts_query(query)
+
+        # The auxiliary functions of FTS5 only work in a query that joins and matches the FTS table itself.
+        return queryset.extra(tables=[FTS_TABLE], where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'], params=[fts_query]).annotate(
+            rank = RawSQL(f'-bm25({FTS_TABLE})', [], output_field=FloatField()),
+            snippet = RawSQL(f"snippet({FTS_TABLE}, 0, %s, %s, '...', 20)", [MATCH_START, MATCH_STOP]),
+        )
+
+    return queryset.filter(content__icontains = query).annotate(rank = Value(0.0, output_field=FloatField()), snippet = Substr('content', 1, SNIPPET_LENGTH))
+
+def format_snippet(snippet):
+    """
+    A function that escapes the html in a snippet annotated by search_messages and wraps its matched words in SNIPPET_START and SNIPPET_STOP, so that clients can render it as html.
+    """
+    snippet = html.escape(snippet)
+
+    return snippet.replace(MATCH_START, SNIPPET_START).replace(MATCH_STOP, SNIPPET_STOP)
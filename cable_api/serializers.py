@@ -1,6 +1,7 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from cable_api.models import Chat, Participant, Message
+from cable_api.models import Chat, Participant, Message, ArchivedMessage, decompress_content
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -17,11 +18,15 @@ class UserSerializer(serializers.ModelSerializer):
             'user_name',
             'email_address',
             'profile_image',
+            'profile_thumbnail_webp',
+            'profile_thumbnail_jpeg',
             'password',
         ]
         
         extra_kwargs = {
             'id':{'read_only': True, 'required': False, 'allow_null': True},
+            'profile_thumbnail_webp': {'read_only': True},
+            'profile_thumbnail_jpeg': {'read_only': True},
             'password': {'write_only': True}
             }
 
@@ -61,13 +66,83 @@ class ParticipantingUserSerializer(serializers.ModelSerializer):
 
         fields = ['model_user'] 
 
+class MessageSerializer(serializers.ModelSerializer):
+    """
+    - Serialize the fields of the message model into a python dictionary.
+    - Validate data passed to it.  
+    """
+    class Meta:
+        model = Message
+
+        fields = [
+            'id',
+            'content',
+            'sender',  
+            'chat',
+            'date_created',
+            'client_id'
+        ]
+
+        extra_kwargs = {
+            'id':{'read_only': True, 'required': False, 'allow_null': True},
+            'sender':{'required': False, 'allow_null': True},
+            'chat':{'required': False, 'allow_null': True},
+            'date_created':{'read_only': True, 'required': False, 'allow_null': True},
+            'client_id':{'write_only': True, 'required': False, 'allow_null': True},
+        }
+    
+# The values read for a message on the fast path of serialize_message_values, with archived messages reading their compressed content in place of their content.
+MESSAGE_VALUES = ('id', 'content', 'sender_id', 'chat_id', 'date_created')
+ARCHIVED_MESSAGE_VALUES = ('id', 'compressed_content', 'sender_id', 'chat_id', 'date_created')
+
+def message_values(queryset):
+    """
+    A function that reads the values serialize_message_values needs from a queryset of messages or archived messages as dictionaries, without creating a model object for each row.
+    """
+    if queryset.model is ArchivedMessage:
+
+        return queryset.values(*ARCHIVED_MESSAGE_VALUES)
+
+    return queryset.values(*MESSAGE_VALUES)
+
+def message_row(message):
+    """
+    A function that returns the values of a message object as message_values reads them for a row.
+    """
+    return {field: getattr(message, field) for field in MESSAGE_VALUES}
+
+def serialize_message_values(rows):
+    """
+    A function that:
+    - Serializes rows read by message_values into the same dictionaries as the data of the message serializer, for responses that only read messages.
+    - Builds each dictionary directly instead of running every field of the serializer on every message, which dominates the time taken to list thousands of messages.
+    - Decompresses the content of archived messages.
+    """
+    date_field = MessageSerializer().fields['date_created']
+
+    # Fixes the timezone the field writes dates in to the current one, which it would otherwise look up for every date.
+    date_field.timezone = date_field.default_timezone()
+
+    return [
+        {
+            'id': row['id'],
+            'content': row['content'] if 'content' in row else decompress_content(row['compressed_content']),
+            'sender': row['sender_id'],
+            'chat': row['chat_id'],
+            'date_created': date_field.to_representation(row['date_created']),
+        }
+        for row in rows
+    ]
+
 class ChatSerializer(serializers.ModelSerializer):
     """
     A class to:
-      - Serialize the fields of the chat model into a python dictionary with an additional field containing chat participants.
+      - Serialize the fields of the chat model into a python dictionary with additional fields containing chat participants and the last message of the chat.
       - Validate data passed to it.  
     """
     participants = ParticipantingUserSerializer(required=False, many=True)
+    last_message = MessageSerializer(read_only=True)
+    unread_count = serializers.SerializerMethodField()
     
     class Meta:
 
@@ -76,41 +151,72 @@ class ChatSerializer(serializers.ModelSerializer):
         fields = [   
             'id',
             'display_name',
-            'participants'
+            'participants',
+            'last_message',
+            'last_activity',
+            'unread_count'
         ]
 
         extra_kwargs = {
             'id':{'read_only': True, 'required': False, 'allow_null': True},
+            'last_activity':{'read_only': True, 'required': False, 'allow_null': True},
             }
         
-class MessageSerializer(serializers.ModelSerializer):
+    def get_unread_count(self, chat):
+        """
+        A method that returns the unread count of the user passed in the serializer context, read from the prefetched participants of the chat.
+        """
+        user = self.context.get('user')
+
+        for participant in chat.participants.all():
+
+            if user is not None and participant.model_user_id == user.id:
+
+                return participant.unread_count
+            
+        return None
+    
+class ReadPositionSerializer(serializers.ModelSerializer):
     """
-    - Serialize the fields of the message model into a python dictionary.
-    - Validate data passed to it.  
+    A class to:
+      - Serialize the read position and unread count of a participant into a python dictionary.
+      - Validate the read position passed to it.  
     """
     class Meta:
-        model = Message
+
+        model = Participant
 
         fields = [
-            'id',
-            'content',
-            'sender',  
-            'chat',
-            'date_created'
+            'last_read_id',
+            'unread_count'
         ]
 
         extra_kwargs = {
-            'id':{'read_only': True, 'required': False, 'allow_null': True},
-            'sender':{'required': False, 'allow_null': True},
-            'chat':{'required': False, 'allow_null': True},
-            'date_created':{'read_only': True, 'required': False, 'allow_null': True},
+            'last_read_id': {'required': True},
+            'unread_count': {'read_only': True},
         }
-    
+        
+
 class EmailSerializer(serializers.Serializer):
     """
     A class to:
-      - Serialize the email passed to it into a python dictionary.
-      - Validate the email passed to it.  
+      - Serialize the email, or the list of emails of a group chat, passed to it into a python dictionary.
+      - Validate the emails passed to it.  
     """
-    email_address = serializers.EmailField(max_length=255, write_only=True, required=True)
+    email_address = serializers.EmailField(max_length=255, write_only=True, required=False)
+    email_addresses = serializers.ListField(child=serializers.EmailField(max_length=255), write_only=True, required=False, allow_empty=False, max_length=settings.MAX_CHAT_PARTICIPANTS - 1)
+
+    def validate(self, data):
+        """
+        A method that checks that exactly one of the email address and the list of email addresses was passed.
+        """
+        if 'email_address' not in data and 'email_addresses' not in data:
+
+            raise serializers.ValidationError({'email_address': ['This field is required.']})
+        
+        if 'email_address' in data and 'email_addresses' in data:
+
+            raise serializers.ValidationError('Only one of "email_address" and "email_addresses" can be used.')
+        
+        return data
 
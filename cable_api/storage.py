@@ -1,8 +1,15 @@
+import os
+import hashlib
+import tempfile
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
 from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
 
 class OverwriteStorage(FileSystemStorage):
     """
     A class that defines methods to overwrite storage.
+    It is no longer used by the models but is kept because earlier migrations reference it.
     """
     def get_available_name(self, name, max_length=None):
         """
@@ -15,4 +22,120 @@ class OverwriteStorage(FileSystemStorage):
              
             self.delete(name)
 
-        return name 
\ No newline at end of file
+        return name
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    A class that defines a storage which names files by the SHA-256 hash of their content.
+    - The name never changes while the bytes stay the same and changes whenever they don't, so files can be cached forever by their url.
+    - Identical files are stored once, whoever uploads them.
+    - Files are never deleted on save, since other rows may share them. Unused files are removed by the collect_unused_media command.
+    """
+    directory = 'blobs'
+
+    def save(self, name, content, max_length=None):
+        """
+        A storage method overriden to replace the name of the file with the hash of its content, keeping only its extension.
+        """
+        if name is None:
+
+            name = content.name
+
+        if not hasattr(content, 'chunks'):
+
+            content = File(content, name)
+
+        return super().save(self.get_content_name(name, content), content, max_length)
+
+    def get_content_name(self, name, content):
+        """
+        A method that hashes the content of a file and returns the name it is stored under, spread over subdirectories by the first characters of the hash.
+        """
+        digest = hashlib.sha256()
+
+        for chunk in content.chunks():
+
+            digest.update(chunk)
+
+        content.seek(0)
+
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+
+        return f'{self.directory}/{digest[:2]}/{digest}{extension}'
+
+    def get_available_name(self, name, max_length=None):
+        """
+        A storage method overriden to return the name as is, since a file that already exists under a content name holds the same bytes.
+        """
+        if max_length is not None and len(name) > max_length:
+
+            raise SuspiciousFileOperation(f'Storage can not find an available filename for "{name}".')
+
+        return name
+
+    def _save(self, name, content):
+        """
+        A storage method overriden to:
+        - Skip writing files that are already stored, refreshing their modification time instead.
+        - Write new files to a temporary file and move it into place, so concurrent uploads of the same file never see a partial one.
+        """
+        full_path = self.path(name)
+
+        try:
+            # The collect_unused_media command spares files modified within its grace period, which keeps a stored file that is unreferenced until the row uploading it again is saved.
+            os.utime(full_path)
+
+            return name
+
+        except FileNotFoundError:
+
+            pass
+
+        directory = os.path.dirname(full_path)
+
+        if self.directory_permissions_mode is not None:
+
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+
+            finally:
+                os.umask(old_umask)
+
+        else:
+
+            os.makedirs(directory, exist_ok=True)
+
+        file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temp_file:
+
+                for chunk in content.chunks():
+
+                    temp_file.write(chunk)
+
+            if self.file_permissions_mode is not None:
+
+                os.chmod(temp_path, self.file_permissions_mode)
+
+            os.replace(temp_path, full_path)
+
+        except BaseException:
+
+            if os.path.exists(temp_path):
+
+                os.remove(temp_path)
+
+            raise
+
+        return name
+
+    def is_content_addressed(self, name):
+        """
+        A method that checks if a file name was given by this storage, and so refers to content that never changes.
+        """
+        return name.startswith(f'{self.directory}/')
@@ -0,0 +1,170 @@
+import json
+import shutil
+from unittest import mock
+from asgiref.sync import iscoroutinefunction
+from django.urls import path, include, reverse
+from django.test import AsyncClient, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory, MessageFactory
+from cable_api.models import Chat, direct_chat_key
+from cable_api.serializers import MessageSerializer
+from cable_api.views import async_views
+from cable_api.tests import test_chat_views as chat_view_tests
+from cable_api.tests import test_message_views as message_view_tests
+from cable_api.tests.test_helpers import get_auth_headers
+
+class AsyncViewsURLConf:
+    """
+    A class that serves as a urlconf routing the endpoints with a native async view to it, and every other url as the project does.
+    """
+    urlpatterns = [
+        path('api/chats/', async_views.chats_view, name='chats'),
+        path('api/chats/<int:chat_id>/messages/', async_views.messages_view, name='messages'),
+        path('api/chats/<int:chat_id>/messages/<int:message_id>/', async_views.message_view, name='message'),
+        path('', include('cable.urls')),
+    ]
+
+@override_settings(ROOT_URLCONF = AsyncViewsURLConf)
+class TestAsyncChatsView(chat_view_tests.TestChatsView):
+    """
+    A class to run the tests of the "api/chats/" endpoint against its async view.
+    """
+    def test_chats_view_POST_concurrent_duplicate(self):
+        """
+        A method to test that a POST to the "api/chats/" endpoint racing another request for the same pair of users returns the chat the other request created instead of creating a second one.
+        """
+        endpoint = reverse('chats')
+
+        request_dict = {
+            'display_name': 'test_chat',
+            'email_address': self.test_user.email_address
+        }
+
+        existing_chat = json.loads(self.client.post(endpoint, request_dict, **self.auth_headers).content)['new_chat']
+
+        # Skipping the existence check lets the second request reach the insert, as it would if both checks ran before either insert.
+        with mock.patch('cable_api.views.async_views.acheck_chat_exists'):
+
+            response = self.client.post(endpoint, request_dict, **self.auth_headers)
+
+        expected_response = {'new_chat': existing_chat}
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+        self.assertEqual(1, Chat.objects.filter(direct_key = direct_chat_key(self.auth_user.id, self.test_user.id)).count())
+
+@override_settings(ROOT_URLCONF = AsyncViewsURLConf)
+class TestAsyncChatsWhenObjectsDontExist(chat_view_tests.TestChatsWhenObjectsDontExist):
+    """
+    A class to run the tests of the "api/chats/" endpoint when required objects don't exist against its async view.
+    """
+
+@override_settings(ROOT_URLCONF = AsyncViewsURLConf)
+class TestAsyncMessagesView(message_view_tests.TestMessagesView):
+    """
+    A class to run the tests of the "api/chats/chat_id/messages/" endpoint against its async view.
+    """
+
+@override_settings(ROOT_URLCONF = AsyncViewsURLConf)
+class TestAsyncMessagesWhenObjectsDontExist(message_view_tests.TestMessagesWhenObjectsDontExist):
+    """
+    A class to run the tests of the "api/chats/chat_id/messages/" endpoint when required objects don't exist against its async view.
+    """
+
+@override_settings(ROOT_URLCONF = AsyncViewsURLConf)
+class TestAsyncMessagesAgainstUnauthorizedUser(message_view_tests.TestMessagesAgainstUnauthorizedUser):
+    """
+    A class to run the tests of the "api/chats/chat_id/messages/" endpoint against an unauthorized user against its async view.
+    """
+
+@override_settings(ROOT_URLCONF = AsyncViewsURLConf)
+class TestAsyncMessageView(message_view_tests.TestMessageView):
+    """
+    A class to run the tests of the "api/chats/chat_id/messages/message_id/" endpoint against its async view.
+    """
+
+@override_settings(ROOT_URLCONF = AsyncViewsURLConf)
+class TestAsyncMessageWhenObjectsDontExist(message_view_tests.TestMessageWhenObjectsDontExist):
+    """
+    A class to run the tests of the "api/chats/chat_id/messages/message_id/" endpoint when required objects don't exist against its async view.
+    """
+
+@override_settings(ROOT_URLCONF = AsyncViewsURLConf)
+class TestAsyncMessageAgainstUnauthorizedUser(message_view_tests.TestMessageAgainstUnauthorizedUser):
+    """
+    A class to run the tests of the "api/chats/chat_id/messages/message_id/" endpoint against an unauthorized user against its async view.
+    """
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media', ROOT_URLCONF = AsyncViewsURLConf)
+class TestAsyncViews(APITestCase):
+    """
+    A class to test what the async views do in place of the api_view decorator, and serving them through the async request handler.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create()
+        self.chat_object = ChatFactory.create()
+        ParticipantFactory(model_user = self.auth_user, chat = self.chat_object)
+        self.message_objects = MessageFactory.create_batch(3, sender = self.auth_user, chat = self.chat_object)
+        self.auth_headers = get_auth_headers(self.client, self.auth_user)
+
+    def test_async_views_are_coroutine_functions(self):
+        """
+        A method to test that the async views are coroutine functions, which Django calls on its event loop instead of in a thread.
+        """
+        for view in (async_views.chats_view, async_views.messages_view, async_views.message_view):
+
+            self.assertTrue(iscoroutinefunction(view))
+            self.assertTrue(view.csrf_exempt)
+
+    def test_async_view_unauthenticated(self):
+        """
+        A method to test that an async view refuses a request without an access token like the sync views do.
+        """
+        response = self.client.get(reverse('chats'))
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+        self.assertEqual('Bearer realm="api"', response['WWW-Authenticate'])
+        self.assertEqual({'detail': 'Authentication credentials were not provided.'}, json.loads(response.content))
+
+    def test_async_view_invalid_token(self):
+        """
+        A method to test that an async view refuses a request with an invalid access token like the sync views do.
+        """
+        response = self.client.get(reverse('chats'), HTTP_AUTHORIZATION = 'Bearer invalid')
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+        self.assertEqual('token_not_valid', json.loads(response.content)['code'])
+
+    def test_async_view_method_not_allowed(self):
+        """
+        A method to test that an async view refuses a method it does not define.
+        """
+        response = self.client.put(reverse('chats'), **self.auth_headers)
+
+        self.assertEqual(status.HTTP_405_METHOD_NOT_ALLOWED, response.status_code)
+        self.assertEqual('GET, POST', response['Allow'])
+
+    async def test_async_view_through_async_handler(self):
+        """
+        A method to test serving an async view through the async request handler that runs under ASGI.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        response = await AsyncClient().get(endpoint, AUTHORIZATION = self.auth_headers['HTTP_AUTHORIZATION'])
+
+        response_dict = json.loads(response.content)
+
+        expected_messages = MessageSerializer(self.message_objects, many=True).data
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(expected_messages, response_dict['messages'])
+
+    def tearDown(self):
+        """
+        A method to delete the media created by the factories after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
@@ -0,0 +1,132 @@
+import json
+import shutil
+from unittest import mock
+from django.urls import reverse
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from cable_api.authentication import LocalUserCache, SharedUserCache, get_user_cache
+from cable_api.factory import UserFactory
+from cable_api.tests.test_helpers import get_auth_headers
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestCachedJWTAuthentication(APITestCase):
+    """
+    A class to test authenticating requests through the cache of users.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create()
+        self.auth_headers = get_auth_headers(self.client, self.auth_user)
+
+    def test_authentication_caches_user(self):
+        """
+        A method to test that only the first request authenticated as a user loads it from the database.
+        """
+        endpoint = reverse('user', kwargs={'user_id': self.auth_user.id})
+
+        # One query to authenticate the user and one to update and return the user.
+        with self.assertNumQueries(2):
+
+            self.client.patch(endpoint, {'user_name': 'first'}, format='multipart', **self.auth_headers)
+
+        self.assertEqual(None, get_user_cache().get(self.auth_user.id))
+
+        with self.assertNumQueries(2):
+
+            self.client.patch(endpoint, {'user_name': 'second'}, format='multipart', **self.auth_headers)
+
+        endpoint = reverse('chats')
+
+        with self.assertNumQueries(2):
+
+            self.client.get(endpoint, **self.auth_headers)
+
+        with self.assertNumQueries(1):
+
+            response = self.client.get(endpoint, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertEqual('second', get_user_cache().get(self.auth_user.id).user_name)
+
+    def test_authentication_after_user_DELETE(self):
+        """
+        A method to test that a deleted user is removed from the cache and can no longer authenticate.
+        """
+        self.client.get(reverse('chats'), **self.auth_headers)
+
+        response = self.client.delete(reverse('user', kwargs={'user_id': self.auth_user.id}), **self.auth_headers)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        response = self.client.get(reverse('chats'), **self.auth_headers)
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+        self.assertEqual('user_not_found', json.loads(response.content)['code'])
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
+
+@override_settings(USER_CACHE_TIMEOUT = 10, USER_CACHE_MAX_SIZE = 2)
+class TestLocalUserCache(SimpleTestCase):
+    """
+    A class to test the in process cache of users.
+    """
+    def test_local_user_cache_evicts_least_recently_used(self):
+        """
+        A method to test that the cache evicts the least recently used user once it is full and returns copies of the users it holds.
+        """
+        user_cache = LocalUserCache()
+
+        for user_id in [1, 2]:
+
+            user_cache.set(user_id, UserFactory.build(id = user_id))
+
+        user_cache.get(1)
+        user_cache.set(3, UserFactory.build(id = 3))
+
+        self.assertEqual(None, user_cache.get(2))
+        self.assertEqual([1, 3], [user_cache.get(user_id).id for user_id in [1, 3]])
+        self.assertIsNot(user_cache.get(1), user_cache.get(1))
+
+    def test_local_user_cache_expires_users(self):
+        """
+        A method to test that cached users expire after the timeout.
+        """
+        user_cache = LocalUserCache()
+
+        with mock.patch('cable_api.authentication.time.monotonic', return_value=100):
+
+            user_cache.set(1, UserFactory.build(id = 1))
+
+        with mock.patch('cable_api.authentication.time.monotonic', return_value=105):
+
+            self.assertEqual(1, user_cache.get(1).id)
+
+        with mock.patch('cable_api.authentication.time.monotonic', return_value=111):
+
+            self.assertEqual(None, user_cache.get(1))
+
+@override_settings(USER_CACHE_ALIAS = 'default', CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestSharedUserCache(SimpleTestCase):
+    """
+    A class to test the cache of users shared through the Django cache.
+    """
+    def test_shared_user_cache(self):
+        """
+        A method to test setting, getting and deleting users in the shared cache.
+        """
+        user_cache = SharedUserCache()
+
+        user_cache.set(1, UserFactory.build(id = 1, user_name = 'cached'))
+
+        self.assertEqual('cached', user_cache.get(1).user_name)
+
+        user_cache.delete(1)
+
+        self.assertEqual(None, user_cache.get(1))
@@ -0,0 +1,167 @@
+from unittest import mock
+from psycopg2 import extensions
+from django.db import OperationalError
+from django.test import SimpleTestCase
+from cable_api.backends.postgresql_pool.base import DatabaseWrapper, pools
+from cable_api.backends.postgresql_pool.pool import ConnectionPool
+
+class FakeConnection:
+    """
+    A class that stands in for a database connection in the tests of the connection pool.
+    """
+    def __init__(self):
+        """
+        A method that creates an open connection.
+        """
+        self.closed = False
+
+    def close(self):
+        """
+        A method that closes the connection.
+        """
+        self.closed = True
+
+class TestConnectionPool(SimpleTestCase):
+    """
+    A class to test the pool of database connections.
+    """
+    def test_connection_pool_reuses_connections(self):
+        """
+        A method to test that returned connections are lent out again and that broken or unusable ones are replaced.
+        """
+        pool = ConnectionPool(max_size = 2)
+
+        connection = pool.getconn(FakeConnection)
+
+        pool.putconn(connection)
+
+        self.assertIs(connection, pool.getconn(FakeConnection))
+
+        pool.putconn(connection, reusable = False)
+
+        new_connection = pool.getconn(FakeConnection)
+
+        self.assertTrue(connection.closed)
+        self.assertIsNot(connection, new_connection)
+
+        new_connection.close()
+
+        pool.putconn(new_connection)
+
+        self.assertIsNot(new_connection, pool.getconn(FakeConnection))
+
+    def test_connection_pool_max_idle(self):
+        """
+        A method to test that connections idle for longer than max_idle are closed instead of being lent out.
+        """
+        pool = ConnectionPool(max_idle = 10)
+
+        with mock.patch('cable_api.backends.postgresql_pool.pool.time.monotonic', return_value=100):
+
+            connection = pool.getconn(FakeConnection)
+
+            pool.putconn(connection)
+
+        with mock.patch('cable_api.backends.postgresql_pool.pool.time.monotonic', return_value=111):
+
+            self.assertIsNot(connection, pool.getconn(FakeConnection))
+
+        self.assertTrue(connection.closed)
+
+    def test_connection_pool_timeout(self):
+        """
+        A method to test that threads wait for a connection for at most the timeout once every connection is lent out.
+        """
+        pool = ConnectionPool(max_size = 1, timeout = 0.01)
+
+        connection = pool.getconn(FakeConnection)
+
+        with self.assertRaises(OperationalError):
+
+            pool.getconn(FakeConnection)
+
+        pool.putconn(connection)
+
+        self.assertIs(connection, pool.getconn(FakeConnection))
+
+class TestPostgreSQLPoolBackend(SimpleTestCase):
+    """
+    A class to test the PostgreSQL backend that takes its connections from a pool.
+    """
+    def get_settings_dict(self):
+        """
+        A method to build the settings of a database using the pooling backend.
+        """
+        return {
+            'ENGINE': 'cable_api.backends.postgresql_pool',
+            'NAME': 'cable',
+            'USER': 'cable',
+            'PASSWORD': '',
+            'HOST': '',
+            'PORT': '',
+            'OPTIONS': {'pool': {'max_size': 2, 'timeout': 1}},
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False,
+            'AUTOCOMMIT': True,
+            'ATOMIC_REQUESTS': False,
+            'TIME_ZONE': None,
+            'TEST': {},
+        }
+
+    def get_connection(self):
+        """
+        A method to build a mock psycopg2 connection that is idle outside of transactions.
+        """
+        connection = mock.MagicMock(closed = False, isolation_level = None, server_version = 140000)
+        connection.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+        connection.get_parameter_status.return_value = 'UTC'
+
+        return connection
+
+    @mock.patch('psycopg2.extras.register_default_jsonb')
+    @mock.patch('psycopg2.connect')
+    def test_backend_returns_connections_to_pool(self, connect, register_default_jsonb):
+        """
+        A method to test that connections closed by one database wrapper are reused by the next one, without the pool options reaching psycopg2.
+        """
+        connect.side_effect = lambda **kwargs: self.get_connection()
+
+        first_wrapper = DatabaseWrapper(self.get_settings_dict(), alias = 'pool_test')
+        first_wrapper.connect()
+
+        connection = first_wrapper.connection
+
+        first_wrapper.close()
+
+        second_wrapper = DatabaseWrapper(self.get_settings_dict(), alias = 'pool_test')
+        second_wrapper.connect()
+
+        self.assertIs(connection, second_wrapper.connection)
+        self.assertEqual(1, connect.call_count)
+        self.assertNotIn('pool', connect.call_args.kwargs)
+        connection.close.assert_not_called()
+
+        # A connection left inside a transaction is rolled back before it goes back to the pool.
+        connection.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_INTRANS
+
+        second_wrapper.close()
+
+        connection.rollback.assert_called_once()
+
+        # A broken connection is closed instead.
+        third_wrapper = DatabaseWrapper(self.get_settings_dict(), alias = 'pool_test')
+        third_wrapper.connect()
+
+        connection.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_UNKNOWN
+
+        third_wrapper.close()
+
+        connection.close.assert_called_once()
+
+    def tearDown(self):
+        """
+        A method to remove the pools created by the tests.
+        """
+        for key in [key for key in pools if key[0] == 'pool_test']:
+
+            pools.pop(key).close()
@@ -1,12 +1,22 @@
+import csv
+import gzip
+import io
 import json
 import shutil
+from datetime import timedelta
+from unittest import mock
+from asgiref.testing import ApplicationCommunicator
+from django.core.management import call_command
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from cable.asgi import application
 from django.test import override_settings
-from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory
-from cable_api.serializers import ChatSerializer
-from cable_api.models import Chat, Participant
+from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory, MessageFactory
+from cable_api.serializers import ChatSerializer, MessageSerializer
+from cable_api.models import Chat, Participant, Message, ArchivedMessage, direct_chat_key
 from cable_api.tests.test_helpers import get_auth_headers
 
 @override_settings(MEDIA_ROOT = 'cable_api/tests/media')
@@ -48,6 +58,8 @@ class TestChatsView(APITestCase):
                 'user_name': self.auth_user.user_name,
                 'email_address': self.auth_user.email_address,
                 'profile_image': self.auth_user.profile_image.url,
+                'profile_thumbnail_webp': None,
+                'profile_thumbnail_jpeg': None,
             }
 
             participant_two = {
@@ -55,6 +67,8 @@ class TestChatsView(APITestCase):
                 'user_name': self.user_objects[index].user_name,
                 'email_address': self.user_objects[index].email_address,
                 'profile_image': self.user_objects[index].profile_image.url,
+                'profile_thumbnail_webp': None,
+                'profile_thumbnail_jpeg': None,
             }
 
             participants = [{'model_user': participant_one}, {'model_user': participant_two}]      
@@ -62,18 +76,93 @@ class TestChatsView(APITestCase):
             chat = {
                 'id': self.chat_objects[index].id,
                 'display_name': self.chat_objects[index].display_name,
-                'participants': participants
+                'participants': participants,
+                'last_message': None,
+                'last_activity': self.chat_objects[index].last_activity.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                'unread_count': 0
             }
 
-            chats.append(chat)
+            chats.insert(0, chat)
 
-        expected_response = {'chats': chats}
+        expected_response = {'chats': chats, 'next': None, 'previous': None}
 
         response = self.client.get(endpoint, **self.auth_headers)
 
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
 
+    def test_chats_view_GET_query_count(self):
+        """
+        A method to test that the GET method of the "api/chats/" endpoint runs the same number of queries however many chats and participants there are.
+        """ 
+        endpoint = reverse('chats')
+
+        for user in self.user_factory.create_batch(5):
+
+            self.participant_factory(model_user = user, chat = self.chat_objects[0])
+
+        # One query to authenticate the user, one for the chats and one for their participants and users.
+        with self.assertNumQueries(3):
+
+            response = self.client.get(endpoint, **self.auth_headers)
+
+        chats = {chat['id']: chat for chat in json.loads(response.content)['chats']}
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(7, len(chats[self.chat_objects[0].id]['participants']))
+
+    def test_chats_view_GET_ordered_by_activity(self):
+        """
+        A method to test that the GET method of the "api/chats/" endpoint orders chats by their last activity and includes their last message.
+        """ 
+        endpoint = reverse('chats')
+
+        messages_endpoint = reverse('messages', kwargs={'chat_id': self.chat_objects[0].id})
+
+        self.client.post(messages_endpoint, {'content': 'first message'}, **self.auth_headers)
+
+        response = self.client.post(messages_endpoint, {'content': 'last message'}, **self.auth_headers)
+
+        last_message = json.loads(response.content)['new_message']
+
+        response = self.client.get(endpoint, **self.auth_headers)
+
+        chats = json.loads(response.content)['chats']
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(self.chat_objects[0].id, chats[0]['id'])
+        self.assertEqual(last_message, chats[0]['last_message'])
+
+        message_endpoint = reverse('message', kwargs={'chat_id': self.chat_objects[0].id, 'message_id': last_message['id']})
+
+        self.client.delete(message_endpoint, **self.auth_headers)
+
+        response = self.client.get(endpoint, **self.auth_headers)
+
+        chats = json.loads(response.content)['chats']
+
+        self.assertEqual(self.chat_objects[0].id, chats[0]['id'])
+        self.assertEqual('first message', chats[0]['last_message']['content'])
+
+    def test_chats_view_GET_paginated(self):
+        """
+        A method to test paging through the GET method of the "api/chats/" endpoint.
+        """ 
+        endpoint = reverse('chats')
+
+        response = self.client.get(endpoint, {'limit': 3}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([chat.id for chat in self.chat_objects[:1:-1]], [chat['id'] for chat in response_dict['chats']])
+
+        response = self.client.get(endpoint, {'limit': 3, 'after': response_dict['next']}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([chat.id for chat in self.chat_objects[1::-1]], [chat['id'] for chat in response_dict['chats']])
+        self.assertEqual(None, response_dict['next'])
+
     def test_chats_view_POST(self):
         """
         A method to test the POST method of the "api/chats/" endpoint.
@@ -89,12 +178,58 @@ class TestChatsView(APITestCase):
 
         new_chat = Chat.objects.filter(display_name = 'test_chat').first()
 
-        chat_serializer = ChatSerializer(new_chat)
+        chat_serializer = ChatSerializer(new_chat, context={'user': self.auth_user})
+
+        expected_response = {'new_chat': chat_serializer.data}
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+
+    def test_chats_view_POST_group_chat(self):
+        """
+        A method to test the POST method of the "api/chats/" endpoint with a list of emails to create a group chat.
+        """ 
+        endpoint = reverse('chats')
+
+        request_dict = {
+            'display_name': 'test_group',
+            'email_addresses': [user.email_address for user in self.user_objects[:3]]
+        }
+
+        # One query to authenticate the user, one for the users, the savepoint around the chat and its participants, one for the participants to serialize and one for the participants to notify.
+        with self.assertNumQueries(8):
+
+            response = self.client.post(endpoint, request_dict, format='json', **self.auth_headers)
+
+        new_chat = Chat.objects.get(display_name = 'test_group')
+
+        chat_serializer = ChatSerializer(Chat.objects.with_related().get(id = new_chat.id), context={'user': self.auth_user})
 
         expected_response = {'new_chat': chat_serializer.data}
 
         self.assertEqual(status.HTTP_201_CREATED, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
+        self.assertEqual([self.auth_user.id] + [user.id for user in self.user_objects[:3]], [participant['model_user']['id'] for participant in expected_response['new_chat']['participants']])
+        self.assertEqual(None, new_chat.direct_key)
+
+    def test_chats_view_POST_group_chat_missing_user(self):
+        """
+        A method to test the POST method of the "api/chats/" endpoint with a list of emails that includes one with no user, which must not create a chat.
+        """ 
+        endpoint = reverse('chats')
+
+        request_dict = {
+            'display_name': 'test_group',
+            'email_addresses': [self.user_objects[0].email_address, 'missing@test.com']
+        }
+
+        response = self.client.post(endpoint, request_dict, format='json', **self.auth_headers)
+
+        expected_response = {'detail': 'These objects do not exist.'}
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+        self.assertFalse(Chat.objects.filter(display_name = 'test_group').exists())
 
     def test_chats_view_POST_same_email_as_auth_user(self):
         """
@@ -120,7 +255,7 @@ class TestChatsView(APITestCase):
         """ 
         endpoint = reverse('chats')
 
-        chat_object = self.chat_factory.create()
+        chat_object = self.chat_factory.create(direct_key = direct_chat_key(self.test_user.id, self.auth_user.id))
 
         self.participant_factory(model_user = self.auth_user, chat = chat_object)
         self.participant_factory(model_user = self.test_user, chat = chat_object)
@@ -136,6 +271,31 @@ class TestChatsView(APITestCase):
 
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
+
+    def test_chats_view_POST_concurrent_duplicate(self):
+        """
+        A method to test that a POST to the "api/chats/" endpoint racing another request for the same pair of users returns the chat the other request created instead of creating a second one.
+        """
+        endpoint = reverse('chats')
+
+        request_dict = {
+            'display_name': 'test_chat',
+            'email_address': self.test_user.email_address
+        }
+
+        existing_chat = json.loads(self.client.post(endpoint, request_dict, **self.auth_headers).content)['new_chat']
+
+        # Skipping the existence check lets the second request reach the insert, as it would if both checks ran before either insert.
+        with mock.patch('cable_api.views.chat_views.check_chat_exists'):
+
+            response = self.client.post(endpoint, request_dict, **self.auth_headers)
+
+        expected_response = {'new_chat': existing_chat}
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+        self.assertEqual(1, Chat.objects.filter(direct_key = direct_chat_key(self.auth_user.id, self.test_user.id)).count())
+        self.assertEqual(1, Chat.objects.filter(display_name = 'test_chat').count())
     
     def tearDown(self):
         """
@@ -229,6 +389,8 @@ class TestChatView(APITestCase):
             'user_name': self.auth_user.user_name,
             'email_address': self.auth_user.email_address,
             'profile_image': self.auth_user.profile_image.url,
+            'profile_thumbnail_webp': None,
+            'profile_thumbnail_jpeg': None,
             }
 
         participant_two = {
@@ -236,6 +398,8 @@ class TestChatView(APITestCase):
             'user_name': self.test_user.user_name,
             'email_address': self.test_user.email_address,
             'profile_image': self.test_user.profile_image.url,
+            'profile_thumbnail_webp': None,
+            'profile_thumbnail_jpeg': None,
         }
 
         participants = [{'model_user': participant_one}, {'model_user': participant_two}]      
@@ -243,7 +407,10 @@ class TestChatView(APITestCase):
         chat_dict = {
             'id': self.chat_object.id,
             'display_name': self.chat_object.display_name,
-            'participants': participants
+            'participants': participants,
+            'last_message': None,
+            'last_activity': self.chat_object.last_activity.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            'unread_count': 0
         }
 
         expected_response = {'chat': chat_dict}
@@ -253,6 +420,24 @@ class TestChatView(APITestCase):
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
 
+    def test_chat_view_GET_query_count(self):
+        """
+        A method to test that the GET method of the "api/chats/chat_id/" endpoint runs the same number of queries however many participants there are.
+        """
+        endpoint = reverse('chat', kwargs={'chat_id': self.chat_object.id})
+
+        for user in self.user_factory.create_batch(5):
+
+            self.participant_factory(model_user = user, chat = self.chat_object)
+
+        # One query to authenticate the user, one for the chat along with the membership of the user and one for its participants.
+        with self.assertNumQueries(3):
+
+            response = self.client.get(endpoint, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(7, len(json.loads(response.content)['chat']['participants']))
+
     def test_chat_view_PATCH(self):
         """
         A method to test the PATCH method of the "api/chats/chat_id/" endpoint.
@@ -268,6 +453,8 @@ class TestChatView(APITestCase):
                 'user_name': self.auth_user.user_name,
                 'email_address': self.auth_user.email_address,
                 'profile_image': self.auth_user.profile_image.url,
+                'profile_thumbnail_webp': None,
+                'profile_thumbnail_jpeg': None,
             }
 
         participant_two = {
@@ -275,6 +462,8 @@ class TestChatView(APITestCase):
             'user_name': self.test_user.user_name,
             'email_address': self.test_user.email_address,
             'profile_image': self.test_user.profile_image.url,
+            'profile_thumbnail_webp': None,
+            'profile_thumbnail_jpeg': None,
         }
 
         participants = [{'model_user': participant_one}, {'model_user': participant_two}]      
@@ -282,7 +471,10 @@ class TestChatView(APITestCase):
         chat_dict = {
             'id': self.chat_object.id,
             'display_name': 'updated_name',
-            'participants': participants
+            'participants': participants,
+            'last_message': None,
+            'last_activity': self.chat_object.last_activity.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            'unread_count': 0
         }
  
         expected_response = {'updated_chat': chat_dict}
@@ -292,6 +484,119 @@ class TestChatView(APITestCase):
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
 
+    def test_chat_view_PATCH_query_count(self):
+        """
+        A method to test the number of queries run by the PATCH method of the "api/chats/chat_id/" endpoint and that it moves the modification date of the chat.
+        """
+        endpoint = reverse('chat', kwargs={'chat_id': self.chat_object.id})
+
+        # One query to authenticate the user, one to update and return the chat and one for its participants.
+        with self.assertNumQueries(3):
+
+            response = self.client.patch(endpoint, {'display_name': 'updated_name'}, format='multipart', **self.auth_headers)
+
+        updated_chat = Chat.objects.get(id = self.chat_object.id)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('updated_name', updated_chat.display_name)
+        self.assertLess(self.chat_object.date_modified, updated_chat.date_modified)
+
+    def test_chat_view_GET_unread_count(self):
+        """
+        A method to test that the unread count returned by the GET method of the "api/chats/chat_id/" endpoint follows the messages sent and deleted in the chat.
+        """
+        endpoint = reverse('chat', kwargs={'chat_id': self.chat_object.id})
+
+        messages_endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        test_user_headers = get_auth_headers(self.client, self.test_user)
+
+        message_ids = [json.loads(self.client.post(messages_endpoint, {'content': 'test message'}, **self.auth_headers).content)['new_message']['id'] for index in range(3)]
+
+        response = self.client.get(endpoint, **test_user_headers)
+
+        self.assertEqual(3, json.loads(response.content)['chat']['unread_count'])
+
+        response = self.client.get(endpoint, **self.auth_headers)
+
+        self.assertEqual(0, json.loads(response.content)['chat']['unread_count'])
+
+        message_endpoint = reverse('message', kwargs={'chat_id': self.chat_object.id, 'message_id': message_ids[0]})
+
+        self.client.delete(message_endpoint, **self.auth_headers)
+
+        response = self.client.get(endpoint, **test_user_headers)
+
+        self.assertEqual(2, json.loads(response.content)['chat']['unread_count'])
+
+    def test_chat_read_view_POST(self):
+        """
+        A method to test the POST method of the "api/chats/chat_id/read/" endpoint.
+        """
+        endpoint = reverse('chat_read', kwargs={'chat_id': self.chat_object.id})
+
+        messages_endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        test_user_headers = get_auth_headers(self.client, self.test_user)
+
+        message_ids = [json.loads(self.client.post(messages_endpoint, {'content': 'test message'}, **self.auth_headers).content)['new_message']['id'] for index in range(3)]
+
+        expected_response = {'read_position': {'last_read_id': message_ids[1], 'unread_count': 1}}
+
+        response = self.client.post(endpoint, {'last_read_id': message_ids[1]}, **test_user_headers)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+
+        response = self.client.post(endpoint, {'last_read_id': message_ids[0]}, **test_user_headers)
+
+        self.assertEqual(expected_response, json.loads(response.content))
+
+    def test_chat_read_view_POST_archived_message(self):
+        """
+        A method to test the POST method of the "api/chats/chat_id/read/" endpoint with a message that has been archived.
+        """
+        endpoint = reverse('chat_read', kwargs={'chat_id': self.chat_object.id})
+
+        messages_endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        test_user_headers = get_auth_headers(self.client, self.test_user)
+
+        message_ids = [json.loads(self.client.post(messages_endpoint, {'content': 'test message'}, **self.auth_headers).content)['new_message']['id'] for index in range(3)]
+
+        Message.objects.filter(id = message_ids[0]).update(date_created = timezone.now() - timedelta(days=400))
+
+        call_command('archive_messages', '--days', '365', stdout=io.StringIO())
+
+        expected_response = {'read_position': {'last_read_id': message_ids[0], 'unread_count': 2}}
+
+        response = self.client.post(endpoint, {'last_read_id': message_ids[0]}, **test_user_headers)
+
+        self.assertTrue(ArchivedMessage.objects.filter(id = message_ids[0]).exists())
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+
+    def test_chat_read_view_POST_message_from_another_chat(self):
+        """
+        A method to test the POST method of the "api/chats/chat_id/read/" endpoint with a message that does not belong to the chat.
+        """
+        endpoint = reverse('chat_read', kwargs={'chat_id': self.chat_object.id})
+
+        other_chat = self.chat_factory.create()
+
+        self.participant_factory(model_user = self.auth_user, chat = other_chat)
+
+        messages_endpoint = reverse('messages', kwargs={'chat_id': other_chat.id})
+
+        message_id = json.loads(self.client.post(messages_endpoint, {'content': 'test message'}, **self.auth_headers).content)['new_message']['id']
+
+        expected_response = {'detail': 'This object does not exist.'}
+
+        response = self.client.post(endpoint, {'last_read_id': message_id}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+
     def test_user_view_DELETE(self):
         """
         A method to test the DELETE method of the "api/chats/chat_id/" endpoint.
@@ -322,6 +627,145 @@ class TestChatView(APITestCase):
 
         shutil.rmtree('cable_api/tests/media')
 
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media', EXPORT_CHUNK_SIZE = 2)
+class TestChatExportView(APITestCase):
+    """
+    A class to test the "api/chats/chat_id/export/" endpoint.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create()
+        self.outside_user = UserFactory.create()
+        self.chat_object = ChatFactory.create()
+        ParticipantFactory(model_user = self.auth_user, chat = self.chat_object)
+        self.message_objects = MessageFactory.create_batch(5, sender = self.auth_user, chat = self.chat_object)
+        self.auth_headers = get_auth_headers(self.client, self.auth_user)
+        self.maxDiff = None
+
+    def test_chat_export_view_GET_ndjson(self):
+        """
+        A method to test exporting a chat as newline delimited json through the GET method of the "api/chats/chat_id/export/" endpoint.
+        """
+        endpoint = reverse('chat_export', kwargs={'chat_id': self.chat_object.id})
+
+        expected_messages = MessageSerializer(self.message_objects, many=True).data
+
+        response = self.client.get(endpoint, **self.auth_headers)
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+        self.assertEqual(f'attachment; filename="chat_{self.chat_object.id}.ndjson"', response['Content-Disposition'])
+        self.assertEqual(expected_messages, [json.loads(line) for line in lines])
+
+    def test_chat_export_view_GET_csv_gzip(self):
+        """
+        A method to test exporting a chat as gzip compressed csv through the GET method of the "api/chats/chat_id/export/" endpoint.
+        """
+        endpoint = reverse('chat_export', kwargs={'chat_id': self.chat_object.id})
+
+        expected_rows = [['id', 'content', 'sender', 'chat', 'date_created']]
+
+        for message in MessageSerializer(self.message_objects, many=True).data:
+
+            expected_rows.append([str(message[field]) for field in expected_rows[0]])
+
+        response = self.client.get(endpoint, {'export_format': 'csv'}, HTTP_ACCEPT_ENCODING = 'gzip, deflate', **self.auth_headers)
+
+        content = gzip.decompress(b''.join(response.streaming_content)).decode()
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertEqual(expected_rows, list(csv.reader(io.StringIO(content))))
+
+    def test_chat_export_view_GET_invalid_format(self):
+        """
+        A method to test the GET method of the "api/chats/chat_id/export/" endpoint with an unknown export format.
+        """
+        endpoint = reverse('chat_export', kwargs={'chat_id': self.chat_object.id})
+
+        expected_response = {'detail': 'Invalid export format.'}
+
+        response = self.client.get(endpoint, {'export_format': 'xml'}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+
+    def test_chat_export_view_GET_unauthorized_user(self):
+        """
+        A method to test the GET method of the "api/chats/chat_id/export/" endpoint on a chat the user does not participate in.
+        """
+        endpoint = reverse('chat_export', kwargs={'chat_id': self.chat_object.id})
+
+        expected_response = {'detail': 'Unauthorized to use this method on this endpoint or object.'}
+
+        response = self.client.get(endpoint, **get_auth_headers(self.client, self.outside_user))
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media', EXPORT_CHUNK_SIZE = 2)
+class TestChatExportViewASGI(APITransactionTestCase):
+    """
+    A class to test the "api/chats/chat_id/export/" endpoint served by the ASGI application, which sends the export from the event loop.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create()
+        self.chat_object = ChatFactory.create()
+        ParticipantFactory(model_user = self.auth_user, chat = self.chat_object)
+        self.message_objects = MessageFactory.create_batch(5, sender = self.auth_user, chat = self.chat_object)
+        self.maxDiff = None
+
+    async def test_chat_export_view_GET_ndjson(self):
+        """
+        A method to test exporting a chat as newline delimited json through the GET method of the "api/chats/chat_id/export/" endpoint of the ASGI application.
+        """
+        endpoint = reverse('chat_export', kwargs={'chat_id': self.chat_object.id})
+
+        headers = [(b'host', b'testserver'), (b'authorization', f'Bearer {AccessToken.for_user(self.auth_user)}'.encode())]
+
+        scope = {'type': 'http', 'method': 'GET', 'path': endpoint, 'query_string': b'', 'headers': headers}
+
+        communicator = ApplicationCommunicator(application, scope)
+
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+
+        start = await communicator.receive_output()
+
+        body = b''
+        output = {'more_body': True}
+
+        while output.get('more_body'):
+
+            output = await communicator.receive_output()
+
+            body += output.get('body', b'')
+
+        await communicator.wait()
+
+        expected_messages = MessageSerializer(self.message_objects, many=True).data
+
+        self.assertEqual(status.HTTP_200_OK, start['status'])
+        self.assertEqual(expected_messages, [json.loads(line) for line in body.decode().splitlines()])
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
+
 @override_settings(MEDIA_ROOT = 'cable_api/tests/media')
 class TestChatWhenObjectsDontExist(APITestCase):
     """
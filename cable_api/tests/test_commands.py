@@ -0,0 +1,143 @@
+import os
+import shutil
+from io import StringIO
+from datetime import timedelta
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory, MessageFactory
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from cable_api.models import Chat, Message, ArchivedMessage
+from cable_api.serializers import MessageSerializer
+from cable_api.storage import ContentAddressedStorage
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestArchiveMessagesCommand(TestCase):
+    """
+    A class to test the "archive_messages" management command.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create()
+        self.chat_object = ChatFactory.create()
+        ParticipantFactory(model_user = self.auth_user, chat = self.chat_object)
+        self.message_objects = MessageFactory.create_batch(4, sender = self.auth_user, chat = self.chat_object)
+        self.maxDiff = None
+
+        old_messages = Message.objects.filter(id__in = [message.id for message in self.message_objects[:3]])
+
+        old_messages.update(date_created = timezone.now() - timedelta(days=400))
+
+        # The last message of the chat is old as well but has to stay live.
+        Chat.objects.filter(id = self.chat_object.id).update(last_message = self.message_objects[2])
+
+    def test_archive_messages(self):
+        """
+        A method to test that the command moves old messages into the archive, compressed, except the last message of their chat.
+        """
+        expected_data = MessageSerializer(Message.objects.filter(id__in = [message.id for message in self.message_objects[:2]]), many=True).data
+
+        output = StringIO()
+
+        call_command('archive_messages', '--days', '365', '--batch-size', '1', stdout=output)
+
+        archived_messages = ArchivedMessage.objects.order_by('id')
+
+        self.assertIn('Archived 2 messages', output.getvalue())
+        self.assertEqual([message.id for message in self.message_objects[2:]], list(Message.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual(expected_data, MessageSerializer(archived_messages, many=True).data)
+        self.assertNotEqual(self.message_objects[0].content.encode(), bytes(archived_messages[0].compressed_content))
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
+
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestGenerateProfileThumbnailsCommand(TestCase):
+    """
+    A class to test the "generate_profile_thumbnails" management command.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.user_objects = UserFactory.create_batch(2)
+        self.imageless_user = UserFactory.create(profile_image = None)
+
+    def test_generate_profile_thumbnails(self):
+        """
+        A method to test that the command generates the missing thumbnails of every profile image and skips users without one.
+        """
+        output = StringIO()
+
+        call_command('generate_profile_thumbnails', stdout=output)
+
+        users = get_user_model().objects.order_by('id')
+
+        self.assertIn('Generated the thumbnails of 2 profile images.', output.getvalue())
+        self.assertTrue(all(user.profile_thumbnail_webp and user.profile_thumbnail_jpeg for user in users[:2]))
+        self.assertFalse(users[2].profile_thumbnail_webp)
+
+        output = StringIO()
+
+        call_command('generate_profile_thumbnails', stdout=output)
+
+        self.assertIn('Generated the thumbnails of 0 profile images.', output.getvalue())
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestCollectUnusedMediaCommand(TestCase):
+    """
+    A class to test the "collect_unused_media" management command.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.storage = ContentAddressedStorage()
+        self.user_object = UserFactory.create()
+        self.old_name = self.storage.save('old.txt', ContentFile(b'old content'))
+        self.new_name = self.storage.save('new.txt', ContentFile(b'new content'))
+
+        two_days_ago = timezone.now().timestamp() - 2 * 24 * 60 * 60
+
+        for name in [self.user_object.profile_image.name, self.old_name]:
+
+            os.utime(self.storage.path(name), (two_days_ago, two_days_ago))
+
+    def test_collect_unused_media(self):
+        """
+        A method to test that the command deletes unreferenced files older than the grace period and keeps referenced and recent ones.
+        """
+        output = StringIO()
+
+        call_command('collect_unused_media', '--dry-run', stdout=output)
+
+        self.assertIn(f'Would delete {self.old_name}', output.getvalue())
+        self.assertTrue(self.storage.exists(self.old_name))
+
+        output = StringIO()
+
+        call_command('collect_unused_media', stdout=output)
+
+        self.assertIn('Deleted 1 unused media files.', output.getvalue())
+        self.assertFalse(self.storage.exists(self.old_name))
+        self.assertTrue(self.storage.exists(self.new_name))
+        self.assertTrue(self.storage.exists(self.user_object.profile_image.name))
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
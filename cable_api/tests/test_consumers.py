@@ -0,0 +1,307 @@
+import json
+import shutil
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.urls import reverse
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from cable.asgi import application
+from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory, MessageFactory
+from cable_api.models import Message
+from cable_api.pagination import encode_cursor
+from cable_api.serializers import MessageSerializer
+from cable_api.tests.test_helpers import get_auth_headers
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestChatEventsSocket(APITransactionTestCase):
+    """
+    A class to test the "ws/chats/" websocket endpoint.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create()
+        self.test_user = UserFactory.create()
+        self.outside_user = UserFactory.create()
+        self.chat_object = ChatFactory.create()
+        ParticipantFactory(model_user = self.auth_user, chat = self.chat_object)
+        ParticipantFactory(model_user = self.test_user, chat = self.chat_object)
+        self.auth_headers = get_auth_headers(self.client, self.auth_user)
+        self.maxDiff = None
+
+    def get_scope(self, token):
+        """
+        A method to build the scope of a websocket connection to the "ws/chats/" endpoint.
+        """
+        return {'type': 'websocket', 'path': '/ws/chats/', 'query_string': f'token={token}'.encode(), 'headers': []}
+
+    async def connect(self, user):
+        """
+        A method to open an accepted websocket connection to the "ws/chats/" endpoint for a user.
+        """
+        communicator = ApplicationCommunicator(application, self.get_scope(AccessToken.for_user(user)))
+
+        await communicator.send_input({'type': 'websocket.connect'})
+
+        self.assertEqual({'type': 'websocket.accept'}, await communicator.receive_output())
+
+        return communicator
+
+    async def test_chat_events_socket_message_created(self):
+        """
+        A method to test that a message posted to a chat is pushed to the participants of the chat and nobody else.
+        """
+        participant_communicator = await self.connect(self.test_user)
+        outside_communicator = await self.connect(self.outside_user)
+
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        response = await sync_to_async(self.client.post)(endpoint, {'content': 'test message'}, **self.auth_headers)
+
+        new_message = await Message.objects.filter(content = 'test message').afirst()
+
+        expected_event = {
+            'id': encode_cursor([new_message.date_modified, 1, new_message.id]),
+            'type': 'message.created',
+            'data': MessageSerializer(new_message).data
+        }
+
+        output = await participant_communicator.receive_output()
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual('websocket.send', output['type'])
+        self.assertEqual(expected_event, json.loads(output['text']))
+        self.assertTrue(await outside_communicator.receive_nothing())
+
+        for communicator in [participant_communicator, outside_communicator]:
+
+            await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await communicator.wait()
+
+    async def test_chat_events_socket_invalid_token(self):
+        """
+        A method to test that a websocket connection with an invalid access token is closed.
+        """
+        communicator = ApplicationCommunicator(application, self.get_scope('invalid'))
+
+        await communicator.send_input({'type': 'websocket.connect'})
+
+        self.assertEqual({'type': 'websocket.close', 'code': 4001}, await communicator.receive_output())
+
+        await communicator.wait()
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestChatEventsStream(APITransactionTestCase):
+    """
+    A class to test the "api/chats/stream/" server-sent events endpoint.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create()
+        self.test_user = UserFactory.create()
+        self.chat_object = ChatFactory.create()
+        ParticipantFactory(model_user = self.auth_user, chat = self.chat_object)
+        ParticipantFactory(model_user = self.test_user, chat = self.chat_object)
+        self.message_objects = MessageFactory.create_batch(2, sender = self.auth_user, chat = self.chat_object)
+        self.auth_headers = get_auth_headers(self.client, self.auth_user)
+        self.maxDiff = None
+
+    async def open_stream(self, token, headers = []):
+        """
+        A method to open a connection to the "api/chats/stream/" endpoint and return it along with the response start message.
+        """
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/chats/stream/', 'query_string': f'token={token}'.encode(), 'headers': headers}
+
+        communicator = ApplicationCommunicator(application, scope)
+
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+
+        return communicator, await communicator.receive_output()
+
+    async def receive_event(self, communicator):
+        """
+        A method to receive the next server-sent event from a stream and parse it into a dictionary.
+        """
+        output = await communicator.receive_output()
+
+        fields = dict(line.split(': ', 1) for line in output['body'].decode().strip().split('\n'))
+
+        return {'id': fields['id'], 'type': fields['event'], 'data': json.loads(fields['data'])}
+
+    async def close_stream(self, communicator):
+        """
+        A method to disconnect from a stream and wait for it to finish.
+        """
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait()
+
+    async def test_chat_events_stream(self):
+        """
+        A method to test that a message posted to a chat is streamed to the participants of the chat.
+        """
+        communicator, start = await self.open_stream(AccessToken.for_user(self.test_user))
+
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        await sync_to_async(self.client.post)(endpoint, {'content': 'test message'}, **self.auth_headers)
+
+        new_message = await Message.objects.filter(content = 'test message').afirst()
+
+        expected_event = {
+            'id': encode_cursor([new_message.date_modified, 1, new_message.id]),
+            'type': 'message.created',
+            'data': MessageSerializer(new_message).data
+        }
+
+        self.assertEqual(200, start['status'])
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertEqual(expected_event, await self.receive_event(communicator))
+
+        await self.close_stream(communicator)
+
+    @override_settings(SYNC_TOKEN_MARGIN_SECONDS = 0)
+    async def test_chat_events_stream_last_event_id(self):
+        """
+        A method to test that a stream reopened with the id of the last event received in a "Last-Event-ID" header replays only the changes made after that event.
+        """
+        communicator, start = await self.open_stream(AccessToken.for_user(self.test_user))
+
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        await sync_to_async(self.client.post)(endpoint, {'content': 'test message'}, **self.auth_headers)
+
+        last_event = await self.receive_event(communicator)
+
+        await self.close_stream(communicator)
+
+        edited_message, deleted_message = self.message_objects
+
+        message_endpoint = reverse('message', kwargs={'chat_id': self.chat_object.id, 'message_id': edited_message.id})
+
+        await sync_to_async(self.client.patch)(message_endpoint, {'content': 'edited message'}, **self.auth_headers)
+
+        message_endpoint = reverse('message', kwargs={'chat_id': self.chat_object.id, 'message_id': deleted_message.id})
+
+        await sync_to_async(self.client.delete)(message_endpoint, **self.auth_headers)
+
+        communicator, start = await self.open_stream(AccessToken.for_user(self.test_user), [(b'last-event-id', last_event['id'].encode())])
+
+        updated_event = await self.receive_event(communicator)
+        deleted_event = await self.receive_event(communicator)
+
+        self.assertEqual('message.created', last_event['type'])
+        self.assertEqual(200, start['status'])
+        self.assertEqual('message.updated', updated_event['type'])
+        self.assertEqual('edited message', updated_event['data']['content'])
+        self.assertEqual({'type': 'message.deleted', 'data': {'id': deleted_message.id, 'chat': self.chat_object.id}}, {key: deleted_event[key] for key in ['type', 'data']})
+        self.assertTrue(await communicator.receive_nothing())
+
+        await self.close_stream(communicator)
+
+    @override_settings(SYNC_TOKEN_MARGIN_SECONDS = 0)
+    async def test_chat_events_stream_replay_order(self):
+        """
+        A method to test that the events replayed to a stream come in the order of their ids and strictly after the "Last-Event-ID", whatever changed at the same time.
+        """
+        first_message, second_message = self.message_objects
+
+        # Both messages changed at the same time, so only their ids order their events.
+        await Message.objects.filter(chat = self.chat_object).aupdate(date_modified = first_message.date_modified)
+
+        last_event_id = encode_cursor([first_message.date_modified, 1, first_message.id])
+
+        communicator, start = await self.open_stream(AccessToken.for_user(self.test_user), [(b'last-event-id', last_event_id.encode())])
+
+        event = await self.receive_event(communicator)
+
+        self.assertEqual(encode_cursor([first_message.date_modified, 1, second_message.id]), event['id'])
+        self.assertEqual(second_message.id, event['data']['id'])
+        self.assertTrue(await communicator.receive_nothing())
+
+        await self.close_stream(communicator)
+
+    async def test_chat_events_stream_late_commit(self):
+        """
+        A method to test that a stream resumed from the "Last-Event-ID" replays a change stamped before that event whose transaction only committed after it.
+        """
+        first_message, late_message = self.message_objects
+
+        last_event_id = encode_cursor([first_message.date_modified, 1, first_message.id])
+
+        # Stamped before the last event received while committed after it, as a message of a concurrent transaction is.
+        await Message.objects.filter(id = late_message.id).aupdate(date_modified = first_message.date_modified - timedelta(seconds=1))
+
+        communicator, start = await self.open_stream(AccessToken.for_user(self.test_user), [(b'last-event-id', last_event_id.encode())])
+
+        events = []
+
+        while not await communicator.receive_nothing():
+
+            events.append(await self.receive_event(communicator))
+
+        self.assertIn(late_message.id, [event['data']['id'] for event in events if event['type'].startswith('message.')])
+
+        await self.close_stream(communicator)
+
+    @override_settings(EVENT_REPLAY_LIMIT = 1)
+    async def test_chat_events_stream_resync(self):
+        """
+        A method to test that a stream resumed further back than EVENT_REPLAY_LIMIT events is sent a single "resync" event instead of them.
+        """
+        last_event_id = encode_cursor([self.chat_object.date_created, 0, 0])
+
+        communicator, start = await self.open_stream(AccessToken.for_user(self.test_user), [(b'last-event-id', last_event_id.encode())])
+
+        event = await self.receive_event(communicator)
+
+        self.assertEqual(200, start['status'])
+        self.assertEqual({'type': 'resync', 'data': {}}, {key: event[key] for key in ['type', 'data']})
+        self.assertTrue(await communicator.receive_nothing())
+
+        await self.close_stream(communicator)
+
+    async def test_chat_events_stream_invalid_last_event_id(self):
+        """
+        A method to test that a stream opened with a malformed "Last-Event-ID" header is refused.
+        """
+        communicator, start = await self.open_stream(AccessToken.for_user(self.test_user), [(b'last-event-id', b'invalid')])
+
+        output = await communicator.receive_output()
+
+        self.assertEqual(400, start['status'])
+        self.assertEqual({'detail': 'Invalid cursor.'}, json.loads(output['body']))
+
+        await communicator.wait()
+
+    async def test_chat_events_stream_invalid_token(self):
+        """
+        A method to test that a stream opened with an invalid access token is refused.
+        """
+        communicator, start = await self.open_stream('invalid')
+
+        output = await communicator.receive_output()
+
+        expected_response = {'detail': 'Unauthorized to use this method on this endpoint or object.'}
+
+        self.assertEqual(401, start['status'])
+        self.assertEqual(expected_response, json.loads(output['body']))
+
+        await communicator.wait()
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
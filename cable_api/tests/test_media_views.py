@@ -0,0 +1,272 @@
+import os
+import shutil
+import asyncio
+from unittest import mock
+from asgiref.testing import ApplicationCommunicator
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from cable.asgi import application
+from cable_api.storage import ContentAddressedStorage
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media', MEDIA_CACHE_MAX_AGE = 100)
+class TestMediaView(APITestCase):
+    """
+    A class to test the "media/path" endpoint.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.storage = ContentAddressedStorage()
+        self.blob_name = self.storage.save('file.txt', ContentFile(b'test content'))
+        self.file_name = FileSystemStorage().save('users/file.txt', ContentFile(b'test content'))
+
+    def test_media_view_GET_content_addressed(self):
+        """
+        A method to test that files named by their content are served with immutable cache headers.
+        """
+        response = self.client.get(f'/media/{self.blob_name}')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(b'test content', b''.join(response.streaming_content))
+        self.assertEqual('public, max-age=100, immutable', response['Cache-Control'])
+
+    def test_media_view_GET_other_file(self):
+        """
+        A method to test that files stored under other names are served without immutable cache headers.
+        """
+        response = self.client.get(f'/media/{self.file_name}')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertFalse(response.has_header('Cache-Control'))
+
+    def test_media_view_GET_not_modified(self):
+        """
+        A method to test that requests whose cached copy is still current get an empty 304 response carrying the cache headers.
+        """
+        response = self.client.get(f'/media/{self.blob_name}')
+
+        for headers in [{'HTTP_IF_NONE_MATCH': response['ETag']}, {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}]:
+
+            not_modified_response = self.client.get(f'/media/{self.blob_name}', **headers)
+
+            self.assertEqual(status.HTTP_304_NOT_MODIFIED, not_modified_response.status_code)
+            self.assertEqual(b'', not_modified_response.content)
+            self.assertEqual(response['ETag'], not_modified_response['ETag'])
+            self.assertEqual('public, max-age=100, immutable', not_modified_response['Cache-Control'])
+
+        self.assertEqual('"{}"'.format(self.blob_name.split('/')[-1].split('.')[0]), response['ETag'])
+
+    def test_media_view_GET_range(self):
+        """
+        A method to test that byte ranges of a file are sent with a 206 response.
+        """
+        expected_ranges = [
+            ('bytes=0-3', b'test', 'bytes 0-3/12'),
+            ('bytes=5-', b'content', 'bytes 5-11/12'),
+            ('bytes=-4', b'tent', 'bytes 8-11/12'),
+            ('bytes=5-100', b'content', 'bytes 5-11/12'),
+        ]
+
+        for range_header, expected_content, expected_content_range in expected_ranges:
+
+            response = self.client.get(f'/media/{self.file_name}', HTTP_RANGE = range_header)
+
+            self.assertEqual(status.HTTP_206_PARTIAL_CONTENT, response.status_code)
+            self.assertEqual(expected_content, b''.join(response.streaming_content))
+            self.assertEqual(expected_content_range, response['Content-Range'])
+            self.assertEqual(str(len(expected_content)), response['Content-Length'])
+
+    def test_media_view_GET_range_not_satisfiable(self):
+        """
+        A method to test that a byte range outside of the file gets a 416 response.
+        """
+        response = self.client.get(f'/media/{self.file_name}', HTTP_RANGE = 'bytes=20-30')
+
+        self.assertEqual(status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, response.status_code)
+        self.assertEqual('bytes */12', response['Content-Range'])
+
+    def test_media_view_GET_range_if_range(self):
+        """
+        A method to test that a byte range is only sent when the "If-Range" header matches the current version of the file.
+        """
+        etag = self.client.get(f'/media/{self.file_name}')['ETag']
+
+        response = self.client.get(f'/media/{self.file_name}', HTTP_RANGE = 'bytes=0-3', HTTP_IF_RANGE = etag)
+
+        self.assertEqual(status.HTTP_206_PARTIAL_CONTENT, response.status_code)
+
+        response = self.client.get(f'/media/{self.file_name}', HTTP_RANGE = 'bytes=0-3', HTTP_IF_RANGE = '"outdated"')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(b'test content', b''.join(response.streaming_content))
+
+    @override_settings(MEDIA_SENDFILE_BACKEND = 'x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/')
+    def test_media_view_GET_x_accel_redirect(self):
+        """
+        A method to test that files are handed to nginx with an "X-Accel-Redirect" header when it is configured.
+        """
+        response = self.client.get(f'/media/{self.blob_name}')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(f'/protected-media/{self.blob_name}', response['X-Accel-Redirect'])
+        self.assertEqual(b'', response.content)
+        self.assertEqual('public, max-age=100, immutable', response['Cache-Control'])
+
+    @override_settings(MEDIA_SENDFILE_BACKEND = 'x-sendfile')
+    def test_media_view_GET_x_sendfile(self):
+        """
+        A method to test that files are handed to the front server with an "X-Sendfile" header when it is configured.
+        """
+        response = self.client.get(f'/media/{self.file_name}')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(os.path.abspath(f'cable_api/tests/media/{self.file_name}'), response['X-Sendfile'])
+
+    def test_media_view_GET_outside_media_root(self):
+        """
+        A method to test that paths leading outside of the media directory or to directories are not served.
+        """
+        response = self.client.get('/media/..%2F..%2Fsettings.py')
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        response = self.client.get('/media/blobs/')
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_media_view_GET_missing_file(self):
+        """
+        A method to test the "media/path" endpoint with a file that does not exist.
+        """
+        response = self.client.get('/media/blobs/missing.jpg')
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
+
+class ReadRecordingFile:
+    """
+    A class that wraps an open file and records, for every read, whether it ran on an event loop.
+    """
+    def __init__(self, file, reads):
+        """
+        A method to wrap the file and the list the reads are recorded in.
+        """
+        self.file = file
+        self.reads = reads
+
+    def read(self, *args):
+        """
+        A method that records whether an event loop is running in the current thread and reads from the file.
+        """
+        try:
+            asyncio.get_running_loop()
+
+            self.reads.append('event loop')
+
+        except RuntimeError:
+
+            self.reads.append('thread')
+
+        return self.file.read(*args)
+
+    def __getattr__(self, name):
+        """
+        A method that passes every other attribute through to the file.
+        """
+        return getattr(self.file, name)
+
+    def __enter__(self):
+        """
+        A method that returns the wrapper when used as a context manager.
+        """
+        return self
+
+    def __exit__(self, *args):
+        """
+        A method that closes the file when used as a context manager.
+        """
+        self.file.close()
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestMediaViewASGI(SimpleTestCase):
+    """
+    A class to test the "media/path" endpoint served by the ASGI application, which must not read files on the event loop.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.file_name = FileSystemStorage().save('users/file.txt', ContentFile(b'test content'))
+        self.reads = []
+
+    def open_file(self, path, mode):
+        """
+        A method that opens a file wrapped to record its reads.
+        """
+        return ReadRecordingFile(open(path, mode), self.reads)
+
+    async def get(self, headers = []):
+        """
+        A method to send a GET request for the file to the ASGI application and return the response start message and body.
+        """
+        scope = {'type': 'http', 'method': 'GET', 'path': f'/media/{self.file_name}', 'query_string': b'', 'headers': [(b'host', b'testserver')] + headers}
+
+        communicator = ApplicationCommunicator(application, scope)
+
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+
+        start = await communicator.receive_output()
+
+        body = b''
+        output = {'more_body': True}
+
+        while output.get('more_body'):
+
+            output = await communicator.receive_output()
+
+            body += output.get('body', b'')
+
+        await communicator.wait()
+
+        return start, body
+
+    async def test_media_view_GET_file(self):
+        """
+        A method to test that a whole file is read in a thread.
+        """
+        with mock.patch('cable_api.views.media_views.open', self.open_file, create=True):
+
+            start, body = await self.get()
+
+        self.assertEqual(status.HTTP_200_OK, start['status'])
+        self.assertEqual(b'test content', body)
+        self.assertTrue(self.reads)
+        self.assertEqual({'thread'}, set(self.reads))
+
+    async def test_media_view_GET_range(self):
+        """
+        A method to test that a byte range of a file is read in a thread.
+        """
+        with mock.patch('cable_api.views.media_views.open', self.open_file, create=True):
+
+            start, body = await self.get([(b'range', b'bytes=5-')])
+
+        self.assertEqual(status.HTTP_206_PARTIAL_CONTENT, start['status'])
+        self.assertEqual(b'content', body)
+        self.assertTrue(self.reads)
+        self.assertEqual({'thread'}, set(self.reads))
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
@@ -1,12 +1,18 @@
 import json
 import shutil
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
+from django.core.management import call_command
+from django.utils import timezone
+from django.db import connection
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.test import override_settings
 from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory, MessageFactory
 from cable_api.serializers import  MessageSerializer
-from cable_api.models import Message
+from cable_api.models import Message, ArchivedMessage
 from cable_api.tests.test_helpers import get_auth_headers
 
 @override_settings(MEDIA_ROOT = 'cable_api/tests/media')
@@ -49,11 +55,282 @@ class TestMessagesView(APITestCase):
 
             messages.append(message_dict)
 
-        expected_response = {'messages': messages}
+        expected_response = {'messages': messages, 'next': None}
 
         response = self.client.get(endpoint, **self.auth_headers)
 
+        response_dict = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(response_dict.pop('previous'))
+        self.assertTrue(response_dict.pop('sync_token'))
+        self.assertEqual(expected_response, response_dict)
+
+    def test_messages_view_GET_query_count(self):
+        """
+        A method to test the number of queries run by the GET method of the "api/chats/chat_id/messages/" endpoint.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        # One query to authenticate the user, one for the chat along with the membership of the user, one for the messages and one for the archive, since the messages don't fill the page.
+        with self.assertNumQueries(4):
+
+            response = self.client.get(endpoint, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_messages_view_GET_latest_query_count(self):
+        """
+        A method to test that the GET method of the "api/chats/chat_id/messages/" endpoint returns the newest messages without a cursor and doesn't query the archive when the live messages fill the page.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        Message.objects.filter(id = self.message_objects[0].id).update(date_created = timezone.now() - timedelta(days=400))
+
+        call_command('archive_messages', '--days', '365', stdout=StringIO())
+
+        self.client.get(endpoint, **self.auth_headers)
+
+        # The user is now cached, so one query for the chat along with the membership of the user and one for the live messages.
+        with self.assertNumQueries(2):
+
+            response = self.client.get(endpoint, {'limit': 3}, **self.auth_headers)
+
+        self.assertEqual(1, ArchivedMessage.objects.count())
+        self.assertEqual([message.id for message in self.message_objects[2:]], [message['id'] for message in json.loads(response.content)['messages']])
+
+    def test_messages_view_GET_after_cursor(self):
+        """
+        A method to test paging forwards from the oldest messages through the GET method of the "api/chats/chat_id/messages/" endpoint, with the previous cursor of the oldest page.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        response_dict = {'next': 'latest'}
+
+        while response_dict['next']:
+
+            response = self.client.get(endpoint, {'limit': 2, 'before': response_dict['next']}, **self.auth_headers)
+
+            response_dict = json.loads(response.content)
+
+        self.assertEqual([self.message_objects[0].id], [message['id'] for message in response_dict['messages']])
+
+        response = self.client.get(endpoint, {'limit': 2, 'after': response_dict['previous']}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([message.id for message in self.message_objects[1:3]], [message['id'] for message in response_dict['messages']])
+
+        response = self.client.get(endpoint, {'limit': 2, 'after': response_dict['next']}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([message.id for message in self.message_objects[3:]], [message['id'] for message in response_dict['messages']])
+        self.assertEqual(None, response_dict['next'])
+
+    def test_messages_view_GET_before_cursor(self):
+        """
+        A method to test paging backwards from the newest messages through the GET method of the "api/chats/chat_id/messages/" endpoint.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        response = self.client.get(endpoint, {'limit': 3, 'before': 'latest'}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
         self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([message.id for message in self.message_objects[2:]], [message['id'] for message in response_dict['messages']])
+
+        response = self.client.get(endpoint, {'limit': 3, 'before': response_dict['next']}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([message.id for message in self.message_objects[:2]], [message['id'] for message in response_dict['messages']])
+        self.assertEqual(None, response_dict['next'])
+
+    def test_messages_view_GET_previous_cursor(self):
+        """
+        A method to test that the GET method of the "api/chats/chat_id/messages/" endpoint returns a previous cursor to page back the other way, and to fetch messages sent after the newest page.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        response = self.client.get(endpoint, {'limit': 2, 'before': 'latest'}, **self.auth_headers)
+
+        latest_dict = json.loads(response.content)
+
+        response = self.client.get(endpoint, {'limit': 2, 'before': latest_dict['next']}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([message.id for message in self.message_objects[1:3]], [message['id'] for message in response_dict['messages']])
+
+        response = self.client.get(endpoint, {'limit': 2, 'after': response_dict['previous']}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([message.id for message in self.message_objects[3:]], [message['id'] for message in response_dict['messages']])
+
+        response = self.client.get(endpoint, {'limit': 2, 'after': latest_dict['previous']}, **self.auth_headers)
+
+        self.assertEqual([], json.loads(response.content)['messages'])
+
+        new_message = self.message_factory.create(sender = self.test_user, chat = self.chat_object)
+
+        response = self.client.get(endpoint, {'limit': 2, 'after': latest_dict['previous']}, **self.auth_headers)
+
+        self.assertEqual([new_message.id], [message['id'] for message in json.loads(response.content)['messages']])
+
+    def test_messages_view_GET_latest_without_messages(self):
+        """
+        A method to test that the GET method of the "api/chats/chat_id/messages/" endpoint starting from the newest messages of a chat without any raises a not found exception, like a first page does.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        Message.objects.filter(chat = self.chat_object).delete()
+
+        response = self.client.get(endpoint, {'before': 'latest'}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_messages_view_GET_archived_messages(self):
+        """
+        A method to test that paging back through the GET method of the "api/chats/chat_id/messages/" endpoint falls through to archived messages.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        Message.objects.filter(id__in = [message.id for message in self.message_objects[:3]]).update(date_created = timezone.now() - timedelta(days=400))
+
+        expected_messages = MessageSerializer(Message.objects.filter(chat = self.chat_object).order_by('date_created', 'id'), many=True).data
+
+        call_command('archive_messages', '--days', '365', stdout=StringIO())
+
+        response = self.client.get(endpoint, {'limit': 2, 'before': 'latest'}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual(expected_messages[3:], response_dict['messages'])
+
+        response = self.client.get(endpoint, {'limit': 2, 'before': response_dict['next']}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual(3, ArchivedMessage.objects.count())
+        self.assertEqual(expected_messages[1:3], response_dict['messages'])
+
+        response = self.client.get(endpoint, {'limit': 2, 'before': response_dict['next']}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual(expected_messages[:1], response_dict['messages'])
+        self.assertEqual(None, response_dict['next'])
+
+        response = self.client.get(endpoint, **self.auth_headers)
+
+        self.assertEqual(expected_messages, json.loads(response.content)['messages'])
+
+    @override_settings(SYNC_TOKEN_MARGIN_SECONDS = 0)
+    def test_messages_view_GET_since_sync_token(self):
+        """
+        A method to test the GET method of the "api/chats/chat_id/messages/" endpoint in sync mode, which returns only the messages created, edited or deleted since the sync token.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        response = self.client.get(endpoint, **self.auth_headers)
+
+        sync_token = json.loads(response.content)['sync_token']
+
+        edited_message = self.message_objects[0]
+        deleted_message = self.message_objects[1]
+
+        self.client.patch(reverse('message', kwargs={'chat_id': self.chat_object.id, 'message_id': edited_message.id}), {'content': 'edited message'}, **self.auth_headers)
+        self.client.delete(reverse('message', kwargs={'chat_id': self.chat_object.id, 'message_id': deleted_message.id}), **self.auth_headers)
+        self.client.post(endpoint, {'content': 'new message'}, **self.auth_headers)
+
+        new_message = Message.objects.filter(content = 'new message').first()
+
+        response = self.client.get(endpoint, {'since': sync_token}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([edited_message.id, new_message.id], [message['id'] for message in response_dict['messages']])
+        self.assertEqual('edited message', response_dict['messages'][0]['content'])
+        self.assertEqual([deleted_message.id], response_dict['deleted'])
+        self.assertFalse(response_dict['resync'])
+
+        response = self.client.get(endpoint, {'since': response_dict['sync_token']}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([], response_dict['messages'])
+        self.assertEqual([], response_dict['deleted'])
+
+    @override_settings(SYNC_TOKEN_MARGIN_SECONDS = 0, SYNC_LIMIT = 2)
+    def test_messages_view_GET_since_resync(self):
+        """
+        A method to test that the GET method of the "api/chats/chat_id/messages/" endpoint answers a sync with more than SYNC_LIMIT changes with a resync instead of the changes.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        response = self.client.get(endpoint, **self.auth_headers)
+
+        sync_token = json.loads(response.content)['sync_token']
+
+        self.client.delete(reverse('message', kwargs={'chat_id': self.chat_object.id, 'message_id': self.message_objects[0].id}), **self.auth_headers)
+
+        self.client.post(endpoint, {'content': 'new message'}, **self.auth_headers)
+
+        response = self.client.get(endpoint, {'since': sync_token}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual(2, len(response_dict['messages']) + len(response_dict['deleted']))
+        self.assertFalse(response_dict['resync'])
+
+        self.client.post(endpoint, {'content': 'another message'}, **self.auth_headers)
+
+        response = self.client.get(endpoint, {'since': sync_token}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(([], [], True), (response_dict['messages'], response_dict['deleted'], response_dict['resync']))
+        self.assertTrue(response_dict['sync_token'])
+
+    def test_messages_view_GET_since_late_commit(self):
+        """
+        A method to test that a sync returns a message stamped before the previous sync token was issued whose transaction only committed after the previous sync read.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        stamped = timezone.now()
+
+        response = self.client.get(endpoint, **self.auth_headers)
+
+        sync_token = json.loads(response.content)['sync_token']
+
+        # Committed after the read above while stamped before it, as a message of a concurrent transaction is.
+        late_message = MessageFactory.create(sender = self.test_user, chat = self.chat_object)
+
+        Message.objects.filter(id = late_message.id).update(date_modified = stamped)
+
+        response = self.client.get(endpoint, {'since': sync_token}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIn(late_message.id, [message['id'] for message in json.loads(response.content)['messages']])
+
+    def test_messages_view_GET_invalid_cursor(self):
+        """
+        A method to test the GET method of the "api/chats/chat_id/messages/" endpoint with a malformed cursor.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        expected_response = {'detail': 'Invalid cursor.'}
+
+        response = self.client.get(endpoint, {'after': 'not-a-cursor'}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
            
     def test_messages_view_POST(self):
@@ -77,6 +354,135 @@ class TestMessagesView(APITestCase):
         self.assertEqual(status.HTTP_201_CREATED, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
 
+    def test_messages_view_POST_retry_with_client_id(self):
+        """
+        A method to test that retrying the POST method of the "api/chats/chat_id/messages/" endpoint with the same client id returns the original message.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        request_dict = {
+            'content': 'test message',
+            'client_id': 'test-client-id'
+        }
+
+        first_response = self.client.post(endpoint, request_dict, **self.auth_headers)
+
+        second_response = self.client.post(endpoint, request_dict, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_201_CREATED, first_response.status_code)
+        self.assertEqual(status.HTTP_200_OK, second_response.status_code)
+        self.assertEqual(json.loads(first_response.content), json.loads(second_response.content))
+        self.assertEqual(1, Message.objects.filter(client_id = 'test-client-id').count())
+
+    def test_messages_view_POST_blank_client_id(self):
+        """
+        A method to test that messages posted to the "api/chats/chat_id/messages/" endpoint with a blank client id are each created, without a client id.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        request_dict = {
+            'content': 'test message',
+            'client_id': ''
+        }
+
+        first_response = self.client.post(endpoint, request_dict, **self.auth_headers)
+
+        second_response = self.client.post(endpoint, request_dict, **self.auth_headers)
+
+        batch_endpoint = reverse('messages_batch', kwargs={'chat_id': self.chat_object.id})
+
+        batch_response = self.client.post(batch_endpoint, {'messages': [request_dict, request_dict]}, format='json', **self.auth_headers)
+
+        self.assertEqual(status.HTTP_201_CREATED, first_response.status_code)
+        self.assertEqual(status.HTTP_201_CREATED, second_response.status_code)
+        self.assertEqual(status.HTTP_201_CREATED, batch_response.status_code)
+        self.assertEqual([None, None], [result['client_id'] for result in json.loads(batch_response.content)['results']])
+        self.assertEqual(['created', 'created'], [result['status'] for result in json.loads(batch_response.content)['results']])
+        self.assertEqual(4, Message.objects.filter(content = 'test message', client_id = None).count())
+
+    def test_messages_batch_view_POST(self):
+        """
+        A method to test the POST method of the "api/chats/chat_id/messages/batch/" endpoint.
+        """
+        endpoint = reverse('messages_batch', kwargs={'chat_id': self.chat_object.id})
+
+        request_dict = {
+            'messages': [
+                {'content': 'first message', 'client_id': 'first'},
+                {'content': 'second message', 'client_id': 'second'},
+                {'content': 'third message'}
+            ]
+        }
+
+        response = self.client.post(endpoint, request_dict, format='json', **self.auth_headers)
+
+        new_messages = Message.objects.filter(chat = self.chat_object).order_by('-id')[:3][::-1]
+
+        message_serializer = MessageSerializer(new_messages, many=True)
+
+        expected_response = {'results': [
+            {'client_id': 'first', 'status': 'created', 'message': message_serializer.data[0]},
+            {'client_id': 'second', 'status': 'created', 'message': message_serializer.data[1]},
+            {'client_id': None, 'status': 'created', 'message': message_serializer.data[2]}
+        ]}
+
+        self.participant_two.refresh_from_db()
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+        self.assertEqual(['first message', 'second message', 'third message'], [message.content for message in new_messages])
+        self.assertEqual(3, self.participant_two.unread_count)
+
+    def test_messages_batch_view_POST_retry_with_client_ids(self):
+        """
+        A method to test that messages retried through the "api/chats/chat_id/messages/batch/" endpoint with known client ids are not created again.
+        """
+        endpoint = reverse('messages_batch', kwargs={'chat_id': self.chat_object.id})
+
+        self.client.post(endpoint, {'messages': [{'content': 'first message', 'client_id': 'first'}]}, format='json', **self.auth_headers)
+
+        request_dict = {
+            'messages': [
+                {'content': 'first message', 'client_id': 'first'},
+                {'content': 'second message', 'client_id': 'second'},
+                {'content': 'second message', 'client_id': 'second'}
+            ]
+        }
+
+        response = self.client.post(endpoint, request_dict, format='json', **self.auth_headers)
+
+        results = json.loads(response.content)['results']
+
+        self.participant_two.refresh_from_db()
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(['duplicate', 'created', 'duplicate'], [result['status'] for result in results])
+        self.assertEqual(results[1]['message'], results[2]['message'])
+        self.assertEqual(1, Message.objects.filter(client_id = 'first').count())
+        self.assertEqual(1, Message.objects.filter(client_id = 'second').count())
+        self.assertEqual(2, self.participant_two.unread_count)
+
+    def test_messages_batch_view_POST_invalid_batch(self):
+        """
+        A method to test the POST method of the "api/chats/chat_id/messages/batch/" endpoint with batches that are empty, too large or contain invalid messages.
+        """
+        endpoint = reverse('messages_batch', kwargs={'chat_id': self.chat_object.id})
+
+        expected_response = {'detail': 'A batch must contain between 1 and 2 messages.'}
+
+        with self.settings(MAX_BATCH_SIZE = 2):
+
+            response = self.client.post(endpoint, {'messages': [{'content': 'test message'}] * 3}, format='json', **self.auth_headers)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+
+        response = self.client.post(endpoint, {'messages': [{'content': 'test message'}, {}]}, format='json', **self.auth_headers)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual([{}, {'content': ['This field is required.']}], json.loads(response.content))
+        self.assertEqual(0, Message.objects.filter(content = 'test message').count())
+
     def tearDown(self):
         """
         A method to delete data and revert the changes made using the setup method after each test run.
@@ -206,6 +612,23 @@ class TestMessagesAgainstUnauthorizedUser(APITestCase):
         self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
 
+    def test_messages_batch_view_POST_unauthorized_user(self):
+        """
+        A method to test the POST method of the "api/chats/chat_id/messages/batch/" endpoint on a chat the user does not participate in.
+        """ 
+        endpoint = reverse('messages_batch', kwargs={'chat_id': self.chat_object.id})
+
+        request_dict = {
+            'messages': [{'content': 'test message'}]
+        }
+            
+        expected_response = {'detail': 'Unauthorized to use this method on this endpoint or object.'}
+
+        response = self.client.post(endpoint, request_dict, format='json', **self.auth_headers)
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+
     def tearDown(self):
         """
         A method to delete data and revert the changes made using the setup method after each test run.
@@ -213,7 +636,142 @@ class TestMessagesAgainstUnauthorizedUser(APITestCase):
         shutil.rmtree('cable_api/tests/media')
 
 @override_settings(MEDIA_ROOT = 'cable_api/tests/media')
-class TestMessagesView(APITestCase):
+class TestMessagesSearchView(APITestCase):
+    """
+    A class to test the "api/messages/search/" endpoint.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create()
+        self.test_user = UserFactory.create()
+        self.chat_object = ChatFactory.create()
+        self.outside_chat = ChatFactory.create()
+        ParticipantFactory(model_user = self.auth_user, chat = self.chat_object)
+        ParticipantFactory(model_user = self.test_user, chat = self.chat_object)
+        ParticipantFactory(model_user = self.test_user, chat = self.outside_chat)
+        self.greeting = MessageFactory.create(content = 'hello world', sender = self.auth_user, chat = self.chat_object)
+        self.other_message = MessageFactory.create(content = 'the quick brown fox', sender = self.test_user, chat = self.chat_object)
+        self.repeated_greeting = MessageFactory.create(content = 'hello hello, is anyone there', sender = self.test_user, chat = self.chat_object)
+        self.outside_message = MessageFactory.create(content = 'hello from another chat', sender = self.test_user, chat = self.outside_chat)
+        self.auth_headers = get_auth_headers(self.client, self.auth_user)
+        self.maxDiff = None
+
+    def test_messages_search_view_GET(self):
+        """
+        A method to test the GET method of the "api/messages/search/" endpoint.
+        """
+        endpoint = reverse('messages_search')
+
+        response = self.client.get(endpoint, {'q': 'hello'}, **self.auth_headers)
+
+        results = json.loads(response.content)['results']
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([self.repeated_greeting.id, self.greeting.id], [result['message']['id'] for result in results])
+        self.assertEqual(MessageSerializer(self.greeting).data, results[1]['message'])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+        self.assertIn('<b>hello</b>', results[1]['snippet'])
+
+    def test_messages_search_view_GET_escapes_snippet(self):
+        """
+        A method to test that the snippets of the "api/messages/search/" endpoint escape the html in the content of messages, so that only the markers of the matched words are html.
+        """
+        endpoint = reverse('messages_search')
+
+        script_message = MessageFactory.create(content = '<script>alert("x")</script> & scripted', sender = self.test_user, chat = self.chat_object)
+
+        response = self.client.get(endpoint, {'q': 'scripted'}, **self.auth_headers)
+
+        [result] = json.loads(response.content)['results']
+
+        self.assertEqual(script_message.content, result['message']['content'])
+        self.assertEqual('&lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; <b>scripted</b>', result['snippet'])
+
+    def test_messages_search_view_GET_paginated(self):
+        """
+        A method to test paging through the GET method of the "api/messages/search/" endpoint.
+        """
+        endpoint = reverse('messages_search')
+
+        response = self.client.get(endpoint, {'q': 'hello', 'limit': 1}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([self.repeated_greeting.id], [result['message']['id'] for result in response_dict['results']])
+
+        response = self.client.get(endpoint, {'q': 'hello', 'limit': 1, 'after': response_dict['next']}, **self.auth_headers)
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([self.greeting.id], [result['message']['id'] for result in response_dict['results']])
+        self.assertEqual(None, response_dict['next'])
+
+    def test_messages_search_view_GET_follows_edits(self):
+        """
+        A method to test that the "api/messages/search/" endpoint finds messages by their edited content and stops finding deleted messages.
+        """
+        endpoint = reverse('messages_search')
+
+        message_endpoint = reverse('message', kwargs={'chat_id': self.chat_object.id, 'message_id': self.other_message.id})
+
+        self.client.patch(message_endpoint, {'content': 'the lazy dog'}, **self.auth_headers)
+
+        response = self.client.get(endpoint, {'q': 'fox'}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        response = self.client.get(endpoint, {'q': 'lazy dog'}, **self.auth_headers)
+
+        self.assertEqual([self.other_message.id], [result['message']['id'] for result in json.loads(response.content)['results']])
+
+        self.client.delete(message_endpoint, **self.auth_headers)
+
+        response = self.client.get(endpoint, {'q': 'lazy dog'}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_messages_search_view_GET_excludes_archived_messages(self):
+        """
+        A method to test that the "api/messages/search/" endpoint doesn't find archived messages, whose content is stored compressed outside of the search index.
+        """
+        endpoint = reverse('messages_search')
+
+        Message.objects.filter(id = self.greeting.id).update(date_created = timezone.now() - timedelta(days=400))
+
+        call_command('archive_messages', '--days', '365', stdout=StringIO())
+
+        response = self.client.get(endpoint, {'q': 'hello'}, **self.auth_headers)
+
+        self.assertTrue(ArchivedMessage.objects.filter(id = self.greeting.id).exists())
+        self.assertEqual([self.repeated_greeting.id], [result['message']['id'] for result in json.loads(response.content)['results']])
+
+    def test_messages_search_view_GET_invalid_query(self):
+        """
+        A method to test the GET method of the "api/messages/search/" endpoint with an empty query and with a query containing search syntax.
+        """
+        endpoint = reverse('messages_search')
+
+        expected_response = {'detail': 'A search query must be provided.'}
+
+        response = self.client.get(endpoint, {'q': ' '}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+
+        response = self.client.get(endpoint, {'q': 'world" OR (fox*'}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestMessageView(APITestCase):
     """
     A class to test the "api/chats/chat_id/messages/message_id/" endpoint.
     """
@@ -231,6 +789,33 @@ class TestMessagesView(APITestCase):
         self.auth_headers = get_auth_headers(self.client, self.auth_user)
         self.maxDiff = None
 
+    def test_message_view_query_counts(self):
+        """
+        A method to test the number of queries run by each method of the "api/chats/chat_id/messages/message_id/" endpoint.
+        """
+        endpoint = reverse('message', kwargs={'chat_id': self.chat_object.id, 'message_id': self.message_object.id})
+
+        # One query to authenticate the user and one for the message along with its chat and the membership of the user.
+        with self.assertNumQueries(2):
+
+            response = self.client.get(endpoint, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # The user is now cached by the first request, so the update returning the message and the chat activity inside a savepoint, then one query for the participants to notify.
+        with self.assertNumQueries(5):
+
+            response = self.client.patch(endpoint, {'content': 'updated message'}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # The lookup, then inside a savepoint the tombstone, the participants to notify, the unread counts, the chats pointing at the message, the delete and the last message of the chat.
+        with self.assertNumQueries(9):
+
+            response = self.client.delete(endpoint, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
     def test_message_view_GET(self):
         """
         A method to test the GET method of the "api/chats/chat_id/messages/message_id/" endpoint.
@@ -252,6 +837,30 @@ class TestMessagesView(APITestCase):
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
 
+    def test_message_view_GET_archived_message(self):
+        """
+        A method to test that the GET method of the "api/chats/chat_id/messages/message_id/" endpoint returns archived messages, which can't be updated.
+        """
+        endpoint = reverse('message', kwargs={'chat_id': self.chat_object.id, 'message_id': self.message_object.id})
+
+        MessageFactory.create(sender = self.test_user, chat = self.chat_object)
+
+        Message.objects.filter(id = self.message_object.id).update(date_created = timezone.now() - timedelta(days=400))
+
+        expected_response = {'message': MessageSerializer(Message.objects.get(id = self.message_object.id)).data}
+
+        call_command('archive_messages', '--days', '365', stdout=StringIO())
+
+        response = self.client.get(endpoint, **self.auth_headers)
+
+        self.assertTrue(ArchivedMessage.objects.filter(id = self.message_object.id).exists())
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(expected_response, json.loads(response.content))
+
+        response = self.client.patch(endpoint, {'content': 'updated message'}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
     def test_message_view_PATCH(self):
         """
         A method to test the patch method of the "api/chats/chat_id/messages/message_id/" endpoint.
@@ -277,6 +886,34 @@ class TestMessagesView(APITestCase):
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
 
+    def test_message_view_PATCH_date_modified(self):
+        """
+        A method to test that the PATCH method of the "api/chats/chat_id/messages/message_id/" endpoint updates the modification date of the message, with and without RETURNING support.
+        """
+        endpoint = reverse('message', kwargs={'chat_id': self.chat_object.id, 'message_id': self.message_object.id})
+
+        date_modified = self.message_object.date_modified
+
+        response = self.client.patch(endpoint, {'content': 'updated message'}, **self.auth_headers)
+
+        self.message_object.refresh_from_db()
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('updated message', self.message_object.content)
+        self.assertLess(date_modified, self.message_object.date_modified)
+
+        date_modified = self.message_object.date_modified
+
+        with mock.patch.object(connection.features, 'can_return_columns_from_insert', False):
+
+            response = self.client.patch(endpoint, {'content': 'updated again'}, **self.auth_headers)
+
+        self.message_object.refresh_from_db()
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('updated again', json.loads(response.content)['updated_message']['content'])
+        self.assertLess(date_modified, self.message_object.date_modified)
+
     def test_message_view_DELETE(self):
         """
         A method to test the delete method of the "api/chats/chat_id/messages/message_id/" endpoint.
@@ -0,0 +1,68 @@
+import io
+import json
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from cable_api.parsers import ORJSONParser
+
+class TestORJSONParser(SimpleTestCase):
+    """
+    A class to test that the orjson parser returns the same data and raises the same errors as the JSONParser of the rest framework.
+    """
+    def parse(self, parser, body, encoding = 'utf-8'):
+        """
+        A method to parse a body with a parser, returning the data or the detail of the exception it raised.
+        """
+        try:
+            return parser.parse(io.BytesIO(body), 'application/json', {'encoding': encoding})
+
+        except ParseError as exception:
+
+            return exception.detail
+
+    def assertParsesIdentically(self, body, encoding = 'utf-8'):
+        """
+        A method to assert that the orjson parser returns the same data, with the same types, as the JSONParser.
+        """
+        expected = self.parse(JSONParser(), body, encoding)
+        parsed = self.parse(ORJSONParser(), body, encoding)
+
+        self.assertEqual(expected, parsed)
+        self.assertEqual(json.dumps(expected), json.dumps(parsed))
+
+    def test_parse_message(self):
+        """
+        A method to test parsing the kind of body the message endpoints receive.
+        """
+        body = json.dumps({'content': 'emoji 😀   "quoted" \\ \n', 'client_id': 'a1b2c3', 'chat': None, 'messages': [{'content': 'é'}]}, ensure_ascii=False).encode()
+
+        self.assertParsesIdentically(body)
+
+    def test_parse_numbers(self):
+        """
+        A method to test parsing numbers, including integers outside of 64 bits and floats out of range that are left to the JSONParser.
+        """
+        self.assertParsesIdentically(b'[1, -0, 0.1, 1e16, 2.5e-05, 9223372036854775807, 18446744073709551615]')
+        self.assertParsesIdentically(b'[123456789012345678901234567890, -123456789012345678901234567890]')
+        self.assertParsesIdentically(b'[-9223372036854775808, -9223372036854775809, -9999999999999999999]')
+        self.assertParsesIdentically(b'[1.5e400]')
+
+    def test_parse_invalid_json(self):
+        """
+        A method to test that invalid json raises the same exceptions as the JSONParser.
+        """
+        for body in [b'', b'{', b'{"content": }', b'[NaN]', b'[Infinity]', b'\xef\xbb\xbf{}', b'\xff']:
+
+            with self.subTest(body = body):
+
+                expected = self.parse(JSONParser(), body)
+
+                self.assertIsInstance(expected, str)
+                self.assertEqual(expected, self.parse(ORJSONParser(), body))
+
+    def test_parse_other_encoding(self):
+        """
+        A method to test parsing a body sent in an encoding other than utf-8.
+        """
+        self.assertParsesIdentically('{"content": "é 😀"}'.encode('utf-16'), 'utf-16')
+        self.assertParsesIdentically('{"content": "éàü"}'.encode('latin-1'), 'latin-1')
@@ -0,0 +1,140 @@
+import uuid
+import random
+import shutil
+import datetime
+from decimal import Decimal
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory, MessageFactory
+from cable_api.models import Chat, Message
+from cable_api.renderers import ORJSONRenderer
+from cable_api.serializers import ChatSerializer, MessageSerializer
+
+class RenderComparisonMixin:
+    """
+    A class that adds an assertion comparing the output of the orjson renderer to the output of the JSONRenderer of the rest framework.
+    """
+    def assertRendersIdentically(self, data, accepted_media_type = None, fallback = False):
+        """
+        A method to assert that the orjson renderer writes the same bytes as the JSONRenderer, and that it only leaves the data to the JSONRenderer when expected to.
+        """
+        expected = JSONRenderer().render(data, accepted_media_type)
+
+        with mock.patch.object(JSONRenderer, 'render', autospec=True, side_effect=JSONRenderer.render) as render:
+
+            rendered = ORJSONRenderer().render(data, accepted_media_type)
+
+        self.assertEqual(expected, rendered)
+        self.assertEqual(fallback, render.called)
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestORJSONRendererPages(RenderComparisonMixin, APITestCase):
+    """
+    A class to test that the orjson renderer writes serialized pages of messages and chats byte for byte like the JSONRenderer.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create(user_name = 'tëst usér 😀')
+        self.test_user = UserFactory.create()
+        self.chat_object = ChatFactory.create(display_name = 'chat     "quoted" \\ </script>')
+        ParticipantFactory(model_user = self.auth_user, chat = self.chat_object)
+        ParticipantFactory(model_user = self.test_user, chat = self.chat_object)
+        MessageFactory.create_batch(20, sender = self.auth_user, chat = self.chat_object)
+
+        contents = ['emoji 😀 and accents éàü', 'line\nbreaks\tand\rcontrol \x00\x1f\x7f', 'separators   and  ', 'quotes " and \\ backslashes', 'ÿ non ascii 中文']
+
+        for content in contents:
+
+            MessageFactory.create(sender = self.test_user, chat = self.chat_object, content = content)
+
+    def test_render_message_page(self):
+        """
+        A method to test rendering a page of messages the way the messages endpoint responds with it.
+        """
+        messages = MessageSerializer(Message.objects.filter(chat = self.chat_object).order_by('date_created', 'id'), many=True)
+
+        self.assertRendersIdentically({'messages': messages.data, 'next': None, 'sync_token': 'WyIyMDIzLTAxLTAxVDAwOjAwOjAwIl0='})
+
+    def test_render_chat_page(self):
+        """
+        A method to test rendering a page of chats the way the chats endpoint responds with it.
+        """
+        chats = ChatSerializer(Chat.objects.with_related().all(), many=True, context={'user': self.auth_user})
+
+        self.assertRendersIdentically({'chats': chats.data, 'next': 'WyIyMDIzIl0='})
+
+    def tearDown(self):
+        """
+        A method to delete the media created by the factories after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
+
+class TestORJSONRenderer(RenderComparisonMixin, SimpleTestCase):
+    """
+    A class to test that the orjson renderer writes python values byte for byte like the JSONRenderer.
+    """
+    def test_render_python_types(self):
+        """
+        A method to test rendering the values the encoder of the rest framework converts, along with the ones orjson writes itself.
+        """
+        data = {
+            'aware_datetime': datetime.datetime(2023, 4, 5, 6, 7, 8, 123456, tzinfo=datetime.timezone.utc),
+            'whole_second_datetime': datetime.datetime(2023, 4, 5, 6, 7, 8, tzinfo=datetime.timezone.utc),
+            'offset_datetime': timezone.localtime(datetime.datetime(2023, 4, 5, 6, 7, 8, tzinfo=datetime.timezone.utc), datetime.timezone(datetime.timedelta(hours=5, minutes=30))),
+            'naive_datetime': datetime.datetime(2023, 4, 5, 6, 7, 8, 9),
+            'date': datetime.date(2023, 4, 5),
+            'time': datetime.time(6, 7, 8, 9),
+            'timedelta': datetime.timedelta(days=1, seconds=5, microseconds=7),
+            'decimal': Decimal('12.50'),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'lazy': gettext_lazy('This field is required.'),
+            'error_detail': ErrorDetail('This object does not exist.', code='not_found'),
+            'bytes': b'bytes',
+            'tuple': (1, 'two', None, True, False),
+            'nested': [{'a': [1.5, -0.0, 0.0001, 123456789.123]}, []],
+            'largest_integer': 2 ** 63 - 1,
+            'smallest_integer': -2 ** 63,
+        }
+
+        self.assertRendersIdentically(data)
+
+    def test_render_fallbacks(self):
+        """
+        A method to test rendering json that orjson can't write identically, which is left to the JSONRenderer.
+        """
+        self.assertRendersIdentically({'large_integer': 2 ** 64 + 1}, fallback = True)
+        self.assertRendersIdentically({1: 'integer key', None: 'none key', False: 'boolean key', 1.5: 'float key'}, fallback = True)
+        self.assertRendersIdentically({'small': 2.5e-05}, fallback = True)
+        self.assertRendersIdentically({'large': 1e16}, fallback = True)
+        self.assertRendersIdentically([1.5e-300], fallback = True)
+        self.assertRendersIdentically({'indented': [1, 2]}, 'application/json; indent=4', fallback = True)
+
+    def test_render_floats(self):
+        """
+        A method to test rendering floats of every magnitude.
+        """
+        generator = random.Random(0)
+
+        floats = [generator.uniform(-1, 1) * 10 ** exponent for exponent in range(-30, 30) for _ in range(20)]
+
+        for value in floats:
+
+            with self.subTest(value = value):
+
+                self.assertRendersIdentically([value], fallback = not 1e-4 <= abs(value) < 1e16)
+
+        self.assertRendersIdentically(2.5e-05, fallback = True)
+        self.assertRendersIdentically([float(value) / 7 for value in range(-1000, 1000)])
+
+    def test_render_none(self):
+        """
+        A method to test that no data renders to an empty body.
+        """
+        self.assertEqual(b'', ORJSONRenderer().render(None))
@@ -0,0 +1,148 @@
+import json
+import shutil
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.urls import reverse
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory, MessageFactory
+from cable_api.routers import ReplicaRouter
+from cable_api.pagination import encode_cursor
+from cable_api.tests.test_helpers import get_auth_headers
+
+REPLICA = 'replica'
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media', DATABASE_REPLICAS = [REPLICA], DATABASE_ROUTERS = ['cable_api.routers.ReplicaRouter'])
+class TestReplicaRouter(APITestCase):
+    """
+    A class to test routing the reads of requests to a read replica, with a second SQLite database standing in for the replica.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        A method to add the replica database and create its tables once the test class is set up.
+        It is added after the class is set up, and removed before it is torn down, because the test runner only knows about the databases of the settings.
+        """
+        super().setUpClass()
+
+        connections.settings[REPLICA] = connections.configure_settings({
+            'default': connections.settings['default'],
+            REPLICA: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+        })[REPLICA]
+
+        # The router is turned off because it keeps migrations off the replicas, which get the schema of the primary through replication in production.
+        with override_settings(DATABASE_ROUTERS = []):
+
+            call_command('migrate', database = REPLICA, verbosity = 0)
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        A method to remove the replica database before the test class is torn down.
+        """
+        connections[REPLICA].close()
+
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+        super().tearDownClass()
+
+    def setUp(self):
+        """
+        A method to define the base setup for this test class, copying everything but the last message of the chat to the replica so that it lags behind the primary.
+        """
+        self.auth_user = UserFactory.create()
+        self.test_user = UserFactory.create()
+        self.chat_object = ChatFactory.create()
+        self.participant_objects = [ParticipantFactory(model_user = user, chat = self.chat_object) for user in [self.auth_user, self.test_user]]
+        self.message_objects = MessageFactory.create_batch(2, sender = self.test_user, chat = self.chat_object)
+
+        # Everything written to the replica by a test is rolled back after it, as the test case does for the primary.
+        self.replica_atomic = transaction.atomic(using = REPLICA)
+        self.replica_atomic.__enter__()
+
+        for instance in [self.auth_user, self.test_user, self.chat_object, *self.participant_objects, self.message_objects[0]]:
+
+            instance.save(using = REPLICA)
+
+        self.auth_headers = get_auth_headers(self.client, self.auth_user)
+        self.test_headers = get_auth_headers(self.client, self.test_user)
+
+        cache.clear()
+
+    def get_message_ids(self, headers):
+        """
+        A method to fetch the ids of the messages of the chat as the user the headers authenticate.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        response = self.client.get(endpoint, **headers)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        return [message['id'] for message in json.loads(response.content)['messages']]
+
+    def test_reads_go_to_replica(self):
+        """
+        A method to test that the reads of GET requests go to the replica.
+        """
+        self.assertEqual([self.message_objects[0].id], self.get_message_ids(self.auth_headers))
+
+    def test_reads_pinned_to_primary_after_write(self):
+        """
+        A method to test that a user who posts a message reads from the primary until the pin expires, while other users keep reading from the replica.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        response = self.client.post(endpoint, {'content': 'test message'}, **self.auth_headers)
+
+        new_message_id = json.loads(response.content)['new_message']['id']
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual([message.id for message in self.message_objects] + [new_message_id], self.get_message_ids(self.auth_headers))
+        self.assertEqual([self.message_objects[0].id], self.get_message_ids(self.test_headers))
+
+        cache.clear()
+
+        self.assertEqual([self.message_objects[0].id], self.get_message_ids(self.auth_headers))
+
+    def test_sync_reads_go_to_primary(self):
+        """
+        A method to test that the reads of a sync go to the primary, so that a message the replica has yet to receive is not skipped by the sync token it returns.
+        """
+        endpoint = reverse('messages', kwargs={'chat_id': self.chat_object.id})
+
+        since = encode_cursor([timezone.now() - timedelta(days=1)])
+
+        response = self.client.get(endpoint, {'since': since}, **self.auth_headers)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([message.id for message in self.message_objects], [message['id'] for message in json.loads(response.content)['messages']])
+
+        self.assertEqual([self.message_objects[0].id], self.get_message_ids(self.auth_headers))
+
+    def test_reads_outside_requests_go_to_primary(self):
+        """
+        A method to test that reads made outside of requests, such as by background workers, go to the primary.
+        """
+        router = ReplicaRouter()
+
+        self.assertEqual('default', router.db_for_read(None))
+        self.assertFalse(router.allow_migrate(REPLICA, 'cable_api'))
+        self.assertIsNone(router.allow_migrate('default', 'cable_api'))
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        transaction.set_rollback(True, using = REPLICA)
+
+        self.replica_atomic.__exit__(None, None, None)
+
+        cache.clear()
+
+        shutil.rmtree('cable_api/tests/media')
@@ -0,0 +1,90 @@
+import shutil
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from cable_api.factory import UserFactory, ChatFactory, ParticipantFactory, MessageFactory
+from cable_api.models import Message, ArchivedMessage
+from cable_api.renderers import ORJSONRenderer
+from cable_api.serializers import MessageSerializer, message_values, message_row, serialize_message_values
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestSerializeMessageValues(TestCase):
+    """
+    A class to test that the fast path of serialize_message_values returns the same data as the message serializer.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create()
+        self.test_user = UserFactory.create()
+        self.chat_object = ChatFactory.create()
+        ParticipantFactory(model_user = self.auth_user, chat = self.chat_object)
+        ParticipantFactory(model_user = self.test_user, chat = self.chat_object)
+        MessageFactory.create_batch(10, sender = self.auth_user, chat = self.chat_object)
+
+        contents = ['emoji 😀 and accents éàü', 'line\nbreaks\tand\rcontrol \x00\x1f', 'quotes " and \\ backslashes', '']
+
+        for content in contents:
+
+            MessageFactory.create(sender = self.test_user, chat = self.chat_object, content = content)
+
+        # A date on a whole second is written without microseconds.
+        Message.objects.filter(id = Message.objects.order_by('id').first().id).update(date_created = timezone.now().replace(microsecond = 0) - timedelta(days = 1))
+
+    def assertSerializesIdentically(self, queryset):
+        """
+        A method to assert that the fast path returns the same data as the message serializer for a queryset, and that both render to the same json.
+        """
+        queryset = queryset.order_by('date_created', 'id')
+
+        expected = MessageSerializer(queryset, many=True).data
+        serialized = serialize_message_values(message_values(queryset))
+
+        self.assertEqual(expected, serialized)
+        self.assertEqual(JSONRenderer().render(expected), JSONRenderer().render(serialized))
+        self.assertEqual(ORJSONRenderer().render(expected), ORJSONRenderer().render(serialized))
+
+    def test_serialize_messages(self):
+        """
+        A method to test serializing the values of messages.
+        """
+        self.assertSerializesIdentically(Message.objects.filter(chat = self.chat_object))
+
+    def test_serialize_archived_messages(self):
+        """
+        A method to test serializing the values of archived messages, which are read with their content compressed.
+        """
+        ArchivedMessage.objects.archive_messages(timezone.now())
+
+        self.assertTrue(ArchivedMessage.objects.exists())
+        self.assertSerializesIdentically(ArchivedMessage.objects.filter(chat = self.chat_object))
+
+    def test_serialize_in_other_timezone(self):
+        """
+        A method to test that dates are written in the current timezone like the message serializer writes them.
+        """
+        with timezone.override('Asia/Kolkata'):
+
+            self.assertSerializesIdentically(Message.objects.filter(chat = self.chat_object))
+
+    def test_serialize_message_row(self):
+        """
+        A method to test serializing a message object through the row of its values.
+        """
+        for message in Message.objects.filter(chat = self.chat_object):
+
+            self.assertEqual([MessageSerializer(message).data], serialize_message_values([message_row(message)]))
+
+    def test_serialize_no_messages(self):
+        """
+        A method to test that no rows serialize to an empty list.
+        """
+        self.assertEqual([], serialize_message_values(message_values(Message.objects.none())))
+
+    def tearDown(self):
+        """
+        A method to delete the media created by the factories after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
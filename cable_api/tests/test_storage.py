@@ -0,0 +1,66 @@
+import os
+import time
+import hashlib
+import shutil
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, override_settings
+from cable_api.storage import ContentAddressedStorage
+
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media')
+class TestContentAddressedStorage(SimpleTestCase):
+    """
+    A class to test the storage that names files by the hash of their content.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.storage = ContentAddressedStorage()
+
+    def test_save_names_file_by_content(self):
+        """
+        A method to test that a saved file is named by the hash of its content and keeps its extension.
+        """
+        digest = hashlib.sha256(b'test content').hexdigest()
+
+        name = self.storage.save('users/test@test.com/profile_image/profile_image.JPG', ContentFile(b'test content'))
+
+        self.assertEqual(f'blobs/{digest[:2]}/{digest}.jpg', name)
+        self.assertTrue(self.storage.is_content_addressed(name))
+
+        with self.storage.open(name) as saved_file:
+
+            self.assertEqual(b'test content', saved_file.read())
+
+    def test_save_deduplicates_identical_files(self):
+        """
+        A method to test that identical files are stored once under the same name and that different files get different names.
+        """
+        first_name = self.storage.save('first.jpg', ContentFile(b'test content'))
+        second_name = self.storage.save('second.jpg', ContentFile(b'test content'))
+        other_name = self.storage.save('first.jpg', ContentFile(b'other content'))
+
+        _, filenames = self.storage.listdir(f'blobs/{first_name.split("/")[1]}')
+
+        self.assertEqual(first_name, second_name)
+        self.assertNotEqual(first_name, other_name)
+        self.assertEqual([first_name.split('/')[-1]], filenames)
+        self.assertTrue(self.storage.exists(other_name))
+
+    def test_save_refreshes_modification_time_of_identical_file(self):
+        """
+        A method to test that saving a file that is already stored refreshes its modification time, so that unused media collection gives it a new grace period.
+        """
+        name = self.storage.save('first.jpg', ContentFile(b'test content'))
+
+        os.utime(self.storage.path(name), (0, 0))
+
+        self.storage.save('second.jpg', ContentFile(b'test content'))
+
+        self.assertGreater(os.path.getmtime(self.storage.path(name)), time.time() - 60)
+
+    def tearDown(self):
+        """
+        A method to delete data and revert the changes made using the setup method after each test run.
+        """
+        shutil.rmtree('cable_api/tests/media')
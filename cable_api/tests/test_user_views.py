@@ -1,10 +1,13 @@
+import hashlib
 import json
 import shutil
+from PIL import Image
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 from django.test import override_settings
 from cable_api.factory import UserFactory
+from cable_api.images import get_image_processing_backend
 from cable_api.serializers import UserSerializer
 from django.contrib.auth import get_user_model
 from cable_api.tests.test_helpers import get_auth_headers, create_temp_image
@@ -36,18 +39,58 @@ class TestUsersView(APITestCase):
                 'id': user.id,
                 'user_name': user.user_name,
                 'email_address': user.email_address,
-                'profile_image': user.profile_image.url
+                'profile_image': user.profile_image.url,
+                'profile_thumbnail_webp': None,
+                'profile_thumbnail_jpeg': None,
             }
 
             users_list.append(user_dict)
 
-        expected_response = {'users': users_list}
+        expected_response = {'users': users_list, 'next': None, 'previous': None}
 
         response = self.client.get(endpoint)
 
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
 
+    def test_users_GET_paginated(self):
+        """
+        A method to test paging through the GET method of the "api/users/" endpoint.
+        """
+        endpoint = reverse('users')
+
+        response = self.client.get(endpoint, {'limit': 3})
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([user.id for user in self.user_objects[:3]], [user['id'] for user in response_dict['users']])
+
+        response = self.client.get(endpoint, {'limit': 3, 'after': response_dict['next']})
+
+        response_dict = json.loads(response.content)
+
+        self.assertEqual([user.id for user in self.user_objects[3:]], [user['id'] for user in response_dict['users']])
+        self.assertEqual(None, response_dict['next'])
+
+    def test_users_GET_search(self):
+        """
+        A method to test searching the GET method of the "api/users/" endpoint by the prefix of user names and email addresses.
+        """
+        endpoint = reverse('users')
+
+        user_object = self.user_factory.create(user_name = 'Searchable', email_address = 'someone@search.com')
+        email_object = self.user_factory.create(user_name = 'other', email_address = 'search@test.com')
+        self.user_factory.create(user_name = 'not_searchable', email_address = 'nobody@search.com')
+
+        response = self.client.get(endpoint, {'search': 'sEaRcH'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([user_object.id, email_object.id], [user['id'] for user in json.loads(response.content)['users']])
+
+        response = self.client.get(endpoint, {'search': 'missing'})
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
     def test_users_POST(self):
         """
         A method to test the POST method of the "api/users/" endpoint.
@@ -124,6 +167,8 @@ class TestUserView(APITestCase):
             'user_name': self.auth_user.user_name,
             'email_address': self.auth_user.email_address,
             'profile_image': self.auth_user.profile_image.url,
+            'profile_thumbnail_webp': None,
+            'profile_thumbnail_jpeg': None,
         }
 
         expected_response = {'user': user_dict}
@@ -140,6 +185,10 @@ class TestUserView(APITestCase):
         endpoint = reverse('user', kwargs={'user_id': self.auth_user.id})
 
         profile_image = create_temp_image('updated_profile_image')
+
+        image_hash = hashlib.sha256(profile_image.read()).hexdigest()
+
+        profile_image.seek(0)
         
         request_dict = {
             'user_name': 'updated_username',
@@ -151,16 +200,69 @@ class TestUserView(APITestCase):
             'id': self.auth_user.id,
             'user_name': 'updated_username',
             'email_address': self.auth_user.email_address,
-            'profile_image': '/media/updated_profile_image.jpg',
+            'profile_image': '/media/blobs/{0}/{1}.jpg'.format(image_hash[:2], image_hash),
+            'profile_thumbnail_webp': None,
+            'profile_thumbnail_jpeg': None,
         }
  
         expected_response = {'updated_user': user_dict}
 
         response = self.client.patch(endpoint, request_dict, format='multipart', **self.auth_headers)
 
+        updated_user = get_user_model().objects.get(id = self.auth_user.id)
+
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertEqual(expected_response, json.loads(response.content))
+        self.assertEqual((100, 100), (updated_user.profile_image.width, updated_user.profile_image.height))
+
+    @override_settings(IMAGE_PROCESSING_BACKEND = 'cable_api.images.SynchronousImageProcessingBackend')
+    def test_user_view_PATCH_profile_thumbnails(self):
+        """
+        A method to test that the PATCH method of the "api/users/user_id/" endpoint responds before the thumbnails of a new profile image are generated, and queues their generation once it commits.
+        """
+        endpoint = reverse('user', kwargs={'user_id': self.auth_user.id})
+
+        get_image_processing_backend.cache_clear()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+
+            response = self.client.patch(endpoint, {'profile_image': create_temp_image()}, format='multipart', **self.auth_headers)
+
+            response_dict = json.loads(response.content)['updated_user']
+
+        get_image_processing_backend.cache_clear()
+
+        updated_user = get_user_model().objects.get(id = self.auth_user.id)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(callbacks))
+        self.assertEqual((None, None), (response_dict['profile_thumbnail_webp'], response_dict['profile_thumbnail_jpeg']))
+        self.assertRegex(updated_user.profile_thumbnail_webp.name, r'^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.webp$')
+        self.assertRegex(updated_user.profile_thumbnail_jpeg.name, r'^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+
+        for thumbnail, image_format in [(updated_user.profile_thumbnail_webp, 'WEBP'), (updated_user.profile_thumbnail_jpeg, 'JPEG')]:
+
+            with Image.open(thumbnail) as image:
+
+                self.assertEqual((image_format, (128, 128)), (image.format, image.size))
         
+    def test_user_view_PATCH_query_count(self):
+        """
+        A method to test that the PATCH method of the "api/users/user_id/" endpoint updates and reads back the user in one query and moves its modification date.
+        """
+        endpoint = reverse('user', kwargs={'user_id': self.auth_user.id})
+
+        # One query to authenticate the user and one to update and return the user.
+        with self.assertNumQueries(2):
+
+            response = self.client.patch(endpoint, {'user_name': 'updated_username'}, format='multipart', **self.auth_headers)
+
+        updated_user = get_user_model().objects.get(id = self.auth_user.id)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('updated_username', updated_user.user_name)
+        self.assertLess(self.auth_user.date_modified, updated_user.date_modified)
+
     def test_user_view_DELETE(self):
         """
         A method to test the DELETE method of the "api/users/user_id/" endpoint.
@@ -183,6 +285,47 @@ class TestUserView(APITestCase):
         """
         shutil.rmtree('cable_api/tests/media')
 
+@override_settings(MEDIA_ROOT = 'cable_api/tests/media', IMAGE_PROCESSING_BACKEND = 'cable_api.images.SynchronousImageProcessingBackend')
+class TestUserViewProfileThumbnails(APITransactionTestCase):
+    """
+    A class to test generating the thumbnails of a profile image through the "api/users/user_id/" endpoint outside of a test transaction, where a job queued on commit starts straight away.
+    """
+    def setUp(self):
+        """
+        A method to define the base setup for this test class.
+        """
+        self.auth_user = UserFactory.create()
+        self.auth_headers = get_auth_headers(self.client, self.auth_user)
+
+        get_image_processing_backend.cache_clear()
+
+    def test_user_view_PATCH_profile_thumbnails(self):
+        """
+        A method to test that the thumbnails generated after the PATCH method of the "api/users/user_id/" endpoint belong to the new profile image and are kept.
+        """
+        endpoint = reverse('user', kwargs={'user_id': self.auth_user.id})
+
+        response = self.client.patch(endpoint, {'profile_image': create_temp_image()}, format='multipart', **self.auth_headers)
+
+        updated_user = get_user_model().objects.get(id = self.auth_user.id)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertRegex(updated_user.profile_thumbnail_webp.name, r'^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.webp$')
+        self.assertRegex(updated_user.profile_thumbnail_jpeg.name, r'^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+
+        with Image.open(updated_user.profile_image) as image, Image.open(updated_user.profile_thumbnail_jpeg) as thumbnail:
+
+            self.assertEqual((100, 100), image.size)
+            self.assertEqual((128, 128), thumbnail.size)
+
+    def tearDown(self):
+        """
+        A method to delete the media created by the test and the image processing backend it used after each test run.
+        """
+        get_image_processing_backend.cache_clear()
+
+        shutil.rmtree('cable_api/tests/media')
+
 @override_settings(MEDIA_ROOT = 'cable_api/tests/media')
 class TestUserWhenObjectsDontExist(APITestCase):
     """
@@ -1,14 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from cable_api.views import user_views, chat_views, message_views
+from cable_api.views import user_views, chat_views, message_views, async_views
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+# The endpoints with a native async view are served by it instead of the sync one when ASYNC_VIEWS is set.
+if settings.ASYNC_VIEWS:
+
+    chats_view, messages_view, message_view = async_views.chats_view, async_views.messages_view, async_views.message_view
+
+else:
+
+    chats_view, messages_view, message_view = chat_views.chats_view, message_views.messages_view, message_views.message_view
+
 urlpatterns = [
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('users/', user_views.users_view, name='users'),
     path('users/<int:user_id>/', user_views.user_view, name='user'),
-    path('chats/', chat_views.chats_view, name='chats'),
+    path('chats/', chats_view, name='chats'),
+    path('messages/search/', message_views.messages_search_view, name='messages_search'),
     path('chats/<int:chat_id>/', chat_views.chat_view, name='chat'),
-    path('chats/<int:chat_id>/messages/', message_views.messages_view, name='messages'),
-    path('chats/<int:chat_id>/messages/<int:message_id>/', message_views.message_view, name='message')
+    path('chats/<int:chat_id>/read/', chat_views.chat_read_view, name='chat_read'),
+    path('chats/<int:chat_id>/export/', chat_views.chat_export_view, name='chat_export'),
+    path('chats/<int:chat_id>/messages/', messages_view, name='messages'),
+    path('chats/<int:chat_id>/messages/batch/', message_views.messages_batch_view, name='messages_batch'),
+    path('chats/<int:chat_id>/messages/<int:message_id>/', message_view, name='message')
 ]
\ No newline at end of file
@@ -0,0 +1,184 @@
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.response import Response
+from django.conf import settings
+from cable_api.models import Chat, Message, MessageTombstone, ArchivedMessage, direct_chat_key
+from cable_api.serializers import ChatSerializer, EmailSerializer, MessageSerializer, message_values, message_row, serialize_message_values
+from cable_api.pagination import get_sync_token, decode_sync_token
+from cable_api.routers import read_from_primary
+from cable_api.broadcast import publish_chat_event
+from cable_api.views.view_helpers import *
+
+@async_api_view(['GET', 'POST'])
+async def chats_view(request):
+    """
+    A function that defines the "api/chats/" endpoint as a native async view.
+    """
+    if request.method == 'GET':
+
+        chats = Chat.objects.with_related().filter(participants__model_user = request.user)
+
+        chats, next_cursor, previous_cursor = await aget_object_page_or_404(chats, request, ordering = ('-last_activity', '-id'))
+
+        chat_serializer = ChatSerializer(chats, many=True, context={'user': request.user})
+
+        response_dict = {'chats': chat_serializer.data, 'next': next_cursor, 'previous': previous_cursor}
+
+        return Response(response_dict, status=status.HTTP_200_OK)
+
+    elif request.method == 'POST':
+
+        email_serializer = EmailSerializer(data=request.data)
+        email_serializer.is_valid(raise_exception=True)
+
+        chat_serializer = ChatSerializer(data=request.data)
+        await avalidate(chat_serializer)
+
+        emails = email_serializer.validated_data.get('email_addresses') or [email_serializer.validated_data['email_address']]
+
+        chat_users = await aget_users_by_email_or_404(emails)
+
+        for email in emails:
+
+            compare_email(email, request.user.email_address)
+
+        direct_key = None
+
+        # A chat with a single other user is a direct chat, of which there can only be one per pair of users.
+        if len(chat_users) == 1:
+
+            await acheck_chat_exists(chat_users[0], request.user)
+
+            direct_key = direct_chat_key(request.user.id, chat_users[0].id)
+
+        # The chat and its participants are created in a transaction, which the async interface of the ORM can't run.
+        new_chat, created = await sync_to_async(create_chat)(chat_serializer.validated_data, request.user, chat_users, direct_key)
+
+        chat_serializer = ChatSerializer(new_chat, context={'user': request.user})
+
+        response_dict = {'new_chat': chat_serializer.data}
+
+        if not created:
+
+            # A request that lost the race to create the same direct chat returns the chat the other request created.
+            return Response(response_dict, status=status.HTTP_200_OK)
+
+        await sync_to_async(publish_chat_event)(new_chat, 'chat.created', chat_serializer.data, new_chat)
+
+        return Response(response_dict, status=status.HTTP_201_CREATED)
+
+@async_api_view(['GET', 'POST'])
+async def messages_view(request, chat_id):
+    """
+    A function that defines the "api/chats/chat_id/messages/" endpoint as a native async view.
+    """
+    if request.method == 'GET':
+
+        chat = await aget_chat_or_404(chat_id, request.user)
+
+        sync_token = get_sync_token()
+
+        if 'since' in request.query_params:
+
+            since = decode_sync_token(request.query_params['since'], Message, 'date_modified')
+
+            # A replica can still lack rows written before the sync token, which the next sync would skip for good.
+            read_from_primary()
+
+            messages = [message async for message in message_values(Message.objects.filter(chat = chat, date_modified__gte = since).order_by('date_modified', 'id'))[:settings.SYNC_LIMIT + 1]]
+
+            deleted = [message_id async for message_id in MessageTombstone.objects.filter(chat = chat, date_deleted__gte = since).order_by('date_deleted', 'message_id').values_list('message_id', flat=True)[:settings.SYNC_LIMIT + 1]]
+
+            if len(messages) + len(deleted) > settings.SYNC_LIMIT:
+
+                # A stale token would otherwise load every change since, so the client reloads the chat through its pages instead.
+                response_dict = {'messages': [], 'deleted': [], 'resync': True, 'sync_token': sync_token}
+
+                return Response(response_dict, status=status.HTTP_200_OK)
+
+            response_dict = {'messages': serialize_message_values(messages), 'deleted': deleted, 'resync': False, 'sync_token': sync_token}
+
+            return Response(response_dict, status=status.HTTP_200_OK)
+
+        # A page without a cursor holds the newest messages. Archived messages are all older than the live ones, so pages read backwards only query the archive once they run past the live messages.
+        messages = [message_values(ArchivedMessage.objects.filter(chat = chat)), message_values(Message.objects.filter(chat = chat))]
+
+        messages, next_cursor, previous_cursor = await aget_object_page_or_404(messages, request, ordering = ('date_created', 'id'), from_latest = True)
+
+        response_dict = {'messages': serialize_message_values(messages), 'next': next_cursor, 'previous': previous_cursor, 'sync_token': sync_token}
+
+        return Response(response_dict, status=status.HTTP_200_OK)
+
+    if request.method == 'POST':
+
+        message_serializer = MessageSerializer(data=request.data)
+        await avalidate(message_serializer)
+
+        chat = await aget_chat_or_404(chat_id, request.user)
+
+        # The message is created in a transaction along with the activity of its chat, which the async interface of the ORM can't run.
+        [(new_message, created)] = await sync_to_async(create_messages)(chat, request.user, [message_serializer.validated_data])
+
+        message_serializer = MessageSerializer(new_message)
+
+        response_dict = {'new_message': message_serializer.data}
+
+        if not created:
+
+            # A retry of a message that was already sent returns the original message.
+            return Response(response_dict, status=status.HTTP_200_OK)
+
+        await sync_to_async(publish_chat_event)(chat, 'message.created', message_serializer.data, new_message)
+
+        return Response(response_dict, status=status.HTTP_201_CREATED)
+
+@async_api_view(['GET', 'PATCH', 'DELETE'])
+async def message_view(request, chat_id, message_id):
+    """
+    A function that defines the "api/chats/chat_id/messages/message_id/" endpoint as a native async view.
+    """
+    if request.method == 'GET':
+
+        chat, message = await aget_chat_message_or_archived_or_404(chat_id, message_id, request.user)
+
+        [message_data] = serialize_message_values([message_row(message)])
+
+        response_dict = {'message': message_data}
+
+        return Response(response_dict, status=status.HTTP_200_OK)
+
+    if request.method == 'PATCH':
+
+        message_serializer = MessageSerializer(data=request.data)
+        await avalidate(message_serializer)
+
+        update_data = clean_serializer_data(message_serializer.validated_data)
+
+        update_data.pop('client_id', None)
+
+        updated_message = await sync_to_async(update_message)(chat_id, message_id, request.user, update_data)
+
+        if not updated_message:
+
+            # Raises the same exception a lookup before the update would have.
+            await aget_chat_message_or_404(chat_id, message_id, request.user)
+
+            raise NotFound('This object does not exist.')
+
+        message_serializer = MessageSerializer(updated_message)
+
+        await sync_to_async(publish_chat_event)(updated_message.chat_id, 'message.updated', message_serializer.data, updated_message)
+
+        response_dict = {'updated_message': message_serializer.data}
+
+        return Response(response_dict, status=status.HTTP_200_OK)
+
+    if request.method == 'DELETE':
+
+        chat, message = await aget_chat_message_or_404(chat_id, message_id, request.user)
+
+        await sync_to_async(delete_message)(chat, message)
+
+        response_dict = {'detail': 'This object has been deleted.'}
+
+        return Response(response_dict, status=status.HTTP_200_OK)
@@ -1,10 +1,14 @@
+import re
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.contrib.auth import get_user_model
-from cable_api.models import Chat, Participant
-from cable_api.serializers import ChatSerializer, EmailSerializer
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from cable_api.models import Chat, Participant, Message, ArchivedMessage, direct_chat_key
+from cable_api.serializers import ChatSerializer, EmailSerializer, ReadPositionSerializer
+from cable_api.broadcast import publish_chat_event
+from cable_api.exports import EXPORT_CONTENT_TYPES, export_chat
 from cable_api.views.view_helpers import *
 
 @api_view(['GET', 'POST'])
@@ -15,11 +19,13 @@ def chats_view(request):
     """
     if request.method == 'GET':
 
-        chats = get_object_list_or_404(Chat, participants__model_user = request.user)
+        chats = Chat.objects.with_related().filter(participants__model_user = request.user)
 
-        chat_serializer = ChatSerializer(chats, many=True)
+        chats, next_cursor, previous_cursor = get_object_page_or_404(chats, request, ordering = ('-last_activity', '-id'))
+
+        chat_serializer = ChatSerializer(chats, many=True, context={'user': request.user})
         
-        response_dict = {'chats': chat_serializer.data}
+        response_dict = {'chats': chat_serializer.data, 'next': next_cursor, 'previous': previous_cursor}
 
         return Response(response_dict, status=status.HTTP_200_OK)
     
@@ -31,21 +37,36 @@ def chats_view(request):
         chat_serializer = ChatSerializer(data=request.data)
         chat_serializer.is_valid(raise_exception=True)
 
-        chat_user = get_object_or_404(get_user_model(), email_address = email_serializer.validated_data['email_address'])
+        emails = email_serializer.validated_data.get('email_addresses') or [email_serializer.validated_data['email_address']]
 
-        compare_email(email_serializer.validated_data['email_address'], request.user.email_address)
-        
-        check_chat_exists(chat_user, request.user)
+        chat_users = get_users_by_email_or_404(emails)
+
+        for email in emails:
+
+            compare_email(email, request.user.email_address)
+
+        direct_key = None
+
+        # A chat with a single other user is a direct chat, of which there can only be one per pair of users.
+        if len(chat_users) == 1:
 
-        new_chat = Chat.objects.create(**chat_serializer.validated_data)
+            check_chat_exists(chat_users[0], request.user)
 
-        Participant.objects.create(model_user = request.user, chat = new_chat)
-        Participant.objects.create(model_user = chat_user, chat = new_chat)
+            direct_key = direct_chat_key(request.user.id, chat_users[0].id)
 
-        chat_serializer = ChatSerializer(new_chat)
+        new_chat, created = create_chat(chat_serializer.validated_data, request.user, chat_users, direct_key)
+
+        chat_serializer = ChatSerializer(new_chat, context={'user': request.user})
 
         response_dict = {'new_chat': chat_serializer.data}
 
+        if not created:
+
+            # A request that lost the race to create the same direct chat returns the chat the other request created.
+            return Response(response_dict, status=status.HTTP_200_OK)
+
+        publish_chat_event(new_chat, 'chat.created', chat_serializer.data, new_chat)
+
         return Response(response_dict, status=status.HTTP_201_CREATED)
     
 @api_view(['GET', 'PATCH', 'DELETE'])
@@ -56,11 +77,9 @@ def chat_view(request, chat_id):
     """
     if request.method == 'GET':
 
-        chat = get_object_or_404(Chat, id = chat_id)
-        
-        check_object_perms(chat, participants__model_user = request.user)
+        chat = get_chat_or_404(chat_id, request.user, chats = Chat.objects.with_related())
            
-        chat_serializer = ChatSerializer(chat)
+        chat_serializer = ChatSerializer(chat, context={'user': request.user})
 
         response_dict = {'chat': chat_serializer.data}
 
@@ -71,17 +90,20 @@ def chat_view(request, chat_id):
         chat_serializer = ChatSerializer(data=request.data)  
         chat_serializer.is_valid(raise_exception=True)
         
-        chat = get_object_or_404(Chat, id = chat_id)
-
-        check_object_perms(chat, participants__model_user = request.user)
-
         update_data = clean_serializer_data(chat_serializer.validated_data)            
                     
-        Chat.objects.filter(id = chat_id).update(**update_data)
+        updated_chat = update_returning(Chat.objects.filter(id = chat_id, participants__model_user = request.user), **update_data)
+
+        if not updated_chat:
+
+            # Raises the same exception a lookup before the update would have.
+            get_chat_or_404(chat_id, request.user)
+
+            raise NotFound('This object does not exist.')
         
-        updated_chat = Chat.objects.get(id = chat_id)       
+        Chat.objects.fetch_related([updated_chat])
 
-        chat_serializer = ChatSerializer(updated_chat)    
+        chat_serializer = ChatSerializer(updated_chat, context={'user': request.user})    
 
         response_dict = {'updated_chat': chat_serializer.data} 
     
@@ -89,12 +111,67 @@ def chat_view(request, chat_id):
     
     elif request.method == 'DELETE':
         
-        chat = get_object_or_404(Chat, id = chat_id)
-
-        check_object_perms(chat, participants__model_user = request.user)
+        chat = get_chat_or_404(chat_id, request.user)
         
         chat.delete()
 
         response_dict = {'detail': 'This object has been deleted.'}
 
-        return Response(response_dict, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(response_dict, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated]) 
+def chat_read_view(request, chat_id):
+    """
+    A function that defines the "api/chats/chat_id/read/" endpoint.
+    """
+    read_position_serializer = ReadPositionSerializer(data=request.data)
+    read_position_serializer.is_valid(raise_exception=True)
+
+    chat = get_chat_or_404(chat_id, request.user)
+
+    message_id = read_position_serializer.validated_data['last_read_id']
+
+    # A message that has since been archived can still be marked as read.
+    if not Message.objects.filter(id = message_id, chat = chat).exists():
+
+        get_object_or_404(ArchivedMessage, id = message_id, chat = chat)
+
+    Participant.objects.mark_read(chat.id, request.user.id, message_id)
+
+    participant = Participant.objects.get(chat = chat, model_user = request.user)
+
+    read_position_serializer = ReadPositionSerializer(participant)
+
+    response_dict = {'read_position': read_position_serializer.data}
+
+    return Response(response_dict, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated]) 
+def chat_export_view(request, chat_id):
+    """
+    A function that defines the "api/chats/chat_id/export/" endpoint.
+    """
+    chat = get_chat_or_404(chat_id, request.user)
+
+    # The "format" query parameter is reserved by the api for picking a renderer.
+    export_format = request.query_params.get('export_format', 'ndjson')
+
+    if export_format not in EXPORT_CONTENT_TYPES:
+
+        raise ParseError('Invalid export format.')
+
+    gzip = bool(re.search(r'\bgzip\b', request.META.get('HTTP_ACCEPT_ENCODING', '')))
+
+    response = StreamingHttpResponse(export_chat(chat, export_format, gzip = gzip), content_type=EXPORT_CONTENT_TYPES[export_format])
+
+    response['Content-Disposition'] = f'attachment; filename="chat_{chat.id}.{export_format}"'
+
+    if gzip:
+
+        response['Content-Encoding'] = 'gzip'
+
+    patch_vary_headers(response, ('Accept-Encoding',))
+
+    return response
\ No newline at end of file
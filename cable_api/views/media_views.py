@@ -0,0 +1,204 @@
+import os
+import re
+import stat
+import mimetypes
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from cable_api.storage import ContentAddressedStorage
+
+# The headers that hand the sending of a file to the front server, by the value of MEDIA_SENDFILE_BACKEND.
+SENDFILE_HEADERS = {
+    'x-accel-redirect': 'X-Accel-Redirect',
+    'x-sendfile': 'X-Sendfile',
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+class RangeNotSatisfiable(Exception):
+    """
+    A class that defines the exception raised when a requested byte range lies outside of the file.
+    """
+
+def parse_byte_range(header, size):
+    """
+    A function that:
+    - Parses the value of a Range header for a file of the given size into the inclusive (start, end) offsets it asks for.
+    - Returns None when the header is missing, malformed or asks for several ranges, in which case the whole file is sent.
+    - Raises an exception if the range does not overlap the file.
+    """
+    match = RANGE_RE.match(header.strip())
+
+    if not match or match.groups() == ('', ''):
+
+        return None
+
+    start, end = match.groups()
+
+    if not start:
+
+        # A suffix range asks for the last bytes of the file.
+        length = int(end)
+
+        if length == 0 or size == 0:
+
+            raise RangeNotSatisfiable
+
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+
+    if start > end:
+
+        raise RangeNotSatisfiable
+
+    return start, end
+
+def if_range_passes(request, etag, last_modified):
+    """
+    A function that checks the If-Range header of a request, which only lets a range be sent if the file is still the version the client has part of.
+    """
+    if_range = request.META.get('HTTP_IF_RANGE')
+
+    if not if_range:
+
+        return True
+
+    if if_range.startswith('"'):
+
+        return if_range == etag
+
+    return parse_http_date_safe(if_range) == last_modified
+
+def read_file_range(file, start, length):
+    """
+    A function that yields a range of bytes of a file in chunks and closes the file once done.
+    """
+    with file:
+
+        file.seek(start)
+
+        while length > 0:
+
+            chunk = file.read(min(MEDIA_CHUNK_SIZE, length))
+
+            if not chunk:
+
+                break
+
+            length -= len(chunk)
+
+            yield chunk
+
+def get_media_etag(path, file_stat):
+    """
+    A function that returns the entity tag of a media file, which is the hash in its name for content addressed files and is built from its modification time and size otherwise.
+    """
+    if ContentAddressedStorage().is_content_addressed(path):
+
+        return '"{}"'.format(os.path.splitext(os.path.basename(path))[0])
+
+    return f'"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"'
+
+def send_media_file(request, full_path, path, file_stat, etag, last_modified):
+    """
+    A function that:
+    - Hands the file to the front server with the header of MEDIA_SENDFILE_BACKEND when one is configured, so no worker is busy while it is sent.
+    - Otherwise sends the file itself, or the byte range of it that was requested.
+    """
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    backend = settings.MEDIA_SENDFILE_BACKEND
+
+    if backend:
+
+        if backend not in SENDFILE_HEADERS:
+
+            raise ImproperlyConfigured(f'MEDIA_SENDFILE_BACKEND must be one of {", ".join(SENDFILE_HEADERS)} or None.')
+
+        response = HttpResponse(content_type=content_type)
+
+        if backend == 'x-accel-redirect':
+
+            response[SENDFILE_HEADERS[backend]] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + path)
+
+        else:
+
+            response[SENDFILE_HEADERS[backend]] = full_path
+
+        return response
+
+    size = file_stat.st_size
+
+    try:
+        byte_range = parse_byte_range(request.META.get('HTTP_RANGE', ''), size) if if_range_passes(request, etag, last_modified) else None
+
+    except RangeNotSatisfiable:
+
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+
+        return response
+
+    if byte_range is None:
+
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    else:
+
+        start, end = byte_range
+
+        response = StreamingHttpResponse(read_file_range(open(full_path, 'rb'), start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+
+    response['Accept-Ranges'] = 'bytes'
+
+    return response
+
+@require_safe
+def media_view(request, path):
+    """
+    A function that:
+    - Checks that the path is a file inside MEDIA_ROOT, which is where any authorization of media requests belongs.
+    - Answers conditional requests whose copy is still current with a 304 before any file is opened.
+    - Sends the file, handing it to the front server when one is configured.
+    - Marks files named by the hash of their content as immutable so browsers and CDNs cache them without revalidating, since a change of content gives them a new url.
+    """
+    full_path = ContentAddressedStorage().path(path)
+
+    try:
+        file_stat = os.stat(full_path)
+
+    except OSError:
+
+        raise Http404('This object does not exist.')
+
+    if not stat.S_ISREG(file_stat.st_mode):
+
+        raise Http404('This object does not exist.')
+
+    etag = get_media_etag(path, file_stat)
+    last_modified = int(file_stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+
+        response = send_media_file(request, full_path, path, file_stat, etag, last_modified)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+
+    if ContentAddressedStorage().is_content_addressed(path):
+
+        response['Cache-Control'] = f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable'
+
+    return response
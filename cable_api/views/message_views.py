@@ -2,8 +2,14 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from cable_api.models import Chat, Message
-from cable_api.serializers import MessageSerializer
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from cable_api.models import Message, MessageTombstone, ArchivedMessage
+from cable_api.serializers import MessageSerializer, message_values, message_row, serialize_message_values
+from cable_api.pagination import get_sync_token, decode_sync_token
+from cable_api.routers import read_from_primary
+from cable_api.broadcast import publish_chat_event, publish_chat_events
+from cable_api.search import search_messages, format_snippet
 from cable_api.views.view_helpers import *
               
 @api_view(['GET', 'POST'])
@@ -14,15 +20,38 @@ def messages_view(request, chat_id):
     """
     if request.method == 'GET':
         
-        chat = get_object_or_404(Chat, id = chat_id)
-        
-        check_object_perms(chat, participants__model_user = request.user)
+        chat = get_chat_or_404(chat_id, request.user)
+
+        sync_token = get_sync_token()
+
+        if 'since' in request.query_params:
+
+            since = decode_sync_token(request.query_params['since'], Message, 'date_modified')
+
+            # A replica can still lack rows written before the sync token, which the next sync would skip for good.
+            read_from_primary()
+
+            messages = list(message_values(Message.objects.filter(chat = chat, date_modified__gte = since).order_by('date_modified', 'id'))[:settings.SYNC_LIMIT + 1])
+
+            deleted = list(MessageTombstone.objects.filter(chat = chat, date_deleted__gte = since).order_by('date_deleted', 'message_id').values_list('message_id', flat=True)[:settings.SYNC_LIMIT + 1])
+
+            if len(messages) + len(deleted) > settings.SYNC_LIMIT:
 
-        messages = get_object_list_or_404(Message, chat = chat)
+                # A stale token would otherwise load every change since, so the client reloads the chat through its pages instead.
+                response_dict = {'messages': [], 'deleted': [], 'resync': True, 'sync_token': sync_token}
+
+                return Response(response_dict, status=status.HTTP_200_OK)
+
+            response_dict = {'messages': serialize_message_values(messages), 'deleted': deleted, 'resync': False, 'sync_token': sync_token}
+
+            return Response(response_dict, status=status.HTTP_200_OK)
+
+        # A page without a cursor holds the newest messages. Archived messages are all older than the live ones, so pages read backwards only query the archive once they run past the live messages.
+        messages = [message_values(ArchivedMessage.objects.filter(chat = chat)), message_values(Message.objects.filter(chat = chat))]
+
+        messages, next_cursor, previous_cursor = get_object_page_or_404(messages, request, ordering = ('date_created', 'id'), from_latest = True)
             
-        message_serializer = MessageSerializer(messages, many=True)
-        
-        response_dict = {'messages': message_serializer.data}
+        response_dict = {'messages': serialize_message_values(messages), 'next': next_cursor, 'previous': previous_cursor, 'sync_token': sync_token}
 
         return Response(response_dict, status=status.HTTP_200_OK)
 
@@ -31,18 +60,83 @@ def messages_view(request, chat_id):
         message_serializer = MessageSerializer(data=request.data)
         message_serializer.is_valid(raise_exception=True)
 
-        chat = get_object_or_404(Chat, id = chat_id)
+        chat = get_chat_or_404(chat_id, request.user)
         
-        check_object_perms(chat, participants__model_user = request.user)
-        
-        new_message = Message.objects.create(sender = request.user, chat = chat, **message_serializer.validated_data)
+        [(new_message, created)] = create_messages(chat, request.user, [message_serializer.validated_data])
         
         message_serializer = MessageSerializer(new_message)
 
         response_dict = {'new_message': message_serializer.data}
+
+        if not created:
+
+            # A retry of a message that was already sent returns the original message.
+            return Response(response_dict, status=status.HTTP_200_OK)
+
+        publish_chat_event(chat, 'message.created', message_serializer.data, new_message)
                                 
         return Response(response_dict, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])  
+def messages_batch_view(request, chat_id):
+    """
+    A function that defines the "api/chats/chat_id/messages/batch/" endpoint.
+    """
+    messages_data = request.data.get('messages') if isinstance(request.data, dict) else None
+
+    if not isinstance(messages_data, list):
+
+        raise ParseError('A list of messages must be sent to this endpoint.')
     
+    if not 1 <= len(messages_data) <= settings.MAX_BATCH_SIZE:
+
+        raise ParseError(f'A batch must contain between 1 and {settings.MAX_BATCH_SIZE} messages.')
+
+    message_serializer = MessageSerializer(data=messages_data, many=True)
+    message_serializer.is_valid(raise_exception=True)
+
+    chat = get_chat_or_404(chat_id, request.user)
+
+    results = create_messages(chat, request.user, message_serializer.validated_data)
+
+    message_serializer = MessageSerializer([message for message, created in results], many=True)
+
+    response_results = []
+    events = []
+
+    for (message, created), message_data in zip(results, message_serializer.data):
+
+        response_results.append({'client_id': message.client_id, 'status': 'created' if created else 'duplicate', 'message': message_data})
+
+        if created:
+
+            events.append(('message.created', message_data, message))
+
+    publish_chat_events(chat, events)
+
+    response_dict = {'results': response_results}
+
+    return Response(response_dict, status=status.HTTP_201_CREATED if events else status.HTTP_200_OK)
+    
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])  
+def messages_search_view(request):
+    """
+    A function that defines the "api/messages/search/" endpoint.
+    """
+    messages = search_messages(Message.objects.filter(chat__participants__model_user = request.user), request.query_params.get('q', ''))
+
+    messages, next_cursor, previous_cursor = get_object_page_or_404(messages, request, ordering = ('-rank', '-id'))
+
+    message_serializer = MessageSerializer(messages, many=True)
+
+    results = [{'message': message_data, 'rank': message.rank, 'snippet': format_snippet(message.snippet)} for message, message_data in zip(messages, message_serializer.data)]
+
+    response_dict = {'results': results, 'next': next_cursor, 'previous': previous_cursor}
+
+    return Response(response_dict, status=status.HTTP_200_OK)
+
 @api_view(['GET', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])  
 def message_view(request, chat_id, message_id):
@@ -51,17 +145,11 @@ def message_view(request, chat_id, message_id):
     """
     if request.method == 'GET':
 
-        chat = get_object_or_404(Chat, id = chat_id)
-        
-        check_object_perms(chat, participants__model_user = request.user)
-
-        message = get_object_or_404(Message, id = message_id)
-        
-        check_object_perms(message, chat = chat)
+        chat, message = get_chat_message_or_archived_or_404(chat_id, message_id, request.user)
                 
-        message_serializer = MessageSerializer(message)
+        [message_data] = serialize_message_values([message_row(message)])
 
-        response_dict = {'message': message_serializer.data}
+        response_dict = {'message': message_data}
 
         return Response(response_dict, status=status.HTTP_200_OK)
     
@@ -70,37 +158,32 @@ def message_view(request, chat_id, message_id):
         message_serializer = MessageSerializer(data=request.data)
         message_serializer.is_valid(raise_exception=True)
 
-        chat = get_object_or_404(Chat, id = chat_id)
-        
-        check_object_perms(chat, participants__model_user = request.user)
+        update_data = clean_serializer_data(message_serializer.validated_data)    
 
-        message = get_object_or_404(Message, id = message_id)
-        
-        check_object_perms(message, chat = chat)    
+        update_data.pop('client_id', None)
 
-        update_data = clean_serializer_data(message_serializer.validated_data)    
-        
-        Message.objects.filter(id = message_id).update(**update_data)
-        
-        updated_message = Message.objects.get(id = message_id)   
+        updated_message = update_message(chat_id, message_id, request.user, update_data)
+
+        if not updated_message:
+
+            # Raises the same exception a lookup before the update would have.
+            get_chat_message_or_404(chat_id, message_id, request.user)
+
+            raise NotFound('This object does not exist.')
 
         message_serializer = MessageSerializer(updated_message)    
 
+        publish_chat_event(updated_message.chat_id, 'message.updated', message_serializer.data, updated_message)
+
         response_dict = {'updated_message': message_serializer.data} 
     
         return Response(response_dict, status=status.HTTP_200_OK)
     
     if request.method == 'DELETE':
 
-        chat = get_object_or_404(Chat, id = chat_id)
-        
-        check_object_perms(chat, participants__model_user = request.user)
-
-        message = get_object_or_404(Message, id = message_id)
-        
-        check_object_perms(message, chat = chat)   
+        chat, message = get_chat_message_or_404(chat_id, message_id, request.user)
         
-        message.delete()
+        delete_message(chat, message)
 
         response_dict = {'detail': 'This object has been deleted.'}
 
@@ -3,6 +3,9 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from django.db.models import Q
+from cable_api.authentication import invalidate_cached_user
+from cable_api.images import save_profile_image, queue_profile_thumbnails
 from cable_api.serializers import UserSerializer, UserUpdateSerializer
 from cable_api.views.view_helpers import *
 
@@ -13,11 +16,19 @@ def users_view(request):
     """
     if request.method == 'GET':
 
-        users = get_object_list_or_404(get_user_model())
+        users = get_user_model().objects.all()
+
+        search = request.query_params.get('search', '').strip()
+
+        if search:
+
+            users = users.filter(Q(user_name__istartswith = search) | Q(email_address__istartswith = search))
+
+        users, next_cursor, previous_cursor = get_object_page_or_404(users, request, ordering = ('id',))
 
         users_serializer = UserSerializer(users, many=True)
 
-        response_dict = {'users': users_serializer.data}
+        response_dict = {'users': users_serializer.data, 'next': next_cursor, 'previous': previous_cursor}
 
         return Response(response_dict, status=status.HTTP_200_OK)
     
@@ -28,6 +39,10 @@ def users_view(request):
             
         new_user = get_user_model().objects.create_user(**user_serializer.validated_data)
 
+        if new_user.profile_image:
+
+            queue_profile_thumbnails(new_user.id)
+
         user_serializer = UserSerializer(new_user)
 
         response_dict = {'new_user': user_serializer.data}
@@ -55,15 +70,29 @@ def user_view(request, user_id):
         user_update_serializer = UserUpdateSerializer(data=request.data)  
         user_update_serializer.is_valid(raise_exception=True)
         
-        user = get_object_or_404(get_user_model(), id = user_id)
+        if user_id != request.user.id:
+
+            user = get_object_or_404(get_user_model(), id = user_id)
         
-        check_user_object_perms(user, request.user)
+            check_user_object_perms(user, request.user)
              
         update_data = clean_serializer_data(user_update_serializer.validated_data)
+
+        if 'profile_image' in update_data:
+
+            # The upload is only stored here, its thumbnails are generated in the background and replace the old ones once ready.
+            update_data['profile_image'] = save_profile_image(request.user, update_data['profile_image'])
+            update_data['profile_thumbnail_webp'] = None
+            update_data['profile_thumbnail_jpeg'] = None
                          
-        get_user_model().objects.filter(id = user_id).update(**update_data)
+        updated_user = update_returning(get_user_model().objects.filter(id = request.user.id), **update_data)
 
-        updated_user = get_user_model().objects.get(id = user_id)       
+        if 'profile_image' in update_data:
+
+            # Queued only once the new image is written, since outside of a transaction the job starts straight away.
+            queue_profile_thumbnails(request.user.id)
+
+        invalidate_cached_user(request.user.id)
 
         user_serializer = UserSerializer(updated_user)    
 
@@ -79,6 +108,8 @@ def user_view(request, user_id):
         
         user.delete()
 
+        invalidate_cached_user(user_id)
+
         response_dict = {'detail': 'This object has been deleted.'}
 
         return Response(response_dict, status=status.HTTP_200_OK)
\ No newline at end of file
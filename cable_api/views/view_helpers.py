@@ -1,14 +1,38 @@
-from rest_framework.exceptions import NotFound, ParseError
-from cable_api.models import Chat
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connections, transaction
+from django.db.models import QuerySet, Exists, OuterRef
+from django.db.models.sql import UpdateQuery
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed, MethodNotAllowed, NotAuthenticated, NotFound, ParseError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from cable_api.models import Chat, Message, MessageTombstone, ArchivedMessage, Participant, direct_chat_key
+from cable_api.authentication import CachedJWTAuthentication
+from cable_api.broadcast import publish_chat_event
 from cable_api.exceptions import Unauthorized
+from cable_api.pagination import LATEST_CURSOR, paginate_querysets, apaginate_querysets
+
+def get_queryset(model):
+    """
+    A function that returns the queryset passed to it, or a queryset of all the objects of the model passed to it.
+    """
+    if isinstance(model, QuerySet):
+
+        return model
+    
+    return model.objects.all()
 
 def get_object_list_or_404(model, **filters):
     """
     A function that:
-    - Query's a model for a list of objects with the given filter arguments.
+    - Query's a model or queryset for a list of objects with the given filter arguments.
     - Returns the list of objects if they exist and raises an exception if they dont.
     """ 
-    obj_list = model.objects.filter(**filters).all()
+    obj_list = get_queryset(model).filter(**filters)
         
     if not obj_list: 
 
@@ -19,10 +43,10 @@ def get_object_list_or_404(model, **filters):
 def get_object_or_404(model, **filters):
     """
     A function that:
-    - Query's a model for a object with the given filter arguments.
+    - Query's a model or queryset for a object with the given filter arguments.
     - Returns the object if it exists and raises an exception if is doesn't.
     """
-    obj = model.objects.filter(**filters).first()
+    obj = get_queryset(model).filter(**filters).first()
         
     if not obj: 
 
@@ -30,26 +54,277 @@ def get_object_or_404(model, **filters):
     
     return obj
 
-def check_user_object_perms(obj, auth_user):
+def get_object_page_or_404(queryset, request, ordering, from_latest = False):
     """
-    A function that compares the user object passed to it to the authenticated user and raises an exception if they are not the same.
+    A function that:
+    - Fetches the page of objects requested by the cursor query parameters from the queryset, or from a list of querysets paged through as one, starting from the last object if from_latest is set.
+    - Returns the page of objects along with the next and previous cursors, and raises an exception if no cursor other than LATEST_CURSOR was given and no objects exist.
     """
-    if obj != auth_user:
+    querysets = queryset if isinstance(queryset, list) else [queryset]
+
+    obj_list, next_cursor, previous_cursor = paginate_querysets(querysets, request, ordering, from_latest)
+
+    has_cursor = request.query_params.get('before', LATEST_CURSOR) != LATEST_CURSOR or request.query_params.get('after')
+
+    if not obj_list and not has_cursor:
+
+        raise NotFound('These objects do not exist.')
+    
+    return obj_list, next_cursor, previous_cursor
+
+async def aget_object_page_or_404(queryset, request, ordering, from_latest = False):
+    """
+    A function that fetches a page of objects like get_object_page_or_404, with the async interface of the ORM.
+    """
+    querysets = queryset if isinstance(queryset, list) else [queryset]
+
+    obj_list, next_cursor, previous_cursor = await apaginate_querysets(querysets, request, ordering, from_latest)
+
+    has_cursor = request.query_params.get('before', LATEST_CURSOR) != LATEST_CURSOR or request.query_params.get('after')
+
+    if not obj_list and not has_cursor:
+
+        raise NotFound('These objects do not exist.')
+    
+    return obj_list, next_cursor, previous_cursor
+
+def get_chat_or_404(chat_id, auth_user, chats = Chat):
+    """
+    A function that:
+    - Query's a chat model or queryset for the chat with the given id, annotated with whether the authenticated user participates in it, in a single query.
+    - Returns the chat if it exists and the user participates in it.
+    - Raises a not found exception if the chat doesn't exist and an unauthorized exception if the user doesn't participate in it.
+    """
+    is_member = Exists(Participant.objects.filter(chat = OuterRef('pk'), model_user = auth_user))
+
+    chat = get_queryset(chats).annotate(is_member = is_member).filter(id = chat_id).first()
+
+    if not chat:
 
+        raise NotFound('This object does not exist.')
+    
+    if not chat.is_member:
+
+        raise Unauthorized('Unauthorized to use this method on this endpoint or object.')
+    
+    return chat
+
+def get_chat_message_or_404(chat_id, message_id, auth_user):
+    """
+    A function that:
+    - Query's the message with the given id in the chat with the given id along with its chat and whether the authenticated user participates in it, in a single query.
+    - Returns the chat and the message if they exist and the user participates in the chat.
+    - Only runs further queries when that fails, to raise the same not found or unauthorized exception that checking the chat, the membership and the message in turn would.
+    """
+    is_member = Exists(Participant.objects.filter(chat = OuterRef('chat_id'), model_user = auth_user))
+
+    message = Message.objects.select_related('chat').annotate(is_member = is_member).filter(id = message_id, chat_id = chat_id).first()
+
+    if message:
+
+        if not message.is_member:
+
+            raise Unauthorized('Unauthorized to use this method on this endpoint or object.')
+        
+        return message.chat, message
+    
+    get_chat_or_404(chat_id, auth_user)
+
+    if Message.objects.filter(id = message_id).exists():
+
+        # The message exists but belongs to another chat.
         raise Unauthorized('Unauthorized to use this method on this endpoint or object.')
     
-def check_object_perms(obj, **user_filter):
+    raise NotFound('This object does not exist.')
+
+def get_chat_message_or_archived_or_404(chat_id, message_id, auth_user):
     """
     A function that:
-    - Query's the model of the object passed to it with its object id as a filter.
-    - It applies an additional filter with a user model object as its value to check if the object belongs to the user.
-    - If the object dosen't exist a unauthorized exception is raised.
+    - Looks up the message like get_chat_message_or_404.
+    - Falls back to the archived messages of the chat when no live message has the id, so that archived messages can still be read one by one.
+    """
+    try:
+        return get_chat_message_or_404(chat_id, message_id, auth_user)
+    
+    except NotFound:
+
+        # The chat and the membership of the user have been checked by now, or the chat doesn't exist and no archived message matches either.
+        archived_message = ArchivedMessage.objects.select_related('chat').filter(id = message_id, chat_id = chat_id).first()
+
+        if not archived_message:
+
+            raise
+
+        return archived_message.chat, archived_message
+
+async def aget_chat_or_404(chat_id, auth_user, chats = Chat):
+    """
+    A function that looks up a chat and the membership of the authenticated user in it like get_chat_or_404, with the async interface of the ORM.
+    """
+    is_member = Exists(Participant.objects.filter(chat = OuterRef('pk'), model_user = auth_user))
+
+    chat = await get_queryset(chats).annotate(is_member = is_member).filter(id = chat_id).afirst()
+
+    if not chat:
+
+        raise NotFound('This object does not exist.')
+    
+    if not chat.is_member:
+
+        raise Unauthorized('Unauthorized to use this method on this endpoint or object.')
+    
+    return chat
+
+async def aget_chat_message_or_404(chat_id, message_id, auth_user):
     """
-    model = type(obj)
+    A function that looks up a message, its chat and the membership of the authenticated user in it like get_chat_message_or_404, with the async interface of the ORM.
+    """
+    is_member = Exists(Participant.objects.filter(chat = OuterRef('chat_id'), model_user = auth_user))
+
+    message = await Message.objects.select_related('chat').annotate(is_member = is_member).filter(id = message_id, chat_id = chat_id).afirst()
 
-    obj_filtered_by_user = model.objects.filter(id = obj.id).filter(**user_filter).first()
+    if message:
 
-    if not obj_filtered_by_user:
+        if not message.is_member:
+
+            raise Unauthorized('Unauthorized to use this method on this endpoint or object.')
+        
+        return message.chat, message
+    
+    await aget_chat_or_404(chat_id, auth_user)
+
+    if await Message.objects.filter(id = message_id).aexists():
+
+        # The message exists but belongs to another chat.
+        raise Unauthorized('Unauthorized to use this method on this endpoint or object.')
+    
+    raise NotFound('This object does not exist.')
+
+async def aget_chat_message_or_archived_or_404(chat_id, message_id, auth_user):
+    """
+    A function that looks up a message, falling back to the archived messages of the chat, like get_chat_message_or_archived_or_404, with the async interface of the ORM.
+    """
+    try:
+        return await aget_chat_message_or_404(chat_id, message_id, auth_user)
+    
+    except NotFound:
+
+        archived_message = await ArchivedMessage.objects.select_related('chat').filter(id = message_id, chat_id = chat_id).afirst()
+
+        if not archived_message:
+
+            raise
+
+        return archived_message.chat, archived_message
+
+def supports_update_returning(connection):
+    """
+    A function that checks if a database connection can return the updated rows of an update statement.
+    """
+    return connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert
+
+def update_returning(queryset, **values):
+    """
+    A function that:
+    - Sets the auto_now fields of the model to the current time, since queryset updates skip them.
+    - Updates the rows of the queryset and reads the first of them back in the same statement on databases that support RETURNING.
+    - Falls back to selecting the rows, updating them and selecting them again on other databases.
+    - Returns the updated object, or None if the queryset matched no rows.
+    """
+    model = queryset.model
+
+    now = timezone.now()
+
+    for field in model._meta.concrete_fields:
+
+        if getattr(field, 'auto_now', False):
+
+            values.setdefault(field.name, now)
+
+    connection = connections[queryset.db]
+
+    if not supports_update_returning(connection):
+
+        with transaction.atomic(using=queryset.db):
+
+            pks = list(queryset.values_list('pk', flat=True))
+
+            if not pks:
+
+                return None
+
+            model._base_manager.using(queryset.db).filter(pk__in = pks).update(**values)
+
+            return model._base_manager.using(queryset.db).filter(pk__in = pks).first()
+
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    query.annotations = {}
+
+    compiler = query.get_compiler(queryset.db)
+
+    # Rewrites filters that join other tables into a subquery on the primary key, as queryset updates do.
+    compiler.pre_sql_setup()
+
+    sql, params = compiler.as_sql()
+
+    fields = model._meta.concrete_fields
+    columns = [field.get_col(model._meta.db_table) for field in fields]
+    returning = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+
+    with transaction.mark_for_rollback_on_error(using=queryset.db):
+
+        with connection.cursor() as cursor:
+
+            cursor.execute(f'{sql} RETURNING {returning}', params)
+
+            row = cursor.fetchone()
+
+    if row is None:
+
+        return None
+    
+    row = list(row)
+
+    for index, column in enumerate(columns):
+
+        for converter in connection.ops.get_db_converters(column) + column.get_db_converters(connection):
+
+            row[index] = converter(row[index], column, connection)
+
+    return model.from_db(queryset.db, [field.attname for field in fields], row)
+
+def get_users_by_email_or_404(emails):
+    """
+    A function that:
+    - Query's the user model for the users with the emails passed to it in a single query.
+    - Returns the users in the order of their emails if all of them exist and raises an exception if any don't.
+    """
+    users_by_email = {user.email_address: user for user in get_user_model().objects.filter(email_address__in = emails)}
+
+    if len(users_by_email) != len(set(emails)):
+
+        raise NotFound('This object does not exist.' if len(emails) == 1 else 'These objects do not exist.')
+    
+    return [users_by_email[email] for email in dict.fromkeys(emails)]
+
+async def aget_users_by_email_or_404(emails):
+    """
+    A function that looks up the users with the emails passed to it like get_users_by_email_or_404, with the async interface of the ORM.
+    """
+    users_by_email = {user.email_address: user async for user in get_user_model().objects.filter(email_address__in = emails)}
+
+    if len(users_by_email) != len(set(emails)):
+
+        raise NotFound('This object does not exist.' if len(emails) == 1 else 'These objects do not exist.')
+    
+    return [users_by_email[email] for email in dict.fromkeys(emails)]
+
+def check_user_object_perms(obj, auth_user):
+    """
+    A function that compares the user object passed to it to the authenticated user and raises an exception if they are not the same.
+    """
+    if obj != auth_user:
 
         raise Unauthorized('Unauthorized to use this method on this endpoint or object.')
     
@@ -73,18 +348,240 @@ def clean_serializer_data(data):
 
 def check_chat_exists(chat_user, auth_user):
     """
-    A function that query's the chat model with the chat user and auth user objects to check if a chat with those users already exists.
+    A function that looks up the direct chat between the chat user and auth user objects by its unique key to check if it already exists.
     """
-    existing_chat = Chat.objects.filter(participants__model_user = chat_user).filter(participants__model_user = auth_user).first()
+    existing_chat = Chat.objects.filter(direct_key = direct_chat_key(chat_user.id, auth_user.id)).exists()
 
     if existing_chat:
 
         raise ParseError('This object already exists.')
 
+async def acheck_chat_exists(chat_user, auth_user):
+    """
+    A function that checks if the direct chat between the chat user and auth user objects already exists like check_chat_exists, with the async interface of the ORM.
+    """
+    existing_chat = await Chat.objects.filter(direct_key = direct_chat_key(chat_user.id, auth_user.id)).aexists()
+
+    if existing_chat:
+
+        raise ParseError('This object already exists.')
+
+def create_chat(chat_data, auth_user, chat_users, direct_key = None):
+    """
+    A function that:
+    - Creates a chat from the validated data passed to it, along with the participants of the authenticated user and the chat users, in a single transaction.
+    - Resolves to the direct chat a concurrent request created first, if there is one, instead of creating another.
+    - Returns the chat with its last message and participants fetched for serializing, along with whether it was created.
+    """
+    created = True
+
+    try:
+        with transaction.atomic():
+
+            new_chat = Chat.objects.create(direct_key = direct_key, **chat_data)
+
+            Participant.objects.bulk_create([Participant(model_user = user, chat = new_chat) for user in [auth_user, *chat_users]])
+
+    except IntegrityError:
+
+        if direct_key is None:
+
+            raise
+
+        # A concurrent request created the chat between the check and the insert, so this one returns that chat.
+        new_chat = Chat.objects.get(direct_key = direct_key)
+        created = False
+
+    Chat.objects.fetch_related([new_chat])
+
+    return new_chat, created
+
+def update_message(chat_id, message_id, auth_user, update_data):
+    """
+    A function that updates the message with the given id in a chat the authenticated user participates in and records the activity in its chat, returning the updated message or None if no message was updated.
+    """
+    with transaction.atomic():
+
+        updated_message = update_returning(Message.objects.filter(id = message_id, chat_id = chat_id, chat__participants__model_user = auth_user), **update_data)
+
+        if updated_message:
+
+            Chat.objects.record_activity(chat_id, updated_message.date_modified)
+
+    return updated_message
+
+def delete_message(chat, message):
+    """
+    A function that, in a single transaction:
+    - Replaces a message with a tombstone so that syncing clients learn of its deletion.
+    - Publishes the deletion and takes the message out of the unread counts and the last message of its chat.
+    """
+    with transaction.atomic():
+
+        tombstone = MessageTombstone.objects.create(message_id = message.id, chat = chat)
+
+        publish_chat_event(chat, 'message.deleted', {'id': message.id, 'chat': chat.id}, tombstone)
+
+        Participant.objects.record_deletion(message)
+
+        message.delete()
+
+        Chat.objects.refresh_last_message(chat.id, tombstone.date_deleted)
+
+def create_messages(chat, sender, items):
+    """
+    A function that:
+    - Looks up the messages the sender has already created with the client ids of the validated items passed to it.
+    - Creates the remaining items in the chat with a single bulk insert and records the chat activity and unread counts they cause.
+    - Returns a tuple of the message and whether it was created for each item, in order.
+    - Retries once if a concurrent request created a message with one of the client ids first.
+    """
+    for attempt in range(2):
+
+        try:
+            with transaction.atomic():
+
+                # A blank client id is stored as no client id, since the unique constraint on client ids would otherwise reject a second blank one.
+                items = [{**item, 'client_id': item.get('client_id') or None} for item in items]
+
+                client_ids = [item['client_id'] for item in items if item['client_id']]
+
+                messages_by_client_id = {message.client_id: message for message in Message.objects.filter(sender = sender, client_id__in = client_ids)} if client_ids else {}
+
+                new_messages = []
+                results = []
+
+                for item in items:
+
+                    client_id = item['client_id']
+
+                    if client_id in messages_by_client_id:
+
+                        results.append((messages_by_client_id[client_id], False))
+
+                        continue
+
+                    message = Message(sender = sender, chat = chat, content = item['content'], client_id = client_id)
+
+                    if client_id:
+
+                        messages_by_client_id[client_id] = message
+
+                    new_messages.append(message)
+                    results.append((message, True))
+
+                Message.objects.bulk_create(new_messages)
+
+                if new_messages:
+
+                    last_message = new_messages[-1]
+
+                    Chat.objects.record_activity(chat.id, last_message.date_created, last_message = last_message)
+
+                    Participant.objects.record_messages(chat.id, sender.id, last_message.id, count = len(new_messages))
+
+                return results
+
+        except IntegrityError:
+
+            if attempt:
+
+                raise
+
 def compare_email(email, auth_user_email):
     """
     A function that compares the email addres passed to it to the email addres of the authenticated user.
     """
     if email == auth_user_email:
 
-        raise ParseError("Email provided cannot be the same as the authenticated user's.")
\ No newline at end of file
+        raise ParseError("Email provided cannot be the same as the authenticated user's.")
+
+async def avalidate(serializer):
+    """
+    A function that validates the data passed to a serializer from an async view, in a thread since validating related fields queries the database.
+    """
+    await sync_to_async(serializer.is_valid)(raise_exception=True)
+
+def async_api_view(http_method_names):
+    """
+    A function that returns a decorator which turns a coroutine function into a native async view, in place of the api_view and IsAuthenticated permission of the sync views, which:
+    - Wraps the request in a rest framework request that parses its data.
+    - Authenticates the user from the user cache or with a single query through the async interface of the ORM, and refuses requests without a user.
+    - Renders the response returned by the view, or the exception it raised, the way api_view would.
+    """
+    def decorator(view):
+
+        @wraps(view)
+        async def async_view(request, *args, **kwargs):
+
+            request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+
+            authenticator = CachedJWTAuthentication()
+
+            renderers = [renderer() for renderer in api_settings.DEFAULT_RENDERER_CLASSES]
+            renderer, media_type = renderers[0], renderers[0].media_type
+
+            context = {'view': None, 'args': args, 'kwargs': kwargs, 'request': request}
+
+            try:
+                renderer, media_type = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS().select_renderer(request, renderers)
+
+                user_auth = await authenticator.aauthenticate(request)
+
+                if user_auth is None:
+
+                    raise NotAuthenticated()
+
+                request.user, request.auth = user_auth
+
+                if request.method not in http_method_names:
+
+                    raise MethodNotAllowed(request.method)
+
+                response = await view(request, *args, **kwargs)
+
+            except Exception as exception:
+
+                response = handle_async_view_exception(exception, request, authenticator, context)
+
+            response.accepted_renderer = renderer
+            response.accepted_media_type = media_type
+            response.renderer_context = {**context, 'response': response}
+
+            response['Allow'] = ', '.join(http_method_names)
+
+            response.render()
+
+            # Returned as a plain response, since Django renders a response that can still be rendered in a thread.
+            rendered_response = HttpResponse(response.content, status=response.status_code)
+
+            for header, value in response.items():
+
+                rendered_response[header] = value
+
+            return rendered_response
+
+        # Set on the view itself, since csrf_exempt wraps it in a sync function.
+        async_view.csrf_exempt = True
+
+        return async_view
+
+    return decorator
+
+def handle_async_view_exception(exception, request, authenticator, context):
+    """
+    A function that turns an exception raised by an async view into a response the way the exception handler of the rest framework does for sync views, raising it again if it is not an api exception.
+    """
+    if isinstance(exception, (NotAuthenticated, AuthenticationFailed)):
+
+        exception.auth_header = authenticator.authenticate_header(request)
+
+    response = exception_handler(exception, context)
+
+    if response is None:
+
+        raise exception
+
+    response.exception = True
+
+    return response